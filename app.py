@@ -1,11 +1,14 @@
 from flask import Flask
 from controller import api
-from config.db_config import db, url_db
+from config.db_config import init_db
+from util.log_config import clear_tracing_info
+from util.metrics import init_metrics
 
 app = Flask(__name__)
 api.init_app(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = url_db
-db.init_app(app)
+init_db(app)
+app.teardown_request(clear_tracing_info)
+init_metrics(app)
 
 if __name__ == "__main__":
     app.run(debug=True)
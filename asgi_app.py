@@ -0,0 +1,212 @@
+import io
+from http import HTTPStatus
+from json import JSONDecodeError
+
+from jsonschema.exceptions import ValidationError
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.exceptions import BadRequest
+
+from config.async_db_config import run_in_session, stream_in_session, AsyncStreamReader
+from config.db_config import create_tables
+from config.cache_config import account_cache, idempotency_cache
+from services.holders_service import HoldersService
+from services.holders_import_service import HoldersImportService
+from services.accounts_service import AccountsService
+from services.transactions_service import TransactionsService
+from services.transactions_export_service import TransactionsExportService
+from services.transactions_analytics_service import TransactionsAnalyticsService
+from util.log_config import logger
+from util.metrics import metrics, Metrics
+from util.serializers import dumps
+from util.statement_cache_stats import statement_cache_stats
+from util.account_contention_stats import account_contention_stats
+
+holders_service = HoldersService()
+holders_import_service = HoldersImportService()
+accounts_service = AccountsService()
+transactions_service = TransactionsService()
+transactions_export_service = TransactionsExportService()
+transactions_analytics_service = TransactionsAnalyticsService()
+create_tables()
+
+
+class SerializedJSONResponse(JSONResponse):
+
+    def render(self, content):
+        return dumps(content).encode('utf-8')
+
+
+async def get_all_holders(request):
+    return await run_in_session(holders_service.get_all_holders, request.query_params), HTTPStatus.OK
+
+
+async def create_holder(request):
+    return await run_in_session(holders_service.create_holder, await request.json()), HTTPStatus.CREATED
+
+
+async def get_holder_by_id(request):
+    return await run_in_session(holders_service.get_holder_by_id, request.path_params['holder_id']), HTTPStatus.OK
+
+
+async def update_holder(request):
+    return await run_in_session(holders_service.update_holder, request.path_params['holder_id'], await request.json()), HTTPStatus.OK
+
+
+async def import_holders(request):
+    file_format = holders_import_service.file_format(request.query_params.get('format'), request.headers.get('content-type'))
+    # Read as it arrives: the service validates and loads each chunk of rows before the rest is received.
+    lines = io.TextIOWrapper(io.BufferedReader(AsyncStreamReader(request.stream())), encoding='utf-8', newline='')
+    return await run_in_session(holders_import_service.import_holders, lines, file_format), HTTPStatus.OK
+
+
+async def create_account(request):
+    return await run_in_session(accounts_service.create_account, await request.json()), HTTPStatus.CREATED
+
+
+async def get_all_accounts(request):
+    return await run_in_session(accounts_service.get_all_accounts, request.query_params), HTTPStatus.OK
+
+
+async def get_account_by_id(request):
+    return await run_in_session(accounts_service.get_account_by_id, request.path_params['account_id']), HTTPStatus.OK
+
+
+async def block_account(request):
+    return await run_in_session(accounts_service.block_account, request.path_params['account_id']), HTTPStatus.OK
+
+
+async def reactivate_account(request):
+    return await run_in_session(accounts_service.reactivate_account, request.path_params['account_id']), HTTPStatus.OK
+
+
+async def close_account(request):
+    return await run_in_session(accounts_service.close_account, request.path_params['account_id']), HTTPStatus.OK
+
+
+async def get_account_statement(request):
+    lines = await stream_in_session(transactions_service.get_account_statement, request.path_params['account_id'],
+                                    request.query_params.get('from'), request.query_params.get('to'))
+    return StreamingResponse(lines, media_type='application/x-ndjson'), HTTPStatus.OK
+
+
+async def get_account_analytics(request):
+    params = request.query_params
+    return await run_in_session(transactions_analytics_service.get_account_analytics, request.path_params['account_id'],
+                                params.get('from'), params.get('to'), params.get('bucket')), HTTPStatus.OK
+
+
+async def get_accounts_analytics(request):
+    return await run_in_session(transactions_analytics_service.get_accounts_analytics, await request.json()), HTTPStatus.OK
+
+
+async def get_all_transactions(request):
+    return await run_in_session(transactions_service.get_all_transactions, request.query_params), HTTPStatus.OK
+
+
+async def export_transactions(request):
+    params = request.query_params
+    file_format = params.get('format', 'csv')
+    # Every item is already a whole chunk of transactions.
+    chunks = await stream_in_session(transactions_export_service.export, file_format, params.get('from'),
+                                     params.get('to'), params.get('after_id'), batch_size=1)
+    return StreamingResponse(chunks, media_type=transactions_export_service.content_types[file_format],
+                             headers={'Content-Disposition': f'attachment; filename=transactions.{file_format}'}), \
+        HTTPStatus.OK
+
+
+async def get_transaction_by_id(request):
+    return await run_in_session(transactions_service.get_transaction_by_id, request.path_params['transaction_id']), HTTPStatus.OK
+
+
+async def deposit(request):
+    return await run_in_session(transactions_service.deposit, await request.json(),
+                                request.headers.get('Idempotency-Key')), HTTPStatus.OK
+
+
+async def withdraw(request):
+    return await run_in_session(transactions_service.withdraw, await request.json(),
+                                request.headers.get('Idempotency-Key')), HTTPStatus.OK
+
+
+async def transfer(request):
+    return await run_in_session(transactions_service.transfer, await request.json(),
+                                request.headers.get('Idempotency-Key')), HTTPStatus.OK
+
+
+async def batch(request):
+    return await run_in_session(transactions_service.batch, await request.json()), HTTPStatus.OK
+
+
+async def get_stats(request):
+    return {
+        'statement_cache': statement_cache_stats.snapshot(),
+        'account_cache': account_cache.stats(),
+        'idempotency_cache': idempotency_cache.stats(),
+        'account_contention': account_contention_stats.snapshot()
+    }, HTTPStatus.OK
+
+
+async def get_metrics(request):
+    return Response(metrics.expose(), headers={'Content-Type': Metrics.content_type})
+
+
+def route(path, **handlers):
+    """Builds a route whose errors are answered the same way as controller/api_controller.py."""
+    async def endpoint(request):
+        started = metrics.start_request()
+        response = await respond(request)
+        metrics.end_request(started, request.method, path, response.status_code)
+        return response
+
+    async def respond(request):
+        try:
+            result, status = await handlers.get(request.method, handlers.get('GET'))(request)
+            if isinstance(result, Response):
+                return result
+            return SerializedJSONResponse(result, status_code=status)
+        except JSONDecodeError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return SerializedJSONResponse({'message': BadRequest.description}, status_code=HTTPStatus.BAD_REQUEST)
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return SerializedJSONResponse({'error': f'{e.args[0]}'}, status_code=HTTPStatus.BAD_REQUEST)
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            status_code = getattr(e, 'status_code', None)
+            if status_code is not None:
+                return SerializedJSONResponse({'error': f'{e.args[0]}'}, status_code=status_code)
+            return SerializedJSONResponse({'error': f'An error occurred while performing the request: {e.args[0]}'},
+                                status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    return Route(path, endpoint, methods=list(handlers))
+
+
+app = Starlette(routes=[
+    route('/v1/holder', GET=get_all_holders, POST=create_holder),
+    route('/v1/holder/import', POST=import_holders),
+    route('/v1/holder/{holder_id:int}', GET=get_holder_by_id, PUT=update_holder),
+    route('/v1/account', GET=get_all_accounts, POST=create_account),
+    route('/v1/account/analytics', POST=get_accounts_analytics),
+    route('/v1/account/{account_id:int}', GET=get_account_by_id),
+    route('/v1/account/{account_id:int}/block', POST=block_account),
+    route('/v1/account/{account_id:int}/reactivate', POST=reactivate_account),
+    route('/v1/account/{account_id:int}/close', POST=close_account),
+    route('/v1/account/{account_id:int}/statement', GET=get_account_statement),
+    route('/v1/account/{account_id:int}/analytics', GET=get_account_analytics),
+    route('/v1/transactions', GET=get_all_transactions),
+    route('/v1/transactions/deposit', POST=deposit),
+    route('/v1/transactions/withdraw', POST=withdraw),
+    route('/v1/transactions/transfer', POST=transfer),
+    route('/v1/transactions/batch', POST=batch),
+    route('/v1/transactions/export', GET=export_transactions),
+    route('/v1/transactions/{transaction_id:str}', GET=get_transaction_by_id),
+    route('/v1/stats', GET=get_stats),
+    Route('/metrics', get_metrics)
+])
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app)
@@ -0,0 +1,52 @@
+"""Compares hot_paths_benchmark results across commits.
+
+Reads the JSON lines written with ``--output`` and prints, for each
+operation, the ops/sec and p95 of every run next to the first (baseline) one:
+
+    python -m benchmarks.compare_results results.jsonl
+"""
+import argparse
+import json
+
+
+def load(path):
+    with open(path) as results:
+        return [json.loads(line) for line in results if line.strip()]
+
+
+def compare(runs):
+    baseline = runs[0]['operations']
+    rows = []
+    for run in runs:
+        for name, result in sorted(run['operations'].items()):
+            base = baseline.get(name)
+            rows.append({
+                'commit': run.get('commit'),
+                'operation': name,
+                'ops_per_second': result['ops_per_second'],
+                'p95_ms': result['p95_ms'],
+                'p99_ms': result['p99_ms'],
+                'errors': result['errors'],
+                'ops_per_second_change': _change(base and base['ops_per_second'], result['ops_per_second']),
+                'p95_change': _change(base and base['p95_ms'], result['p95_ms'])
+            })
+    return rows
+
+
+def _change(before, after):
+    if not before:
+        return None
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('results')
+    args = parser.parse_args()
+
+    for row in compare(load(args.results)):
+        print(json.dumps(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Rows/minute benchmark for HoldersImportService.import_holders.
+
+Imports a generated CSV file of new holders, half of them with an opening
+balance, into the configured database and prints the result as JSON.
+``--entry-point wsgi`` reads the file the way the Flask controller does, on
+the sync engine (COPY through psycopg2); ``--entry-point asgi`` streams it in
+chunks through run_in_session the way asgi_app.py does, on the async engine
+(COPY through asyncpg):
+
+    python -m benchmarks.holders_import_benchmark --entry-point wsgi --rows 200000
+    python -m benchmarks.holders_import_benchmark --entry-point asgi --rows 200000
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+
+from config.async_db_config import run_in_session, AsyncStreamReader
+from config.db_config import session, create_tables
+from services.holders_import_service import HoldersImportService
+
+
+def csv_lines(rows):
+    # A random four-digit prefix keeps the documents of one run from clashing with earlier runs.
+    prefix = random.randint(10 ** 3, 10 ** 4 - 1)
+    yield 'name,document,balance\n'
+    for index in range(rows):
+        yield f'Holder {index},{prefix}{index:07d},{index % 2 * 100}\n'
+
+
+def import_wsgi(holders_import_service, rows):
+    try:
+        return holders_import_service.import_holders(csv_lines(rows), 'csv')
+    finally:
+        session.remove()
+
+
+def import_asgi(holders_import_service, rows, chunk_bytes):
+    async def upload():
+        chunk = []
+        size = 0
+        for line in csv_lines(rows):
+            chunk.append(line.encode('utf-8'))
+            size += len(chunk[-1])
+            if size >= chunk_bytes:
+                yield b''.join(chunk)
+                chunk, size = [], 0
+        yield b''.join(chunk)
+
+    async def run():
+        lines = io.TextIOWrapper(io.BufferedReader(AsyncStreamReader(upload())), encoding='utf-8', newline='')
+        return await run_in_session(holders_import_service.import_holders, lines, 'csv')
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entry-point', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--chunk-bytes', type=int, default=65536, help='size of the uploaded chunks (asgi only)')
+    args = parser.parse_args()
+
+    create_tables()
+    holders_import_service = HoldersImportService(chunk_size=args.chunk_size)
+    started = time.perf_counter()
+    if args.entry_point == 'wsgi':
+        report = import_wsgi(holders_import_service, args.rows)
+    else:
+        report = import_asgi(holders_import_service, args.rows, args.chunk_bytes)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'entry_point': args.entry_point,
+        'rows': args.rows,
+        'chunk_size': args.chunk_size,
+        'seconds': round(elapsed, 3),
+        'imported': report['imported'],
+        'rejected': report['rejected'],
+        'rows_per_minute': round(report['imported'] / elapsed * 60)
+    }))
+
+
+if __name__ == '__main__':
+    main()
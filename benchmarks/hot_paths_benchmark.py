@@ -0,0 +1,169 @@
+"""Load benchmark of the transaction hot paths against the real Flask app and a local database.
+
+Seeds ``--accounts`` active accounts and ``--transactions`` transactions on
+the configured database, serves app.py on a local threaded server (or uses
+``--url`` for an already running one) and drives a weighted mix of deposit,
+withdraw, transfer, account lookup and paginated listings with ``--clients``
+concurrent keep-alive clients. Prints one JSON document with p50/p95/p99 and
+ops/sec per operation, tagged with the current commit, and appends it to
+``--output`` when given:
+
+    python -m benchmarks.hot_paths_benchmark --accounts 1000 --transactions 100000 --output results.jsonl
+    python -m benchmarks.compare_results results.jsonl
+
+The same volumes, ``--seed`` and ``--mix`` seed the same balances and
+transaction history shape, so runs on different commits are comparable.
+"""
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from werkzeug.serving import make_server
+
+from app import app
+from benchmarks.http_load import Operation, run_load
+from config.db_config import session
+from models.AccountModel import AccountModel
+from models.HolderModel import HolderModel
+from models.TransactionModel import TransactionModel
+from util.enums.account_status import Status
+from util.enums.transactions_types import TransactionsTypes
+from util.uuid_utils import UuidUtils
+
+DEFAULT_MIX = 'get_account=30,deposit=20,withdraw=15,transfer=15,list_transactions=10,list_accounts=10'
+
+
+def seed(accounts, transactions, rng, batch_size=1000):
+    """Creates the holders/accounts and a transactions history between them; returns the account ids."""
+    account_ids = []
+    # Documents are unique, so each run gets its own prefix.
+    run_id = int(time.time()) % 10 ** 5
+    for offset in range(0, accounts, batch_size):
+        holders = [HolderModel(name='benchmark', document=f'{run_id:05d}{index:06d}')
+                   for index in range(offset, min(offset + batch_size, accounts))]
+        session.add_all(holders)
+        session.flush()
+        models = [AccountModel(holder_id=holder.holder_id, balance=Decimal('1000000.00'), status=Status.ACTIVE.value)
+                  for holder in holders]
+        session.add_all(models)
+        session.flush()
+        account_ids.extend(account.account_id for account in models)
+        session.commit()
+
+    started = datetime.now() - timedelta(days=90)
+    for offset in range(0, transactions, batch_size):
+        session.add_all(TransactionModel(
+            transaction_id=str(UuidUtils.uuid7()),
+            transaction_type=TransactionsTypes.TRANSFER.value,
+            transaction_value=Decimal(rng.randint(1, 10000)) / 100,
+            transaction_date=started + timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+            origin_account=rng.choice(account_ids),
+            destination_account=rng.choice(account_ids)
+        ) for _ in range(offset, min(offset + batch_size, transactions)))
+        session.commit()
+    session.remove()
+    return account_ids
+
+
+def operations(account_ids, mix, rng):
+    lock = threading.Lock()
+
+    def account_id():
+        with lock:
+            return rng.choice(account_ids)
+
+    def two_accounts():
+        with lock:
+            return rng.sample(account_ids, 2)
+
+    def transfer_body():
+        origin, destination = two_accounts()
+        return {'original_account_id': origin, 'destination_account_id': destination, 'value': 1.00}
+
+    def accounts_page():
+        with lock:
+            return f'/v1/account?currentPage={rng.randint(1, max(1, len(account_ids) // 50))}&maxItemsPerPage=50'
+
+    available = {
+        'get_account': Operation('get_account', 'GET', lambda: f'/v1/account/{account_id()}'),
+        'deposit': Operation('deposit', 'POST', '/v1/transactions/deposit',
+                             body=lambda: {'account_id': account_id(), 'value': 1.00}),
+        'withdraw': Operation('withdraw', 'POST', '/v1/transactions/withdraw',
+                              body=lambda: {'account_id': account_id(), 'value': 1.00}),
+        'transfer': Operation('transfer', 'POST', '/v1/transactions/transfer', body=transfer_body),
+        'list_transactions': Operation('list_transactions', 'GET', '/v1/transactions?after=&maxItemsPerPage=50'),
+        'list_accounts': Operation('list_accounts', 'GET', accounts_page)
+    }
+    selected = []
+    for item in mix.split(','):
+        name, weight = item.split('=')
+        operation = available[name.strip()]
+        operation.weight = float(weight)
+        selected.append(operation)
+    return selected
+
+
+def serve_app():
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Benchmark an already running server instead of serving app.py locally.')
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--warmup-seconds', type=float, default=5)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON lines file the result is appended to.')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    account_ids = seed(args.accounts, args.transactions, rng)
+    selected = operations(account_ids, args.mix, rng)
+    server, url = (None, args.url) if args.url else serve_app()
+    try:
+        if args.warmup_seconds > 0:
+            run_load(url, selected, args.clients, args.warmup_seconds)
+        results = run_load(url, selected, args.clients, args.seconds)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    document = {
+        'commit': current_commit(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'url': args.url or 'local',
+        'accounts': args.accounts,
+        'transactions': args.transactions,
+        'clients': args.clients,
+        'seconds': args.seconds,
+        'mix': args.mix,
+        'seed': args.seed,
+        'operations': results
+    }
+    print(json.dumps(document))
+    if args.output:
+        with open(args.output, 'a') as output:
+            output.write(json.dumps(document) + '\n')
+
+
+if __name__ == '__main__':
+    main()
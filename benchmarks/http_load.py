@@ -0,0 +1,93 @@
+"""Small threaded HTTP load driver shared by the benchmarks."""
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class Operation:
+
+    def __init__(self, name, method, path, weight=1, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.weight = weight
+        self.body = body
+
+    def request(self):
+        path = self.path() if callable(self.path) else self.path
+        body = self.body() if callable(self.body) else self.body
+        return self.method, path, None if body is None else json.dumps(body)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    result = {}
+    for name, values in latencies.items():
+        values.sort()
+        result[name] = {
+            'requests': len(values),
+            'errors': errors.get(name, 0),
+            'ops_per_second': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3)
+        }
+    return result
+
+
+def run_load(base_url, operations, clients, seconds):
+    """Runs ``clients`` keep-alive connections for ``seconds`` picking operations by weight.
+
+    Returns per-operation request count, error count (non 2xx or transport
+    errors), ops/sec and p50/p95/p99 latencies.
+    """
+    url = urlsplit(base_url)
+    weights = [operation.weight for operation in operations]
+    latencies = {operation.name: [] for operation in operations}
+    errors = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        local_latencies = {operation.name: [] for operation in operations}
+        local_errors = {}
+        while time.perf_counter() < deadline:
+            operation = random.choices(operations, weights)[0]
+            method, path, body = operation.request()
+            started = time.perf_counter()
+            try:
+                connection.request(method, url.path.rstrip('/') + path, body=body,
+                                   headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 300:
+                    local_errors[operation.name] = local_errors.get(operation.name, 0) + 1
+            except (OSError, http.client.HTTPException):
+                local_errors[operation.name] = local_errors.get(operation.name, 0) + 1
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            local_latencies[operation.name].append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            for name, values in local_latencies.items():
+                latencies[name].extend(values)
+            for name, count in local_errors.items():
+                errors[name] = errors.get(name, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors, time.perf_counter() - started)
@@ -0,0 +1,74 @@
+"""Per-row cost of serializing a transactions page, before and after util/serializers.py.
+
+Builds in-memory transactions (no database needed) and times the previous
+hand-built dict plus stdlib json against TransactionSerializer plus
+``serializers.dumps``, printing nanoseconds per row as JSON:
+
+    python -m benchmarks.serializer_benchmark --rows 50
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+from decimal import Decimal
+
+from builders.transaction_builder import TransactionBuilder
+from util import serializers
+from util.enums.transactions_types import TransactionsTypes
+from util.serializers import TransactionSerializer
+
+
+def legacy_transaction_response(transaction):
+    return {
+        'transaction_id': transaction.transaction_id,
+        'transaction_type': TransactionsTypes(transaction.transaction_type).name,
+        'transaction_value': str(Decimal(transaction.transaction_value).quantize(Decimal('1.00'))),
+        'transaction_date': transaction.transaction_date.strftime("%Y-%m-%dT%H:%M:%S"),
+        'origin_account': transaction.origin_account,
+        'destination_account': '' if not transaction.destination_account else transaction.destination_account
+    }
+
+
+def build_transactions(rows):
+    transactions = []
+    for index in range(rows):
+        body = {'original_account_id': index + 1, 'destination_account_id': index + 2, 'value': 10.5}
+        transaction = TransactionBuilder.transaction_builder(body, TransactionsTypes.TRANSFER.value)
+        transaction.transaction_value = Decimal('10.50')
+        transaction.transaction_date = datetime(2024, 6, 24, 12, 20, 46)
+        transactions.append(transaction)
+    return transactions
+
+
+def per_row_ns(function, rows, repeat, number):
+    return round(min(timeit.repeat(function, repeat=repeat, number=number)) / (number * rows) * 1e9, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    transactions = build_transactions(args.rows)
+    results = {
+        'rows': args.rows,
+        'json_backend': 'orjson' if serializers.orjson is not None else 'json',
+        'legacy_dict_ns_per_row': per_row_ns(
+            lambda: [legacy_transaction_response(transaction) for transaction in transactions],
+            args.rows, args.repeat, args.number),
+        'serializer_dict_ns_per_row': per_row_ns(
+            lambda: TransactionSerializer.to_list(transactions), args.rows, args.repeat, args.number),
+        'legacy_page_ns_per_row': per_row_ns(
+            lambda: json.dumps({'transactions': [legacy_transaction_response(transaction) for transaction in transactions]}),
+            args.rows, args.repeat, args.number),
+        'serializer_page_ns_per_row': per_row_ns(
+            lambda: serializers.dumps({'transactions': TransactionSerializer.to_list(transactions)}),
+            args.rows, args.repeat, args.number)
+    }
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Compares the WSGI and ASGI serving modes under the same account lookup/deposit mix.
+
+Start one server, run the benchmark against it, then repeat with the other:
+
+    gunicorn -w 1 --threads 32 -b 127.0.0.1:8000 app:app
+    uvicorn --workers 1 --port 8001 asgi_app:app
+
+    python -m benchmarks.serving_mode_benchmark --url http://127.0.0.1:8000 --label wsgi
+    python -m benchmarks.serving_mode_benchmark --url http://127.0.0.1:8001 --label asgi
+
+Both servers must point at the same database and ``--account-id`` must be an
+active account.
+"""
+import argparse
+import json
+
+from benchmarks.http_load import Operation, run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--label', default='')
+    parser.add_argument('--account-id', type=int, default=1)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=30)
+    args = parser.parse_args()
+
+    operations = [
+        Operation('get_account', 'GET', f'/v1/account/{args.account_id}', weight=9),
+        Operation('deposit', 'POST', '/v1/transactions/deposit', weight=1,
+                  body={'account_id': args.account_id, 'value': 1.00})
+    ]
+    print(json.dumps({
+        'label': args.label,
+        'url': args.url,
+        'clients': args.clients,
+        'seconds': args.seconds,
+        'operations': run_load(args.url, operations, args.clients, args.seconds)
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Insert throughput and index size of random varchar ids versus time-ordered uuid ids.
+
+Loads the same number of rows into two temporary tables shaped like
+accounts.transactions on the configured database, one keyed by
+``str(uuid4())`` in a varchar(255) column (the previous layout) and one keyed
+by ``UuidUtils.uuid7()`` in a native uuid column, and prints the result as JSON:
+
+    python -m benchmarks.transaction_id_benchmark --rows 1000000
+
+Use enough rows for the primary key to outgrow shared_buffers, otherwise the
+random inserts never miss the cache and the gap is understated.
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+
+from config.db_config import engine
+from util.uuid_utils import UuidUtils
+
+LAYOUTS = {
+    'uuid4-varchar': ('character varying(255)', lambda: str(uuid.uuid4())),
+    'uuid7-uuid': ('uuid', lambda: str(UuidUtils.uuid7()))
+}
+
+
+def run(connection, layout, rows, batch_size):
+    column_type, new_id = LAYOUTS[layout]
+    table = 'benchmark_' + layout.replace('-', '_')
+    connection.execute(text(f'DROP TABLE IF EXISTS {table}'))
+    connection.execute(text(
+        f'CREATE TEMPORARY TABLE {table} (transaction_id {column_type} PRIMARY KEY, '
+        f'transaction_type character varying(255), transaction_value numeric, '
+        f'transaction_date timestamp without time zone, origin_account integer, destination_account integer)'
+    ))
+    connection.commit()
+    insert = text(f'INSERT INTO {table} VALUES (:transaction_id, :transaction_type, :transaction_value, '
+                  f':transaction_date, :origin_account, :destination_account)')
+
+    started = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        connection.execute(insert, [{
+            'transaction_id': new_id(),
+            'transaction_type': '1',
+            'transaction_value': 1,
+            'transaction_date': datetime.now(),
+            'origin_account': 1,
+            'destination_account': None
+        } for _ in range(min(batch_size, rows - offset))])
+        connection.commit()
+    elapsed = time.perf_counter() - started
+
+    index_bytes = connection.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar_one()
+    return {
+        'layout': layout,
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'inserts_per_second': round(rows / elapsed, 2),
+        'primary_key_bytes': index_bytes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    with engine.connect() as connection:
+        print(json.dumps([run(connection, layout, args.rows, args.batch_size) for layout in LAYOUTS]))
+
+
+if __name__ == '__main__':
+    main()
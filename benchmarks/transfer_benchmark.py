@@ -0,0 +1,114 @@
+"""Transfers/sec benchmark for TransactionsService.transfer.
+
+Runs concurrent transfers between a pool of seeded accounts against the
+configured database and prints the result as JSON. ``--mode legacy`` replays
+the previous three-commit, lock-free path so both can be compared on the same
+database:
+
+    python -m benchmarks.transfer_benchmark --mode legacy
+    python -m benchmarks.transfer_benchmark --mode single-commit
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from decimal import Decimal
+
+from config.db_config import session, create_tables
+from models.AccountModel import AccountModel
+from models.HolderModel import HolderModel
+from services.accounts_service import AccountsService
+from services.transactions_service import TransactionsService
+from builders.transaction_builder import TransactionBuilder
+from repository.transactions_repository import TransactionsRepository
+from util.enums.account_status import Status
+from util.enums.transactions_types import TransactionsTypes
+
+
+def seed_accounts(count, balance):
+    account_ids = []
+    for _ in range(count):
+        holder = HolderModel(name='benchmark', document=str(random.randint(10 ** 10, 10 ** 11 - 1)))
+        session.add(holder)
+        session.flush()
+        account = AccountModel(holder_id=holder.holder_id, balance=Decimal(balance), status=Status.ACTIVE.value)
+        session.add(account)
+        session.flush()
+        account_ids.append(account.account_id)
+    session.commit()
+    session.remove()
+    return account_ids
+
+
+def legacy_transfer(accounts_service, transactions_repository, body):
+    origin_account = accounts_service.get_account_by_id(body['original_account_id'], False)
+    destination_account = accounts_service.get_account_by_id(body['destination_account_id'], False)
+    value = Decimal(body['value'])
+    accounts_service.update_account(origin_account, Decimal(value * -1).quantize(Decimal('1.00')))
+    accounts_service.update_account(destination_account, Decimal(value).quantize(Decimal('1.00')))
+    transactions_repository.create_transaction(
+        TransactionBuilder.transaction_builder(body, TransactionsTypes.TRANSFER.value)
+    )
+
+
+def run(mode, account_ids, threads, seconds):
+    counters = {'transfers': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        accounts_service = AccountsService()
+        transactions_service = TransactionsService()
+        transactions_repository = TransactionsRepository()
+        transfers = errors = 0
+        while time.perf_counter() < deadline:
+            origin, destination = random.sample(account_ids, 2)
+            body = {'original_account_id': origin, 'destination_account_id': destination, 'value': 1.00}
+            try:
+                if mode == 'legacy':
+                    legacy_transfer(accounts_service, transactions_repository, body)
+                else:
+                    transactions_service.transfer(body)
+                transfers += 1
+            except Exception:
+                session.rollback()
+                errors += 1
+        session.remove()
+        with lock:
+            counters['transfers'] += transfers
+            counters['errors'] += errors
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'mode': mode,
+        'threads': threads,
+        'accounts': len(account_ids),
+        'seconds': round(elapsed, 3),
+        'transfers': counters['transfers'],
+        'errors': counters['errors'],
+        'transfers_per_second': round(counters['transfers'] / elapsed, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['single-commit', 'legacy'], default='single-commit')
+    parser.add_argument('--accounts', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    create_tables()
+    account_ids = seed_accounts(args.accounts, '1000000.00')
+    print(json.dumps(run(args.mode, account_ids, args.threads, args.seconds)))
+
+
+if __name__ == '__main__':
+    main()
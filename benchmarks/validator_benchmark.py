@@ -0,0 +1,53 @@
+"""Per-request validation cost of jsonschema.validate versus the compiled Validator.
+
+Times valid and invalid bodies for the deposit/withdraw and transfer schemas
+(no database needed) and prints microseconds per call as JSON:
+
+    python -m benchmarks.validator_benchmark
+"""
+import argparse
+import json
+import timeit
+
+from jsonschema import validate, ValidationError
+
+from util.schemas_templates import account_financial_operation_schema, transfer_schema
+from util.validator import Validator
+
+CASES = {
+    'deposit_valid': (account_financial_operation_schema, {'account_id': 1, 'value': 100.0}),
+    'deposit_invalid': (account_financial_operation_schema, {'account_id': 1, 'value': 0}),
+    'transfer_valid': (transfer_schema, {'original_account_id': 1, 'destination_account_id': 2, 'value': 100.0}),
+    'transfer_invalid': (transfer_schema, {'original_account_id': 1, 'value': 100.0})
+}
+
+
+def call(function, body, schema):
+    try:
+        function(body, schema)
+    except ValidationError:
+        pass
+
+
+def per_call_us(function, body, schema, repeat, number):
+    timings = timeit.repeat(lambda: call(function, body, schema), repeat=repeat, number=number)
+    return round(min(timings) / number * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    for name, (schema, body) in CASES.items():
+        results[name] = {
+            'jsonschema_validate_us': per_call_us(validate, body, schema, args.repeat, args.number),
+            'validator_us': per_call_us(Validator.validate_body, body, schema, args.repeat, args.number)
+        }
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
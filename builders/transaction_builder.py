@@ -1,6 +1,7 @@
 from models.TransactionModel import TransactionModel
-import uuid
+from models.IdempotencyKeyModel import IdempotencyKeyModel
 from datetime import datetime
+from util.uuid_utils import UuidUtils
 
 
 class TransactionBuilder:
@@ -8,10 +9,19 @@ class TransactionBuilder:
     @staticmethod
     def transaction_builder(body, transaction_type, account_id=None):
         return TransactionModel(
-            transaction_id=str(uuid.uuid4()),
+            transaction_id=str(UuidUtils.uuid7()),
             transaction_type=transaction_type,
             transaction_value=body['value'],
             transaction_date=datetime.now(),
             origin_account=account_id if account_id else body['original_account_id'],
             destination_account=None if account_id else body['destination_account_id']
         )
+
+    @staticmethod
+    def idempotency_key_builder(idempotency_key, request_hash, transaction):
+        return IdempotencyKeyModel(
+            idempotency_key=idempotency_key,
+            request_hash=request_hash,
+            transaction_id=transaction.transaction_id,
+            transaction_date=transaction.transaction_date
+        )
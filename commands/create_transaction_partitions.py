@@ -0,0 +1,35 @@
+"""Pre-creates the monthly partitions of accounts.transactions.
+
+Meant to run daily from cron, well before the month turns, so inserts never
+land in the default partition:
+
+    python -m commands.create_transaction_partitions --months-ahead 3
+"""
+import argparse
+from datetime import date
+
+from config.db_config import session
+from repository.transactions_repository import TransactionsRepository
+from util.log_config import logger
+
+
+def add_months(month, months):
+    year, month_index = divmod(month.month - 1 + months, 12)
+    return date(month.year + year, month_index + 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--months-ahead', type=int, default=3)
+    args = parser.parse_args()
+
+    current_month = date.today().replace(day=1)
+    try:
+        created = TransactionsRepository().create_partitions(current_month, add_months(current_month, args.months_ahead))
+        logger.info({'message': 'Transactions partitions are up to date.', 'created_partitions': created})
+    finally:
+        session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Exports accounts.transactions, or a date range of it, to CSV or Parquet files.
+
+Writes one file of ``--chunk-size`` transactions at a time to ``--folder``,
+plus a checkpoint.json with the last exported transaction. Running the same
+command again on the folder resumes after that transaction, so a failed
+export doesn't start over:
+
+    python -m commands.export_transactions --folder export/2024-01 --format parquet --from 2024-01-01 --to 2024-01-31
+"""
+import argparse
+
+from config.db_config import session
+from services.transactions_export_service import TransactionsExportService
+from util.log_config import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--format', choices=TransactionsExportService.formats, default='csv')
+    parser.add_argument('--from', dest='date_from', help='First day (or ISO 8601 date and time) exported.')
+    parser.add_argument('--to', dest='date_to', help='Last day exported, or the ISO 8601 date and time it stops before.')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    try:
+        written = TransactionsExportService(args.chunk_size).export_to_folder(args.folder, args.format, args.date_from,
+                                                                             args.date_to)
+        logger.info({'message': 'Transactions export finished.', 'folder': args.folder, 'transactions': written})
+    finally:
+        session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Imports holders, each with an Account and an optional opening balance, from a CSV or NDJSON file.
+
+CSV files have a name,document[,balance] header; NDJSON files have one
+{"name": ..., "document": ..., "balance": ...} object per line. Rejected rows
+are written to ``--rejects`` as one JSON object per line:
+
+    python -m commands.import_holders --file customers.csv --rejects rejects.ndjson
+"""
+import argparse
+import json
+
+from config.db_config import session
+from services.holders_import_service import HoldersImportService
+from util.log_config import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', required=True)
+    parser.add_argument('--format', choices=HoldersImportService.formats,
+                        help='Defaults to ndjson for .ndjson/.jsonl files and csv otherwise.')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--rejects', help='File the rejected rows are written to.')
+    args = parser.parse_args()
+
+    file_format = args.format or ('ndjson' if args.file.endswith(('.ndjson', '.jsonl')) else 'csv')
+    try:
+        with open(args.file, encoding='utf-8', newline='') as lines:
+            report = HoldersImportService(args.chunk_size).import_holders(lines, file_format)
+        if args.rejects:
+            with open(args.rejects, 'w') as rejects:
+                rejects.writelines(json.dumps(reject) + '\n' for reject in report['rejects'])
+        logger.info({'message': 'Holders import finished.', 'imported': report['imported'],
+                     'rejected': report['rejected']})
+    finally:
+        session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Splits the deposits to a high-volume account over sub-balance buckets.
+
+Deposits to a bucketed account update one of its buckets, picked at random,
+instead of the account row they would otherwise all queue on. Reads and
+balance checks use the summed total. ``--buckets 0`` folds the buckets back
+into the account row:
+
+    python -m commands.set_balance_buckets --account-id 42 --buckets 16
+"""
+import argparse
+
+from config.db_config import session
+from services.accounts_service import AccountsService
+from util.log_config import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--account-id', type=int, required=True)
+    parser.add_argument('--buckets', type=int, required=True)
+    args = parser.parse_args()
+
+    try:
+        account = AccountsService().set_balance_buckets(args.account_id, args.buckets)
+        logger.info({'message': 'Account balance buckets updated.', 'account_id': account.account_id,
+                     'balance_buckets': account.balance_buckets})
+    finally:
+        session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import io
+from itertools import islice
+
+from sqlalchemy import QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
+
+from config.db_config import url_db, engine_options, session, is_sqlite, configure_sqlite_engine
+
+
+def async_url(url=None):
+    return (url or url_db).replace('postgresql://', 'postgresql+asyncpg://', 1).replace('sqlite://', 'sqlite+aiosqlite://', 1)
+
+
+def async_engine_options(url=None):
+    options = engine_options(url)
+    if options.get('poolclass') is QueuePool:
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return options
+
+
+def create_async_db_engine(url=None):
+    """Async engine for the URL, with the same SQLite listeners as the sync engine."""
+    url = url or url_db
+    db_engine = create_async_engine(async_url(url), **async_engine_options(url))
+    if is_sqlite(url):
+        configure_sqlite_engine(db_engine.sync_engine)
+    return db_engine
+
+
+async_engine = create_async_db_engine()
+AsyncSession = async_sessionmaker(bind=async_engine)
+
+
+async def run_in_session(function, *args):
+    """Runs a synchronous service call on a new AsyncSession.
+
+    The call runs inside AsyncSession.run_sync, so the repositories keep using
+    the scoped ``session`` while every round trip awaits the async driver
+    instead of blocking the event loop.
+    """
+    async with AsyncSession() as async_session:
+        return await async_session.run_sync(_run_with_scoped_session, function, *args)
+
+
+def _run_with_scoped_session(sync_session, function, *args):
+    session.registry.set(sync_session)
+    try:
+        return function(*args)
+    finally:
+        session.registry.clear()
+
+
+async def stream_in_session(function, *args, batch_size=100):
+    """Runs a synchronous service call that returns an iterator, and returns an async iterator over its items.
+
+    The call itself runs right away, so its errors are raised here and not
+    after the response has started. The items are then read ``batch_size`` at
+    a time, each batch in its own AsyncSession.run_sync on the same session,
+    which is closed once the iterator is exhausted.
+    """
+    async_session = AsyncSession()
+    try:
+        iterator = await async_session.run_sync(_run_with_scoped_session, lambda: iter(function(*args)))
+    except BaseException:
+        await async_session.close()
+        raise
+    return _stream_batches(async_session, iterator, batch_size)
+
+
+async def _stream_batches(async_session, iterator, batch_size):
+    try:
+        while True:
+            items = await async_session.run_sync(_run_with_scoped_session, lambda: list(islice(iterator, batch_size)))
+            if not items:
+                return
+            for item in items:
+                yield item
+    finally:
+        await async_session.close()
+
+
+class AsyncStreamReader(io.RawIOBase):
+    """Binary file over an async iterator of bytes, such as Starlette's request.stream().
+
+    It is read by the synchronous calls of run_in_session: every read that
+    needs more data awaits the next chunk with await_only, so the call works
+    through a request body as it arrives instead of after all of it is read.
+    """
+
+    def __init__(self, chunks):
+        self.__chunks = aiter(chunks)
+        self.__pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.__pending:
+            try:
+                self.__pending = await_only(anext(self.__chunks))
+            except StopAsyncIteration:
+                return 0
+        size = min(len(buffer), len(self.__pending))
+        buffer[:size] = self.__pending[:size]
+        self.__pending = self.__pending[size:]
+        return size
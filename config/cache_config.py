@@ -0,0 +1,18 @@
+from util.env_utils import EnvUtils as env_utils
+from util.ttl_cache import TTLCache
+
+ACCOUNT_CACHE_SIZE = 'ACCOUNT_CACHE_SIZE'
+ACCOUNT_CACHE_TTL = 'ACCOUNT_CACHE_TTL'
+IDEMPOTENCY_CACHE_SIZE = 'IDEMPOTENCY_CACHE_SIZE'
+IDEMPOTENCY_CACHE_TTL = 'IDEMPOTENCY_CACHE_TTL'
+
+account_cache = TTLCache(
+    maxsize=env_utils.get_int(ACCOUNT_CACHE_SIZE, 10000),
+    ttl=env_utils.get_float(ACCOUNT_CACHE_TTL, 5.0)
+)
+
+# Idempotency-Key -> (request hash, response) of recent deposits, withdraws and transfers.
+idempotency_cache = TTLCache(
+    maxsize=env_utils.get_int(IDEMPOTENCY_CACHE_SIZE, 100000),
+    ttl=env_utils.get_float(IDEMPOTENCY_CACHE_TTL, 86400.0)
+)
@@ -1,5 +1,7 @@
+from flask import make_response
 from .api_controller import api as account_namespace
 from flask_restx import Api
+from util.serializers import dumps
 
 api = Api(
     title='Account API',
@@ -8,3 +10,10 @@ api = Api(
 )
 
 api.add_namespace(account_namespace, path="/")
+
+
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    response = make_response(dumps(data) + '\n', code)
+    response.headers.extend(headers or {})
+    return response
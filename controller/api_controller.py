@@ -1,20 +1,31 @@
+import io
 from http import HTTPStatus
 
 from jsonschema.exceptions import ValidationError
 
 from exceptions.exceptions import DocumentAlreadyExists, HolderNotFound, AccountNotFound, StatusNotAllowed, \
-    InsufficientBalance, AccountAlreadyExistentByHolder, TransactionNotFound
+    InsufficientBalance, AccountAlreadyExistentByHolder, TransactionNotFound, IdempotencyKeyConflict, \
+    ConcurrentUpdate
 from services.holders_service import HoldersService
+from services.holders_import_service import HoldersImportService
 from services.accounts_service import AccountsService
 from services.transactions_service import TransactionsService
+from services.transactions_export_service import TransactionsExportService
+from services.transactions_analytics_service import TransactionsAnalyticsService
 from util.log_config import logger
+from util.statement_cache_stats import statement_cache_stats
+from util.account_contention_stats import account_contention_stats
+from config.cache_config import account_cache, idempotency_cache
 from flask_restx import Namespace, Resource
-from flask import request
+from flask import request, Response, stream_with_context
 
 api = Namespace('v1', description='Holder and Account operations.')
 holders_service = HoldersService()
+holders_import_service = HoldersImportService()
 accounts_service = AccountsService()
 transactions_service = TransactionsService()
+transactions_export_service = TransactionsExportService()
+transactions_analytics_service = TransactionsAnalyticsService()
 
 
 @api.route("/v1/holder")
@@ -30,8 +41,7 @@ class HolderController(Resource):
     def get(self):
         try:
             logger.info({'message': 'Starting GET all holders request.'})
-            headers = request.headers
-            result = holders_service.get_all_holders(headers)
+            result = holders_service.get_all_holders(request.args)
             logger.info({'message': 'Found {} holders.'.format(0 if not result['holders'] else str(len(result['holders'])))})
             return result, HTTPStatus.OK
         except ValidationError as e:
@@ -117,6 +127,32 @@ class HolderController(Resource):
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+@api.route("/v1/holder/import")
+class HolderImportController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        400: 'Bad request',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        500: 'Internal server error'
+    })
+    def post(self):
+        try:
+            logger.info({'message': 'Starting POST holders import request.'})
+            file_format = holders_import_service.file_format(request.args.get('format'), request.content_type)
+            lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+            result = holders_import_service.import_holders(lines, file_format)
+            logger.info({'message': 'Holders import finished. Imported: {}, rejected: {}.'.format(result['imported'], result['rejected'])})
+            return result, HTTPStatus.OK
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
 @api.route("/v1/account")
 class AccountController(Resource):
 
@@ -157,8 +193,7 @@ class AccountController(Resource):
     def get(self):
         try:
             logger.info({'message': 'Starting GET all accounts request.'})
-            headers = request.headers
-            result = accounts_service.get_all_accounts(headers)
+            result = accounts_service.get_all_accounts(request.args)
             logger.info({'message': 'Found {} accounts.'.format(0 if not result['accounts'] else str(len(result['accounts'])))})
             return result, HTTPStatus.OK
         except ValidationError as e:
@@ -203,6 +238,7 @@ class AccountController(Resource):
         400: 'Bad request',
         401: 'Authentication error',
         403: 'Authorization error',
+        409: 'Account updated concurrently',
         500: 'Internal server error'
     })
     def post(self, account_id):
@@ -217,6 +253,9 @@ class AccountController(Resource):
         except AccountNotFound as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.NOT_FOUND
+        except ConcurrentUpdate as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.CONFLICT
         except Exception as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -230,6 +269,7 @@ class AccountController(Resource):
         400: 'Bad request',
         401: 'Authentication error',
         403: 'Authorization error',
+        409: 'Account updated concurrently',
         500: 'Internal server error'
     })
     def post(self, account_id):
@@ -244,6 +284,9 @@ class AccountController(Resource):
         except AccountNotFound as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.NOT_FOUND
+        except ConcurrentUpdate as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.CONFLICT
         except Exception as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -257,6 +300,7 @@ class AccountController(Resource):
         400: 'Bad request',
         401: 'Authentication error',
         403: 'Authorization error',
+        409: 'Account updated concurrently',
         500: 'Internal server error'
     })
     def post(self, account_id):
@@ -271,6 +315,88 @@ class AccountController(Resource):
         except AccountNotFound as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.NOT_FOUND
+        except ConcurrentUpdate as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.CONFLICT
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/v1/account/<int:account_id>/statement")
+class AccountController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        400: 'Bad request',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        404: 'Not found',
+        500: 'Internal server error'
+    })
+    def get(self, account_id):
+        try:
+            logger.info({'message': 'Starting GET account statement request.', 'account_id': account_id})
+            lines = transactions_service.get_account_statement(account_id, request.args.get('from'), request.args.get('to'))
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'account_id': account_id, 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except AccountNotFound as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'account_id': account_id, 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.NOT_FOUND
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'account_id': account_id, 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/v1/account/<int:account_id>/analytics")
+class AccountController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        400: 'Bad request',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        404: 'Not found',
+        500: 'Internal server error'
+    })
+    def get(self, account_id):
+        try:
+            logger.info({'message': 'Starting GET account analytics request.', 'account_id': account_id})
+            result = transactions_analytics_service.get_account_analytics(
+                account_id, request.args.get('from'), request.args.get('to'), request.args.get('bucket')
+            )
+            return result, HTTPStatus.OK
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'account_id': account_id, 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except AccountNotFound as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'account_id': account_id, 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.NOT_FOUND
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'account_id': account_id, 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/v1/account/analytics")
+class AccountController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        400: 'Bad request',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        500: 'Internal server error'
+    })
+    def post(self):
+        try:
+            logger.info({'message': 'Starting POST accounts analytics request.'})
+            result = transactions_analytics_service.get_accounts_analytics(request.json)
+            return result, HTTPStatus.OK
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
         except Exception as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -288,8 +414,7 @@ class TransactionController(Resource):
     def get(self):
         try:
             logger.info({'message': 'Starting GET all transactions request.'})
-            headers = request.headers
-            result = transactions_service.get_all_transactions(headers)
+            result = transactions_service.get_all_transactions(request.args)
             logger.info({'message': 'Found {} transactions.'.format(0 if not result['transactions'] else str(len(result['transactions'])))})
             return result, HTTPStatus.OK
         except ValidationError as e:
@@ -303,6 +428,32 @@ class TransactionController(Resource):
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+@api.route("/v1/transactions/export")
+class TransactionExportController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        400: 'Bad request',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        500: 'Internal server error'
+    })
+    def get(self):
+        try:
+            logger.info({'message': 'Starting GET transactions export request.'})
+            file_format = request.args.get('format', 'csv')
+            chunks = transactions_export_service.export(file_format, request.args.get('from'), request.args.get('to'),
+                                                        request.args.get('after_id'))
+            return Response(stream_with_context(chunks), mimetype=transactions_export_service.content_types[file_format],
+                            headers={'Content-Disposition': f'attachment; filename=transactions.{file_format}'})
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
 @api.route("/v1/transactions/<string:transaction_id>")
 class TransactionController(Resource):
     @api.doc(responses={
@@ -334,21 +485,29 @@ class TransactionController(Resource):
         400: 'Bad request',
         401: 'Authentication error',
         403: 'Authorization error',
+        409: 'Account updated concurrently',
+        422: 'Idempotency-Key already used by a different request',
         500: 'Internal server error'
     })
     def post(self):
         try:
             logger.info({'message': 'Starting POST deposit to account.'})
             body = request.json
-            result = transactions_service.deposit(body)
+            result = transactions_service.deposit(body, request.headers.get('Idempotency-Key'))
             logger.info({'message': 'Deposit made successfully.'})
             return result, HTTPStatus.OK
         except StatusNotAllowed as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except IdempotencyKeyConflict as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.UNPROCESSABLE_ENTITY
         except ValidationError as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except ConcurrentUpdate as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.CONFLICT
         except Exception as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -362,13 +521,15 @@ class TransactionController(Resource):
         400: 'Bad request',
         401: 'Authentication error',
         403: 'Authorization error',
+        409: 'Account updated concurrently',
+        422: 'Idempotency-Key already used by a different request',
         500: 'Internal server error'
     })
     def post(self):
         try:
             logger.info({'message': 'Starting POST withdraw from account.'})
             body = request.json
-            result = transactions_service.withdraw(body)
+            result = transactions_service.withdraw(body, request.headers.get('Idempotency-Key'))
             logger.info({'message': 'Withdraw made successfully.'})
             return result, HTTPStatus.OK
         except InsufficientBalance as e:
@@ -377,9 +538,15 @@ class TransactionController(Resource):
         except StatusNotAllowed as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except IdempotencyKeyConflict as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.UNPROCESSABLE_ENTITY
         except ValidationError as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except ConcurrentUpdate as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.CONFLICT
         except Exception as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -393,23 +560,77 @@ class TransactionController(Resource):
         400: 'Bad request',
         401: 'Authentication error',
         403: 'Authorization error',
+        422: 'Idempotency-Key already used by a different request',
         500: 'Internal server error'
     })
     def post(self):
         try:
             logger.info({'message': 'Starting POST method to transfer values between accounts.'})
             body = request.json
-            result = transactions_service.transfer(body)
+            result = transactions_service.transfer(body, request.headers.get('Idempotency-Key'))
             return result, HTTPStatus.OK
+        except AccountNotFound as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.NOT_FOUND
         except InsufficientBalance as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
         except StatusNotAllowed as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except IdempotencyKeyConflict as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.UNPROCESSABLE_ENTITY
         except ValidationError as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
         except Exception as e:
             logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
             return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/v1/transactions/batch")
+class TransactionController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        400: 'Bad request',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        500: 'Internal server error'
+    })
+    def post(self):
+        try:
+            logger.info({'message': 'Starting POST batch of financial operations.'})
+            body = request.json
+            result = transactions_service.batch(body)
+            logger.info({'message': 'Batch processed. Succeeded: {}, failed: {}.'.format(result['succeeded'], result['failed'])})
+            return result, HTTPStatus.OK
+        except ValidationError as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'{e.args[0]}'}, HTTPStatus.BAD_REQUEST
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@api.route("/v1/stats")
+class StatsController(Resource):
+
+    @api.doc(responses={
+        200: 'Success',
+        401: 'Authentication error',
+        403: 'Authorization error',
+        500: 'Internal server error'
+    })
+    def get(self):
+        try:
+            return {
+                'statement_cache': statement_cache_stats.snapshot(),
+                'account_cache': account_cache.stats(),
+                'idempotency_cache': idempotency_cache.stats(),
+                'account_contention': account_contention_stats.snapshot()
+            }, HTTPStatus.OK
+        except Exception as e:
+            logger.error({'message': 'An error occurred while performing the request.', 'exception': e})
+            return {'error': f'An error occurred while performing the request: {e.args[0]}'}, HTTPStatus.INTERNAL_SERVER_ERROR
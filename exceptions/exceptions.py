@@ -23,7 +23,7 @@ class AccountNotFound(Exception):
 
 class InsufficientBalance(Exception):
 
-    def __init__(self, message, status_code=404):
+    def __init__(self, message, status_code=400):
         super().__init__(message)
         self.status_code = status_code
 
@@ -47,3 +47,17 @@ class TransactionNotFound(Exception):
     def __init__(self, message, status_code=404):
         super().__init__(message)
         self.status_code = status_code
+
+
+class ConcurrentUpdate(Exception):
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IdempotencyKeyConflict(Exception):
+
+    def __init__(self, message, status_code=422):
+        super().__init__(message)
+        self.status_code = status_code
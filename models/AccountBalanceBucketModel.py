@@ -0,0 +1,11 @@
+from sqlalchemy import Column, BigInteger, Integer
+from config.db_config import Base, Money
+
+
+class AccountBalanceBucketModel(Base):
+    __tablename__ = "account_balance_buckets"
+    __table_args__ = {"schema": "accounts"}
+
+    account_id = Column(BigInteger, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    balance = Column(Money, nullable=False, default=0)
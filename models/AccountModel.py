@@ -1,12 +1,18 @@
-from sqlalchemy import Column, BigInteger, Integer, Numeric
-from config.db_config import Base
+from sqlalchemy import Column, BigInteger, Integer
+from config.db_config import Base, BigIntegerId, Money
 
 
 class AccountModel(Base):
     __tablename__ = "accounts"
     __table_args__ = {"schema": "accounts"}
 
-    account_id = Column(BigInteger, primary_key=True)
+    account_id = Column(BigIntegerId, primary_key=True)
     holder_id = Column(BigInteger)
-    balance = Column(Numeric)
+    balance = Column(Money)
     status = Column(Integer)
+    # Number of balance bucket rows (AccountBalanceBucketModel) that deposits are spread over; 0 disables it.
+    balance_buckets = Column(Integer, nullable=False, default=0, server_default='0')
+    # Every UPDATE checks and bumps it, so an update based on a stale read raises StaleDataError.
+    version = Column(Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
@@ -1,11 +1,11 @@
-from sqlalchemy import Column, BigInteger, String
-from config.db_config import Base
+from sqlalchemy import Column, String
+from config.db_config import Base, BigIntegerId
 
 
 class HolderModel(Base):
     __tablename__ = "holders"
     __table_args__ = {"schema": "holders"}
 
-    holder_id = Column(BigInteger, primary_key=True)
+    holder_id = Column(BigIntegerId, primary_key=True)
     name = Column(String)
-    document = Column(String)
+    document = Column(String, unique=True)
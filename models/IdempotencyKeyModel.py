@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, TIMESTAMP, Uuid
+from config.db_config import Base
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = {"schema": "accounts"}
+
+    idempotency_key = Column(String(255), primary_key=True)
+    # sha256 of the operation and its body, to tell a retry from a reused key.
+    request_hash = Column(String(64), nullable=False)
+    transaction_id = Column(Uuid(as_uuid=False), nullable=False)
+    transaction_date = Column(TIMESTAMP, nullable=False)
@@ -1,14 +1,14 @@
-from sqlalchemy import Column, BigInteger, String, Numeric, TIMESTAMP
-from config.db_config import Base
+from sqlalchemy import Column, BigInteger, String, TIMESTAMP, Uuid
+from config.db_config import Base, Money
 
 
 class TransactionModel(Base):
     __tablename__ = "transactions"
     __table_args__ = {"schema": "accounts"}
 
-    transaction_id = Column(String, primary_key=True)
+    transaction_id = Column(Uuid(as_uuid=False), primary_key=True)
     transaction_type = Column(String)
-    transaction_value = Column(Numeric)
+    transaction_value = Column(Money)
     transaction_date = Column(TIMESTAMP)
     origin_account = Column(BigInteger)
     destination_account = Column(BigInteger)
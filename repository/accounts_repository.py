@@ -1,11 +1,24 @@
-from sqlalchemy import text
+from decimal import Decimal
+from sqlalchemy import select, bindparam, func, update, delete, insert
+from werkzeug.exceptions import NotFound
 from models.AccountModel import AccountModel
+from models.AccountBalanceBucketModel import AccountBalanceBucketModel
 from config.db_config import session
+from util.metrics import timed_repository
 
 
+@timed_repository
 class AccountsRepository:
 
-    select_statement = 'SELECT * FROM accounts.accounts'
+    select_by_account_id = select(AccountModel).where(AccountModel.account_id == bindparam('account_id'))
+    select_by_holder_id = select(AccountModel).where(AccountModel.holder_id == bindparam('holder_id'))
+    select_bucket_balance = select(func.coalesce(func.sum(AccountBalanceBucketModel.balance), 0)) \
+        .where(AccountBalanceBucketModel.account_id == bindparam('account_id'))
+    add_to_bucket_stmt = update(AccountBalanceBucketModel) \
+        .where(AccountBalanceBucketModel.account_id == bindparam('b_account_id'),
+               AccountBalanceBucketModel.bucket == bindparam('b_bucket')) \
+        .values(balance=AccountBalanceBucketModel.balance + bindparam('b_value')) \
+        .execution_options(synchronize_session=False)
 
     def create_account(self, account):
         try:
@@ -17,14 +30,29 @@ class AccountsRepository:
 
     def get_accounts(self, params):
         try:
-            return AccountModel.query.paginate(page=params['currentPage'], per_page=params['maxItemsPerPage'], error_out=True)
+            accounts = session.query(AccountModel) \
+                .order_by(AccountModel.account_id) \
+                .limit(params.max_items_per_page) \
+                .offset(params.offset) \
+                .all()
+            if not accounts and params.current_page > 1:
+                raise NotFound()
+            return accounts
+        except Exception as e:
+            raise e
+
+    def get_accounts_after(self, last_account_id, limit):
+        try:
+            query = session.query(AccountModel)
+            if last_account_id is not None:
+                query = query.filter(AccountModel.account_id > last_account_id)
+            return query.order_by(AccountModel.account_id).limit(limit).all()
         except Exception as e:
             raise e
 
     def get_account_by_account_id(self, account_id):
         try:
-            stmt = text(self.select_statement + f' WHERE account_id = {account_id}')
-            return session.query(AccountModel).from_statement(stmt).one()
+            return session.execute(self.select_by_account_id, {'account_id': account_id}).scalar_one()
         except Exception as e:
             raise e
 
@@ -34,9 +62,72 @@ class AccountsRepository:
         except Exception as e:
             raise e
 
+    def get_accounts_for_update(self, account_ids):
+        try:
+            return session.query(AccountModel) \
+                .filter(AccountModel.account_id.in_(account_ids)) \
+                .order_by(AccountModel.account_id) \
+                .with_for_update() \
+                .populate_existing() \
+                .all()
+        except Exception as e:
+            raise e
+
+    def rollback(self):
+        try:
+            session.rollback()
+        except Exception as e:
+            raise e
+
     def get_accounts_by_holder_id(self, holder_id):
         try:
-            stmt = text(self.select_statement + f' WHERE holder_id = {holder_id}')
-            return session.query(AccountModel).from_statement(stmt).all()
+            return session.execute(self.select_by_holder_id, {'holder_id': holder_id}).scalars().all()
+        except Exception as e:
+            raise e
+
+    def get_bucket_balance(self, account_id):
+        try:
+            return session.execute(self.select_bucket_balance, {'account_id': account_id}).scalar_one()
+        except Exception as e:
+            raise e
+
+    def get_bucket_balances(self, account_ids):
+        """Sum of the buckets of each account, in one grouped query; accounts without buckets are left out."""
+        try:
+            return dict(session.execute(
+                select(AccountBalanceBucketModel.account_id, func.sum(AccountBalanceBucketModel.balance))
+                .where(AccountBalanceBucketModel.account_id.in_(account_ids))
+                .group_by(AccountBalanceBucketModel.account_id)
+            ).all())
+        except Exception as e:
+            raise e
+
+    def add_to_bucket(self, account_id, bucket, value):
+        """Adds value to one bucket row without touching the account row; False if the bucket no longer exists."""
+        try:
+            result = session.execute(self.add_to_bucket_stmt, {'b_account_id': account_id, 'b_bucket': bucket, 'b_value': value})
+            return result.rowcount == 1
+        except Exception as e:
+            raise e
+
+    def set_balance_buckets(self, account, buckets):
+        """Folds the current buckets into the (locked) account row and creates ``buckets`` empty ones."""
+        try:
+            folded = session.execute(
+                delete(AccountBalanceBucketModel)
+                .where(AccountBalanceBucketModel.account_id == account.account_id)
+                .returning(AccountBalanceBucketModel.balance)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            account.balance += sum(folded, Decimal('0.00'))
+            if buckets:
+                session.execute(insert(AccountBalanceBucketModel), [
+                    {'account_id': account.account_id, 'bucket': bucket, 'balance': Decimal('0.00')}
+                    for bucket in range(buckets)
+                ])
+            account.balance_buckets = buckets
+            session.commit()
+            return account
         except Exception as e:
+            session.rollback()
             raise e
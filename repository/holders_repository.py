@@ -1,38 +1,69 @@
-from sqlalchemy import text
+from sqlalchemy import select, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.exceptions import NotFound
 from models.HolderModel import HolderModel
 from config.db_config import session
+from util.metrics import timed_repository
 
 
+@timed_repository
 class HoldersRepository:
 
-    select_statement = 'SELECT * FROM holders.holders'
+    select_by_holder_id = select(HolderModel).where(HolderModel.holder_id == bindparam('holder_id'))
+    select_by_document = select(HolderModel).where(HolderModel.document == bindparam('document'))
 
     def get_holders(self, params):
         try:
-            return HolderModel.query.paginate(page=params['currentPage'], per_page=params['maxItemsPerPage'], error_out=True)
+            holders = session.query(HolderModel) \
+                .order_by(HolderModel.holder_id) \
+                .limit(params.max_items_per_page) \
+                .offset(params.offset) \
+                .all()
+            if not holders and params.current_page > 1:
+                raise NotFound()
+            return holders
+        except Exception as e:
+            raise e
+
+    def get_holders_after(self, last_holder_id, limit):
+        try:
+            query = session.query(HolderModel)
+            if last_holder_id is not None:
+                query = query.filter(HolderModel.holder_id > last_holder_id)
+            return query.order_by(HolderModel.holder_id).limit(limit).all()
         except Exception as e:
             raise e
 
     def get_holder_by_id(self, holder_id):
         try:
-            stmt = text(self.select_statement + f' WHERE holder_id = {holder_id}')
-            return session.query(HolderModel).from_statement(stmt).one()
+            return session.execute(self.select_by_holder_id, {'holder_id': holder_id}).scalar_one()
         except Exception as e:
             raise e
 
     def get_holder_by_document(self, holder_document):
         try:
-            stmt = text(self.select_statement + ' WHERE document = \'{}\''.format(holder_document))
-            return session.query(HolderModel).from_statement(stmt).all()
+            return session.execute(self.select_by_document, {'document': holder_document}).scalars().all()
+        except Exception as e:
+            raise e
+
+    def get_existing_documents(self, documents):
+        try:
+            return set(session.scalars(select(HolderModel.document).where(HolderModel.document.in_(documents))))
         except Exception as e:
             raise e
 
     def create_holder(self, holder):
         try:
-            session.add(holder)
+            insert = sqlite.insert if session.get_bind().dialect.name == 'sqlite' else postgresql.insert
+            stmt = insert(HolderModel) \
+                .values(name=holder.name, document=holder.document) \
+                .on_conflict_do_nothing(index_elements=[HolderModel.document]) \
+                .returning(HolderModel)
+            created_holder = session.scalars(stmt).one_or_none()
             session.commit()
-            return holder
+            return created_holder
         except Exception as e:
+            session.rollback()
             raise e
 
     def update_holder(self):
@@ -0,0 +1,103 @@
+import csv
+import io
+
+from sqlalchemy import Table, Column, MetaData, Integer, String, Uuid, select, insert, delete, literal, null, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.util import await_only
+
+from config.db_config import session, Money
+from models.AccountModel import AccountModel
+from models.HolderModel import HolderModel
+from models.TransactionModel import TransactionModel
+from util.enums.account_status import Status
+from util.enums.transactions_types import TransactionsTypes
+from util.metrics import timed_repository
+
+
+@timed_repository
+class ImportRepository:
+
+    # Created and dropped inside each chunk's transaction, so concurrent imports never share it.
+    holders_staging = Table(
+        'holders_import', MetaData(),
+        Column('line', Integer),
+        Column('name', String),
+        Column('document', String),
+        Column('balance', Money),
+        Column('transaction_id', Uuid(as_uuid=False)),
+        prefixes=['TEMPORARY']
+    )
+
+    def load_holders(self, rows, transaction_date):
+        """Creates a holder, an Account and, for a positive balance, its opening deposit for every row.
+
+        ``rows`` are (line, name, document, balance, transaction_id) tuples. They
+        are copied to a staging table and moved to the real tables with one
+        INSERT ... SELECT each. Returns the documents another request created
+        in the meantime, whose rows were skipped.
+        """
+        staging = self.holders_staging
+        try:
+            connection = session.connection()
+            staging.create(connection)
+            if not self.__copy(connection, rows):
+                session.execute(insert(staging), [dict(zip(staging.c.keys(), row)) for row in rows])
+
+            dialect_insert = sqlite.insert if connection.dialect.name == 'sqlite' else postgresql.insert
+            created = set(session.scalars(
+                dialect_insert(HolderModel.__table__)
+                .from_select(['name', 'document'], select(staging.c.name, staging.c.document).where(true()))
+                .on_conflict_do_nothing(index_elements=['document'])
+                .returning(HolderModel.document)
+            ))
+            skipped = {row[2] for row in rows} - created
+            if skipped:
+                session.execute(delete(staging).where(staging.c.document.in_(skipped)))
+
+            staged_holders = staging.join(HolderModel.__table__, HolderModel.document == staging.c.document)
+            session.execute(insert(AccountModel.__table__).from_select(
+                ['holder_id', 'balance', 'status', 'balance_buckets', 'version'],
+                select(HolderModel.holder_id, staging.c.balance, literal(Status.ACTIVE.value), literal(0), literal(1))
+                .select_from(staged_holders)
+            ))
+            session.execute(insert(TransactionModel.__table__).from_select(
+                ['transaction_id', 'transaction_type', 'transaction_value', 'transaction_date',
+                 'origin_account', 'destination_account'],
+                select(staging.c.transaction_id, literal(TransactionsTypes.DEPOSIT.value), staging.c.balance,
+                       literal(transaction_date, TransactionModel.transaction_date.type), AccountModel.account_id,
+                       null())
+                .select_from(staged_holders.join(AccountModel.__table__, AccountModel.holder_id == HolderModel.holder_id))
+                .where(staging.c.transaction_id.is_not(None))
+            ))
+            staging.drop(connection)
+            session.commit()
+            return skipped
+        except Exception as e:
+            session.rollback()
+            raise e
+
+    def __copy(self, connection, rows):
+        """Copies the rows to the staging table with the driver's COPY; returns False when the driver has none."""
+        driver = connection.dialect.driver if connection.dialect.name == 'postgresql' else None
+        dbapi_connection = connection.connection.dbapi_connection
+        if driver == 'asyncpg':
+            # The asyncpg adapter's cursor has no COPY, the asyncpg connection under it does.
+            await_only(dbapi_connection.driver_connection.copy_records_to_table(
+                self.holders_staging.name, records=rows, columns=self.holders_staging.c.keys()))
+            return True
+        if driver not in ('psycopg2', 'psycopg'):
+            return False
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        sql = 'COPY holders_import (line, name, document, balance, transaction_id) FROM STDIN WITH (FORMAT csv)'
+        cursor = dbapi_connection.cursor()
+        try:
+            if driver == 'psycopg2':
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            else:
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+        return True
@@ -1,29 +1,228 @@
 from config.db_config import session
 from models.TransactionModel import TransactionModel
-from sqlalchemy import text
+from models.IdempotencyKeyModel import IdempotencyKeyModel
+from datetime import timedelta
+from sqlalchemy import select, bindparam, tuple_, or_, text, literal, case, func, union_all, Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from werkzeug.exceptions import NotFound
+from util.enums.transactions_types import TransactionsTypes
+from util.metrics import timed_repository
 
 
+class date_bucket(FunctionElement):
+    """First day of the day, week (starting on Monday) or month of a timestamp, as a date."""
+
+    type = Date()
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [('unit', InternalTraversal.dp_string)]
+    units = ('day', 'week', 'month')
+
+    def __init__(self, unit, expression):
+        if unit not in self.units:
+            raise ValueError(f'Unknown bucket unit: {unit}')
+        self.unit = unit
+        super().__init__(expression)
+
+
+@compiles(date_bucket)
+def _compile_date_bucket(element, compiler, **kw):
+    # The unit is rendered inline, so the same expression in SELECT and GROUP BY compiles to the same SQL.
+    return f"CAST(date_trunc('{element.unit}', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(date_bucket, 'sqlite')
+def _compile_date_bucket_sqlite(element, compiler, **kw):
+    modifiers = {'day': '', 'week': ", 'weekday 0', '-6 days'", 'month': ", 'start of month'"}
+    return f"date({compiler.process(element.clauses, **kw)}{modifiers[element.unit]})"
+
+
+@timed_repository
 class TransactionsRepository:
 
-    select_statement = 'SELECT * FROM accounts.transactions'
+    select_by_transaction_id = select(TransactionModel).where(TransactionModel.transaction_id == bindparam('transaction_id'))
+    select_by_transaction_id_and_date = select_by_transaction_id.where(
+        TransactionModel.transaction_date >= bindparam('date_from'),
+        TransactionModel.transaction_date < bindparam('date_to')
+    )
+    # Slack between the time embedded in the id and transaction_date (written in the server's local time).
+    id_date_window = timedelta(days=1)
 
-    def create_transaction(self, transaction):
+    def create_transaction(self, transaction, idempotency_key=None):
         try:
             session.add(transaction)
+            if idempotency_key is not None:
+                session.add(idempotency_key)
             session.commit()
             return transaction
         except Exception as e:
             raise e
 
+    def get_idempotency_key(self, idempotency_key):
+        try:
+            return session.get(IdempotencyKeyModel, idempotency_key)
+        except Exception as e:
+            raise e
+
+    def create_transactions(self, transactions):
+        try:
+            session.add_all(transactions)
+            session.commit()
+            return transactions
+        except Exception as e:
+            raise e
+
     def get_transactions(self, params):
         try:
-            return TransactionModel.query.paginate(page=params['currentPage'], per_page=params['maxItemsPerPage'], error_out=True)
+            transactions = session.query(TransactionModel) \
+                .order_by(TransactionModel.transaction_date, TransactionModel.transaction_id) \
+                .limit(params.max_items_per_page) \
+                .offset(params.offset) \
+                .all()
+            if not transactions and params.current_page > 1:
+                raise NotFound()
+            return transactions
         except Exception as e:
             raise e
 
-    def get_transaction_by_id(self, transaction_id):
+    def get_transactions_after(self, last_transaction_date, last_transaction_id, limit):
         try:
-            stmt = text(self.select_statement + f' WHERE transaction_id = \'{transaction_id}\'')
-            return session.query(TransactionModel).from_statement(stmt).one()
+            return session.scalars(self.transactions_after_query(last_transaction_date, last_transaction_id, limit)).all()
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def transactions_after_query(last_transaction_date, last_transaction_id, limit):
+        stmt = select(TransactionModel)
+        if last_transaction_date is not None:
+            # The plain date bound lets Postgres prune the monthly partitions.
+            stmt = stmt.where(
+                TransactionModel.transaction_date >= last_transaction_date,
+                tuple_(TransactionModel.transaction_date, TransactionModel.transaction_id) >
+                TransactionsRepository.keyset(last_transaction_date, last_transaction_id)
+            )
+        return stmt.order_by(TransactionModel.transaction_date, TransactionModel.transaction_id).limit(limit)
+
+    @staticmethod
+    def keyset(transaction_date, transaction_id):
+        # Typed, so the id is bound as a uuid (hex on SQLite) instead of as a plain string.
+        return tuple_(literal(transaction_date, TransactionModel.transaction_date.type),
+                      literal(transaction_id, TransactionModel.transaction_id.type))
+
+    def get_transaction_by_id(self, transaction_id, created_at=None):
+        try:
+            if created_at is None:
+                return session.execute(self.select_by_transaction_id, {'transaction_id': transaction_id}).scalar_one()
+            # Bounding the date lets Postgres prune the lookup to the partitions around created_at.
+            return session.execute(self.select_by_transaction_id_and_date, {
+                'transaction_id': transaction_id,
+                'date_from': created_at - self.id_date_window,
+                'date_to': created_at + self.id_date_window
+            }).scalar_one()
+        except Exception as e:
+            raise e
+
+    def get_account_statement(self, account_id, date_from, date_to, batch_size=500):
+        try:
+            stmt = self.account_statement_query(account_id, date_from, date_to).execution_options(yield_per=batch_size)
+            for transaction in session.scalars(stmt):
+                yield transaction
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def account_statement_query(account_id, date_from, date_to):
+        stmt = select(TransactionModel).where(or_(
+            TransactionModel.origin_account == account_id,
+            TransactionModel.destination_account == account_id
+        ))
+        if date_from is not None:
+            stmt = stmt.where(TransactionModel.transaction_date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(TransactionModel.transaction_date < date_to)
+        return stmt.order_by(TransactionModel.transaction_date, TransactionModel.transaction_id)
+
+    def get_transaction_columns(self, date_from, date_to, after_id, batch_size):
+        """Yields the export columns of ``batch_size`` transactions at a time, read through a server-side cursor."""
+        try:
+            stmt = self.export_query(date_from, date_to, after_id) \
+                .execution_options(stream_results=True, yield_per=batch_size)
+            for rows in session.execute(stmt).partitions():
+                yield [list(column) for column in zip(*rows)]
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def export_query(date_from, date_to, after_id=None):
+        stmt = select(TransactionModel.transaction_id, TransactionModel.transaction_type,
+                      TransactionModel.transaction_value, TransactionModel.transaction_date,
+                      TransactionModel.origin_account, TransactionModel.destination_account)
+        if date_from is not None:
+            stmt = stmt.where(TransactionModel.transaction_date >= date_from)
+            if after_id is not None:
+                # Resumes right after the last exported (transaction_date, transaction_id).
+                stmt = stmt.where(tuple_(TransactionModel.transaction_date, TransactionModel.transaction_id) >
+                                  TransactionsRepository.keyset(date_from, after_id))
+        if date_to is not None:
+            stmt = stmt.where(TransactionModel.transaction_date < date_to)
+        return stmt.order_by(TransactionModel.transaction_date, TransactionModel.transaction_id)
+
+    def get_account_analytics(self, account_ids, date_from, date_to, bucket):
+        """Returns (account_id, bucket, transaction_type, direction, total, count) rows, aggregated by the database."""
+        try:
+            return session.execute(self.account_analytics_query(account_ids, date_from, date_to, bucket)).all()
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def account_analytics_query(account_ids, date_from, date_to, bucket):
+        # A transfer is an outflow of its origin and an inflow of its destination, so each
+        # side is read as its own leg; a deposit is the only inflow of its origin.
+        origin_leg = select(
+            TransactionModel.origin_account.label('account_id'),
+            TransactionModel.transaction_type,
+            TransactionModel.transaction_value,
+            TransactionModel.transaction_date,
+            case((TransactionModel.transaction_type == TransactionsTypes.DEPOSIT.value, 'inflow'),
+                 else_='outflow').label('direction')
+        ).where(TransactionModel.origin_account.in_(account_ids))
+        destination_leg = select(
+            TransactionModel.destination_account,
+            TransactionModel.transaction_type,
+            TransactionModel.transaction_value,
+            TransactionModel.transaction_date,
+            literal('inflow')
+        ).where(TransactionModel.destination_account.in_(account_ids))
+        # Each leg is bounded on its own, so Postgres can use the account/date indexes and prune partitions.
+        legs = []
+        for leg in (origin_leg, destination_leg):
+            if date_from is not None:
+                leg = leg.where(TransactionModel.transaction_date >= date_from)
+            if date_to is not None:
+                leg = leg.where(TransactionModel.transaction_date < date_to)
+            legs.append(leg)
+        movements = union_all(*legs).subquery('movements')
+        bucket_start = date_bucket(bucket, movements.c.transaction_date)
+        return select(
+            movements.c.account_id,
+            bucket_start.label('bucket'),
+            movements.c.transaction_type,
+            movements.c.direction,
+            func.sum(movements.c.transaction_value).label('total'),
+            func.count().label('count')
+        ).group_by(
+            movements.c.account_id, bucket_start, movements.c.transaction_type, movements.c.direction
+        ).order_by(movements.c.account_id, bucket_start)
+
+    def create_partitions(self, from_month, to_month):
+        try:
+            created = session.execute(
+                text('SELECT accounts.create_transactions_partitions(:from_month, :to_month)'),
+                {'from_month': from_month, 'to_month': to_month}
+            ).scalar_one()
+            session.commit()
+            return created
         except Exception as e:
+            session.rollback()
             raise e
@@ -0,0 +1,18 @@
+BEGIN;
+
+-- Idempotency-Key of each deposit, withdraw and transfer, written in the same commit as its transaction.
+-- Kept out of accounts.transactions: a unique index on the monthly partitions would have to include transaction_date.
+CREATE TABLE IF NOT EXISTS accounts.idempotency_keys
+(
+    idempotency_key character varying(255) NOT NULL,
+    request_hash character(64) NOT NULL,
+    transaction_id uuid NOT NULL,
+    transaction_date timestamp without time zone NOT NULL,
+    CONSTRAINT idempotency_keys_pkey PRIMARY KEY (idempotency_key)
+);
+
+-- Lets old keys be pruned by date.
+CREATE INDEX IF NOT EXISTS idempotency_keys_transaction_date_idx
+    ON accounts.idempotency_keys (transaction_date);
+
+COMMIT;
@@ -0,0 +1,7 @@
+BEGIN;
+
+-- Bumped by every update of the row, updates compare it to the version they read (optimistic locking).
+ALTER TABLE accounts.accounts
+    ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1;
+
+COMMIT;
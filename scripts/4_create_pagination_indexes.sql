@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS transactions_transaction_date_transaction_id_idx
+    ON accounts.transactions USING btree (transaction_date ASC NULLS LAST, transaction_id ASC NULLS LAST);
@@ -0,0 +1,2 @@
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS holders_document_key
+    ON holders.holders USING btree (document ASC NULLS LAST);
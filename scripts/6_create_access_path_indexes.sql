@@ -0,0 +1,8 @@
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_origin_account_transaction_date_idx
+    ON accounts.transactions USING btree (origin_account ASC NULLS LAST, transaction_date ASC NULLS LAST);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_destination_account_transaction_date_idx
+    ON accounts.transactions USING btree (destination_account ASC NULLS LAST, transaction_date ASC NULLS LAST);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS accounts_holder_id_idx
+    ON accounts.accounts USING btree (holder_id ASC NULLS LAST);
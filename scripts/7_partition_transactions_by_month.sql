@@ -0,0 +1,67 @@
+BEGIN;
+
+ALTER TABLE accounts.transactions RENAME TO transactions_unpartitioned;
+ALTER TABLE accounts.transactions_unpartitioned RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey;
+ALTER INDEX IF EXISTS accounts.transactions_transaction_date_transaction_id_idx RENAME TO transactions_unpartitioned_transaction_date_transaction_id_idx;
+ALTER INDEX IF EXISTS accounts.transactions_origin_account_transaction_date_idx RENAME TO transactions_unpartitioned_origin_account_transaction_date_idx;
+ALTER INDEX IF EXISTS accounts.transactions_destination_account_transaction_date_idx RENAME TO transactions_unpartitioned_destination_account_transaction_date_idx;
+
+CREATE TABLE accounts.transactions
+(
+    transaction_id character varying(255) COLLATE pg_catalog."default" NOT NULL,
+    transaction_type character varying(255) COLLATE pg_catalog."default",
+    transaction_value numeric,
+    transaction_date timestamp without time zone NOT NULL,
+    origin_account integer,
+    destination_account integer,
+    CONSTRAINT transactions_pkey PRIMARY KEY (transaction_id, transaction_date)
+) PARTITION BY RANGE (transaction_date);
+
+CREATE TABLE IF NOT EXISTS accounts.transactions_default PARTITION OF accounts.transactions DEFAULT;
+
+CREATE OR REPLACE FUNCTION accounts.create_transactions_partitions(from_month date, to_month date)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_start date := date_trunc('month', from_month)::date;
+    created integer := 0;
+BEGIN
+    WHILE partition_start <= to_month LOOP
+        IF to_regclass(format('accounts.transactions_y%sm%s', to_char(partition_start, 'YYYY'), to_char(partition_start, 'MM'))) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE accounts.%I PARTITION OF accounts.transactions FOR VALUES FROM (%L) TO (%L)',
+                format('transactions_y%sm%s', to_char(partition_start, 'YYYY'), to_char(partition_start, 'MM')),
+                partition_start,
+                (partition_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        partition_start := (partition_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+SELECT accounts.create_transactions_partitions(
+    COALESCE(min(transaction_date), now())::date,
+    (now() + interval '3 months')::date
+) FROM accounts.transactions_unpartitioned;
+
+INSERT INTO accounts.transactions
+    SELECT transaction_id, transaction_type, transaction_value, COALESCE(transaction_date, 'epoch'::timestamp),
+           origin_account, destination_account
+    FROM accounts.transactions_unpartitioned;
+
+CREATE INDEX IF NOT EXISTS transactions_transaction_date_transaction_id_idx
+    ON accounts.transactions USING btree (transaction_date ASC NULLS LAST, transaction_id ASC NULLS LAST);
+
+CREATE INDEX IF NOT EXISTS transactions_origin_account_transaction_date_idx
+    ON accounts.transactions USING btree (origin_account ASC NULLS LAST, transaction_date ASC NULLS LAST);
+
+CREATE INDEX IF NOT EXISTS transactions_destination_account_transaction_date_idx
+    ON accounts.transactions USING btree (destination_account ASC NULLS LAST, transaction_date ASC NULLS LAST);
+
+DROP TABLE accounts.transactions_unpartitioned;
+
+COMMIT;
@@ -0,0 +1,9 @@
+BEGIN;
+
+-- Existing ids are uuid4 strings, new ones are time-ordered uuid7. Rewrites every partition and its indexes.
+ALTER TABLE accounts.transactions
+    ALTER COLUMN transaction_id TYPE uuid USING transaction_id::uuid;
+
+COMMIT;
+
+ANALYZE accounts.transactions;
@@ -0,0 +1,16 @@
+BEGIN;
+
+-- 0: the balance lives only in accounts.balance. N > 0: deposits are spread over N bucket rows.
+ALTER TABLE accounts.accounts
+    ADD COLUMN IF NOT EXISTS balance_buckets integer NOT NULL DEFAULT 0;
+
+-- Bucket rows are only ever updated in place, the free space keeps those updates HOT.
+CREATE TABLE IF NOT EXISTS accounts.account_balance_buckets
+(
+    account_id bigint NOT NULL,
+    bucket integer NOT NULL,
+    balance numeric NOT NULL DEFAULT 0,
+    CONSTRAINT account_balance_buckets_pkey PRIMARY KEY (account_id, bucket)
+) WITH (fillfactor = 50);
+
+COMMIT;
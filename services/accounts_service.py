@@ -1,3 +1,7 @@
+import random
+import time
+
+from sqlalchemy.orm.exc import StaleDataError
 from werkzeug.exceptions import NotFound
 
 from util.validator import Validator
@@ -7,12 +11,21 @@ from builders.account_builder import AccountBuilder
 from repository.accounts_repository import AccountsRepository
 from util.enums.account_status import Status
 from util.params_utils import ParamsUtils as param_utils
+from util.cursor_utils import CursorUtils as cursor_utils
 from sqlalchemy.exc import NoResultFound
-from exceptions.exceptions import AccountNotFound, StatusNotAllowed, AccountAlreadyExistentByHolder
+from exceptions.exceptions import AccountNotFound, StatusNotAllowed, AccountAlreadyExistentByHolder, ConcurrentUpdate
+from config.cache_config import account_cache
+from util.serializers import AccountSerializer as account_serializer
+from util.env_utils import EnvUtils as env_utils
+from util.metrics import metrics
+from util.account_contention_stats import account_contention_stats
 
 
 class AccountsService:
 
+    # Retries of an Account update that lost an optimistic locking conflict before giving up with 409.
+    update_retries = env_utils.get_int('ACCOUNT_UPDATE_RETRIES', 3)
+
     def __init__(self):
         self.__validator = Validator()
         self.__holders_service = HoldersService()
@@ -28,12 +41,7 @@ class AccountsService:
         account = self.__account_repository.create_account(self.__account_builder.account_builder(holder_id))
         return {
             'message': 'Account created with success!',
-            'account': {
-                'account_id': account.account_id,
-                'holder_id': account.holder_id,
-                'balance': str(account.balance),
-                'status': Status.ACTIVE.name
-            }
+            'account': account_serializer.to_dict(account)
         }
 
     def __holder_have_account_not_closed(self, holder_id):
@@ -42,55 +50,64 @@ class AccountsService:
 
     def get_account_by_id(self, account_id, return_dict=True):
         try:
-            account = self.__account_repository.get_account_by_account_id(account_id)
             if return_dict:
-                return {
-                    'account_id': account.account_id,
-                    'holder_id': account.holder_id,
-                    'balance': str(account.balance),
-                    'status': Status(account.status).name
-                }
-            return account
+                snapshot = account_cache.get(account_id)
+                if snapshot is None:
+                    snapshot = self.__cache_account(self.__account_repository.get_account_by_account_id(account_id))
+                return dict(snapshot)
+            return self.__account_repository.get_account_by_account_id(account_id)
         except NoResultFound:
             raise AccountNotFound('Account not found.')
 
-    def get_all_accounts(self, headers):
+    def __cache_account(self, account):
+        snapshot = self.__to_dict(account)
+        account_cache.set(account.account_id, snapshot)
+        return snapshot
+
+    @staticmethod
+    def invalidate_cached_accounts(*account_ids):
+        account_cache.delete(*account_ids)
+
+    def get_all_accounts(self, args):
         try:
-            self.__validator.validate_params(headers, ['currentPage', 'maxItemsPerPage'])
-            params = param_utils.update_params({'currentPage': 1, 'maxItemsPerPage': 50}, headers.environ['QUERY_STRING'])
-            accounts = sorted(self.__account_repository.get_accounts(params), key=lambda account: account.account_id)
-            return {
-                'currentPage': params['currentPage'],
-                'maxItemsPerPage': params['maxItemsPerPage'],
-                'accounts': [
-                    {
-                        'account_id': account.account_id,
-                        'holder_id': account.holder_id,
-                        'balance': str(account.balance),
-                        'status': Status(account.status).name
-                    } for account in accounts
-                ]
-            }
+            params = param_utils.parse_list_params(args)
+            if params.after is not None:
+                accounts, next_cursor = self.__get_accounts_after(params.after, params.max_items_per_page)
+                result = {'maxItemsPerPage': params.max_items_per_page, 'next': next_cursor}
+            else:
+                accounts = sorted(self.__account_repository.get_accounts(params), key=lambda account: account.account_id)
+                result = {'currentPage': params.current_page, 'maxItemsPerPage': params.max_items_per_page}
+            result['accounts'] = self.__to_list(accounts)
+            return result
         except NotFound:
             raise AccountNotFound('No accounts found.')
 
+    def __get_accounts_after(self, after, limit):
+        cursor = cursor_utils.decode(after, (int,))
+        last_account_id = cursor[0] if cursor else None
+        accounts = self.__account_repository.get_accounts_after(last_account_id, limit + 1)
+        return cursor_utils.page(accounts, limit, lambda account: [account.account_id])
+
     def block_account(self, account_id):
         try:
-            account = self.__change_account_status(account_id, Status.BLOCKED.value)
+            account = self.run_with_retries('block', account_id, self.__change_account_status,
+                                            account_id, Status.BLOCKED.value)
             return self.__return_status_message(account)
         except NoResultFound:
             raise AccountNotFound('Account not found.')
 
     def reactivate_account(self, account_id):
         try:
-            account = self.__change_account_status(account_id, Status.ACTIVE.value)
+            account = self.run_with_retries('reactivate', account_id, self.__change_account_status,
+                                            account_id, Status.ACTIVE.value)
             return self.__return_status_message(account)
         except NoResultFound:
             raise AccountNotFound('Account not found.')
 
     def close_account(self, account_id):
         try:
-            account = self.__change_account_status(account_id, Status.CLOSED.value)
+            account = self.run_with_retries('close', account_id, self.__change_account_status,
+                                            account_id, Status.CLOSED.value)
             return self.__return_status_message(account)
         except NoResultFound:
             raise AccountNotFound('Account not found.')
@@ -101,27 +118,98 @@ class AccountsService:
             raise StatusNotAllowed('Account is already closed.')
         account.status = status
         self.__account_repository.update_account()
+        self.__cache_account(account)
         return account
 
-    @staticmethod
-    def __return_status_message(account):
+    def __return_status_message(self, account):
         message = 'Account blocked.' if account.status == Status.BLOCKED.value else \
             'Account reactivated.' if account.status == Status.ACTIVE.value else \
             'Account closed.'
         return {
             'message': message,
-            'account': {
-                'account_id': account.account_id,
-                'holder_id': account.holder_id,
-                'balance': str(account.balance),
-                'status': Status(account.status).name
-            }
+            'account': self.__to_dict(account)
         }
 
     @staticmethod
     def __is_account_closed(account):
         return account.status == Status.CLOSED.value
 
-    def update_account(self, account, value):
+    def run_with_retries(self, operation, account_id, function, *args):
+        """Runs ``function`` again, from a fresh read, while its Account update loses a version conflict.
+
+        The function has to read the Account itself, since the rollback after a
+        conflict expires what it read before.
+        """
+        for attempt in range(self.update_retries + 1):
+            try:
+                return function(*args)
+            except StaleDataError:
+                self.rollback()
+                self.invalidate_cached_accounts(account_id)
+                retried = attempt < self.update_retries
+                metrics.account_conflicts.inc(operation)
+                account_contention_stats.record(account_id, retried)
+                if not retried:
+                    raise ConcurrentUpdate('Account was updated concurrently, try again.')
+                metrics.account_retries.inc(operation)
+                # Jitter keeps the conflicting requests from colliding again right away.
+                time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+
+    def get_accounts_for_update(self, account_ids):
+        accounts = self.__account_repository.get_accounts_for_update(sorted(set(account_ids)))
+        return {account.account_id: account for account in accounts}
+
+    def rollback(self):
+        self.__account_repository.rollback()
+
+    def update_account(self, account, value, commit=True):
+        """Changes the balance; without commit, the caller evicts the cached Account once it has committed."""
         account.balance += value
-        self.__account_repository.update_account()
+        if commit:
+            self.__account_repository.update_account()
+            self.invalidate_cached_accounts(account.account_id)
+
+    def get_available_balance(self, account):
+        """Balance of the account row plus, for bucketed accounts, what deposits added to its buckets."""
+        if not account.balance_buckets:
+            return account.balance
+        return account.balance + self.__account_repository.get_bucket_balance(account.account_id)
+
+    def __to_dict(self, account):
+        if not account.balance_buckets:
+            return account_serializer.to_dict(account)
+        return account_serializer.to_dict(account, self.get_available_balance(account))
+
+    def __to_list(self, accounts):
+        bucketed_ids = [account.account_id for account in accounts if account.balance_buckets]
+        if not bucketed_ids:
+            return account_serializer.to_list(accounts)
+        # One grouped query for the whole page instead of one per bucketed account.
+        bucket_balances = self.__account_repository.get_bucket_balances(bucketed_ids)
+        return [
+            account_serializer.to_dict(account, account.balance + bucket_balances.get(account.account_id, 0))
+            if account.balance_buckets else account_serializer.to_dict(account)
+            for account in accounts
+        ]
+
+    def deposit_to_bucket(self, account, value):
+        """Adds a deposit to a random bucket of the account, leaving its row unlocked.
+
+        Falls back to the account row when the buckets were just removed. The
+        caller commits, then evicts the cached Account.
+        """
+        if not self.__account_repository.add_to_bucket(account.account_id,
+                                                       random.randrange(account.balance_buckets), value):
+            self.update_account(account, value, False)
+
+    def set_balance_buckets(self, account_id, buckets):
+        """Splits deposits to the account over ``buckets`` sub-balances, or folds them back with 0."""
+        if buckets < 0:
+            raise ValueError('buckets must not be negative.')
+        accounts = self.get_accounts_for_update([account_id])
+        if account_id not in accounts:
+            self.rollback()
+            raise AccountNotFound('Account not found.')
+        account = self.__account_repository.set_balance_buckets(accounts[account_id], buckets)
+        self.invalidate_cached_accounts(account_id)
+        return account
@@ -0,0 +1,114 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from jsonschema import ValidationError
+
+from repository.holders_repository import HoldersRepository
+from repository.import_repository import ImportRepository
+from util.schemas_templates import import_holder_schema
+from util.serializers import CENTS
+from util.uuid_utils import UuidUtils as uuid_utils
+from util.validator import Validator
+
+
+class HoldersImportService:
+    """Onboards holders, each with an Account and an optional opening balance, from a CSV or NDJSON file.
+
+    Rows are validated while the file is read and loaded ``chunk_size`` at a
+    time: one query checks the chunk's documents against the database, then the
+    accepted rows are loaded in bulk and committed. Rejected rows are reported
+    with their line number and don't stop the import.
+    """
+
+    formats = ('csv', 'ndjson')
+
+    def __init__(self, chunk_size=5000):
+        self.chunk_size = chunk_size
+        self.__validator = Validator()
+        self.__holders_repository = HoldersRepository()
+        self.__import_repository = ImportRepository()
+
+    @staticmethod
+    def file_format(format_param, content_type=None):
+        """The ``format`` query parameter, or the format the Content-Type names (CSV by default)."""
+        if format_param:
+            return format_param.lower()
+        return 'ndjson' if content_type and 'json' in content_type.lower() else 'csv'
+
+    def import_holders(self, lines, file_format):
+        if file_format not in self.formats:
+            raise ValidationError('format value not allowed, must be csv or ndjson.')
+        report = {'imported': 0, 'rejected': 0, 'rejects': []}
+        documents = set()
+        chunk = []
+        for line, row in self.__parse_csv(lines) if file_format == 'csv' else self.__parse_ndjson(lines):
+            try:
+                if row is None:
+                    raise ValidationError('Invalid JSON.')
+                self.__validator.validate_body(row, import_holder_schema)
+                balance = Decimal(str(row.get('balance', 0)))
+                if not balance.is_finite():
+                    raise ValidationError('balance value not allowed, must be a finite number.')
+                if row['document'] in documents:
+                    raise ValidationError('Document is repeated in the file.')
+            except ValidationError as e:
+                self.__reject(report, line, e.args[0])
+                continue
+            documents.add(row['document'])
+            balance = balance.quantize(CENTS)
+            chunk.append((line, row['name'], row['document'], balance, str(uuid_utils.uuid7()) if balance else None))
+            if len(chunk) >= self.chunk_size:
+                self.__load(chunk, report)
+                chunk = []
+        if chunk:
+            self.__load(chunk, report)
+        report['rejects'].sort(key=lambda reject: reject['line'])
+        return report
+
+    def __load(self, chunk, report):
+        existing = self.__holders_repository.get_existing_documents([row[2] for row in chunk])
+        rows = []
+        for row in chunk:
+            if row[2] in existing:
+                self.__reject(report, row[0], 'Document already exists.')
+            else:
+                rows.append(row)
+        if not rows:
+            return
+        skipped = self.__import_repository.load_holders(rows, datetime.now())
+        for row in rows:
+            if row[2] in skipped:
+                self.__reject(report, row[0], 'Document already exists.')
+        report['imported'] += len(rows) - len(skipped)
+
+    @staticmethod
+    def __reject(report, line, error):
+        report['rejected'] += 1
+        report['rejects'].append({'line': line, 'error': error})
+
+    @staticmethod
+    def __parse_csv(lines):
+        """Yields (line number, row) for a CSV file with a name,document[,balance] header."""
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells count as missing, so they fail as required fields instead of as too short strings.
+            row = {key: value for key, value in row.items() if key is not None and value not in (None, '')}
+            if 'balance' in row:
+                try:
+                    row['balance'] = float(row['balance'])
+                except ValueError:
+                    pass
+            yield reader.line_num, row
+
+    @staticmethod
+    def __parse_ndjson(lines):
+        """Yields (line number, row) for a file with one JSON object per line; row is None for invalid JSON."""
+        for line, text in enumerate(lines, 1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError:
+                yield line, None
@@ -6,6 +6,8 @@ from util.validator import Validator
 from builders.holder_builder import HolderBuilder
 from exceptions.exceptions import DocumentAlreadyExists, HolderNotFound
 from util.params_utils import ParamsUtils as params_utils
+from util.cursor_utils import CursorUtils as cursor_utils
+from util.serializers import HolderSerializer as holder_serializer
 
 
 class HoldersService:
@@ -15,45 +17,43 @@ class HoldersService:
         self.__validator = Validator()
         self.__holder_builder = HolderBuilder()
 
-    def get_all_holders(self, headers):
+    def get_all_holders(self, args):
         try:
-            self.__validator.validate_params(headers, ['currentPage', 'maxItemsPerPage'])
-            params = params_utils.update_params({'currentPage': 1, 'maxItemsPerPage': 50}, headers.environ['QUERY_STRING'])
-            holders = sorted(self.__holders_repository.get_holders(params), key=lambda holder: holder.holder_id)
-            return {
-                'currentPage': params['currentPage'],
-                'maxItemsPerPage': params['maxItemsPerPage'],
-                'holders': [
-                    {'holder_id': holder.holder_id, 'name': holder.name, 'document': holder.document} for holder in holders
-                ]
-            }
+            params = params_utils.parse_list_params(args)
+            if params.after is not None:
+                holders, next_cursor = self.__get_holders_after(params.after, params.max_items_per_page)
+                result = {'maxItemsPerPage': params.max_items_per_page, 'next': next_cursor}
+            else:
+                holders = sorted(self.__holders_repository.get_holders(params), key=lambda holder: holder.holder_id)
+                result = {'currentPage': params.current_page, 'maxItemsPerPage': params.max_items_per_page}
+            result['holders'] = holder_serializer.to_list(holders)
+            return result
         except NotFound:
             raise HolderNotFound('No holders found.')
 
+    def __get_holders_after(self, after, limit):
+        cursor = cursor_utils.decode(after, (int,))
+        last_holder_id = cursor[0] if cursor else None
+        holders = self.__holders_repository.get_holders_after(last_holder_id, limit + 1)
+        return cursor_utils.page(holders, limit, lambda holder: [holder.holder_id])
+
     def get_holder_by_id(self, holder_id):
         try:
             holder = self.__holders_repository.get_holder_by_id(holder_id)
-            return {'holder_id': holder.holder_id, 'name': holder.name, 'document': holder.document}
+            return holder_serializer.to_dict(holder)
         except NoResultFound:
             raise HolderNotFound('Holder not found.')
 
     def create_holder(self, body):
         self.__validator.validate_body(body, post_holder_schema)
-        if self.__document_already_exists(body['documentsssss']):
-            raise DocumentAlreadyExists('Document already exists.')
         holder = self.__holders_repository.create_holder(self.__holder_builder.holder_builder(body))
+        if holder is None:
+            raise DocumentAlreadyExists('Document already exists.')
         return {
                 'message': 'Holder created with success!',
-                'holder': {
-                    'holder_id': holder.holder_id,
-                    'name': holder.name,
-                    'document': holder.document
-                }
+                'holder': holder_serializer.to_dict(holder)
             }
 
-    def __document_already_exists(self, document):
-        return True if (self.__holders_repository.get_holder_by_document(document)) else False
-
     def update_holder(self, holder_id, body):
         self.__validator.validate_body(body, put_holder_schema)
         try:
@@ -62,11 +62,7 @@ class HoldersService:
             self.__holders_repository.update_holder()
             return {
                 'message': 'Holder updated with success!',
-                'holder': {
-                    'holder_id': existent_holder.holder_id,
-                    'name': existent_holder.name,
-                    'document': existent_holder.document
-                }
+                'holder': holder_serializer.to_dict(existent_holder)
             }
         except NoResultFound:
             raise HolderNotFound('Holder not found.')
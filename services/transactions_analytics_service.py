@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+from jsonschema import ValidationError
+
+from repository.transactions_repository import TransactionsRepository, date_bucket
+from services.accounts_service import AccountsService
+from util.enums.transactions_types import TransactionsTypes
+from util.params_utils import ParamsUtils as param_utils
+from util.schemas_templates import account_analytics_schema
+from util.serializers import TRANSACTION_TYPE_NAMES, money
+from util.validator import Validator
+
+
+class TransactionsAnalyticsService:
+    """Inflow, outflow and net of Accounts per day, week or month, with totals and counts per transaction type.
+
+    The transactions are summed by the database (GROUP BY account, bucket,
+    type and direction), so only one row per group reaches Python whatever
+    the number of transactions in the period. Buckets without transactions
+    are left out.
+    """
+
+    def __init__(self):
+        self.__transactions_repository = TransactionsRepository()
+        self.__accounts_service = AccountsService()
+        self.__validator = Validator()
+
+    def get_account_analytics(self, account_id, date_from=None, date_to=None, bucket=None):
+        self.__accounts_service.get_account_by_id(account_id, False)
+        bucket = self.__parse_bucket(bucket)
+        date_from, date_to = param_utils.parse_date_range(date_from, date_to)
+        analytics = self.__get_analytics([account_id], date_from, date_to, bucket)[account_id]
+        return {'account_id': account_id, 'bucket': bucket, **analytics}
+
+    def get_accounts_analytics(self, body):
+        """Analytics of every Account in body['account_ids']; unknown Accounts get no buckets."""
+        self.__validator.validate_body(body, account_analytics_schema)
+        bucket = self.__parse_bucket(body.get('bucket'))
+        date_from, date_to = param_utils.parse_date_range(body.get('from'), body.get('to'))
+        analytics = self.__get_analytics(body['account_ids'], date_from, date_to, bucket)
+        return {
+            'bucket': bucket,
+            'accounts': [{'account_id': account_id, **analytics[account_id]} for account_id in body['account_ids']]
+        }
+
+    @staticmethod
+    def __parse_bucket(bucket):
+        if bucket is None or bucket == '':
+            return 'day'
+        if bucket not in date_bucket.units:
+            raise ValidationError('bucket value not allowed, must be day, week or month.')
+        return bucket
+
+    def __get_analytics(self, account_ids, date_from, date_to, bucket):
+        analytics = {account_id: (self.__empty_totals(), {}) for account_id in account_ids}
+        rows = self.__transactions_repository.get_account_analytics(account_ids, date_from, date_to, bucket)
+        for account_id, bucket_start, transaction_type, direction, total, count in rows:
+            account_totals, buckets = analytics[account_id]
+            bucket_totals = buckets.get(bucket_start)
+            if bucket_totals is None:
+                bucket_totals = buckets[bucket_start] = self.__empty_totals()
+            type_name = TRANSACTION_TYPE_NAMES[transaction_type]
+            self.__add(account_totals, type_name, direction, total, count)
+            self.__add(bucket_totals, type_name, direction, total, count)
+        return {
+            account_id: {
+                'totals': self.__to_dict(account_totals),
+                'buckets': [{'bucket': bucket_start.isoformat(), **self.__to_dict(bucket_totals)}
+                            for bucket_start, bucket_totals in sorted(buckets.items())]
+            }
+            for account_id, (account_totals, buckets) in analytics.items()
+        }
+
+    @staticmethod
+    def __empty_totals():
+        return {
+            'inflow': Decimal(0),
+            'outflow': Decimal(0),
+            'count': 0,
+            'types': {transaction_type.name: {'inflow': Decimal(0), 'outflow': Decimal(0), 'count': 0}
+                      for transaction_type in TransactionsTypes}
+        }
+
+    @staticmethod
+    def __add(totals, type_name, direction, total, count):
+        totals[direction] += total
+        totals['count'] += count
+        totals['types'][type_name][direction] += total
+        totals['types'][type_name]['count'] += count
+
+    @staticmethod
+    def __to_dict(totals):
+        return {
+            'inflow': money(totals['inflow']),
+            'outflow': money(totals['outflow']),
+            'net': money(totals['inflow'] - totals['outflow']),
+            'count': totals['count'],
+            'types': {
+                type_name: {'inflow': money(type_totals['inflow']), 'outflow': money(type_totals['outflow']),
+                            'count': type_totals['count']}
+                for type_name, type_totals in totals['types'].items()
+            }
+        }
@@ -0,0 +1,205 @@
+import csv
+import io
+import json
+import os
+
+from jsonschema import ValidationError
+
+from repository.transactions_repository import TransactionsRepository
+from util.params_utils import ParamsUtils as param_utils
+from util.serializers import TRANSACTION_TYPE_NAMES, money, timestamp
+from util.uuid_utils import UuidUtils as uuid_utils
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_COLUMNS = ('transaction_id', 'transaction_type', 'transaction_value', 'transaction_date',
+                  'origin_account', 'destination_account')
+
+
+class TransactionsExportService:
+    """Exports accounts.transactions, or a date range of it, to CSV or Parquet.
+
+    Transactions are read ``chunk_size`` at a time through a server-side cursor,
+    as columns, and each chunk is encoded before the next one is read, so memory
+    stays bounded by the chunk size. The export is ordered by
+    (transaction_date, transaction_id), which is also where it resumes from.
+    Parquet needs pyarrow to be installed.
+    """
+
+    formats = ('csv', 'parquet')
+    content_types = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+    def __init__(self, chunk_size=10000):
+        self.chunk_size = chunk_size
+        self.__transactions_repository = TransactionsRepository()
+
+    def export(self, file_format, date_from=None, date_to=None, after_id=None):
+        """Checks the parameters and returns an iterator over the bytes of one CSV or Parquet file."""
+        self.__check_format(file_format)
+        date_from, date_to = param_utils.parse_date_range(date_from, date_to)
+        after_id = self.__parse_after_id(after_id, date_from)
+        return self.__stream(file_format, date_from, date_to, after_id)
+
+    def __stream(self, file_format, date_from, date_to, after_id):
+        writer = _CsvWriter() if file_format == 'csv' else _ParquetWriter()
+        for columns in self.__transactions_repository.get_transaction_columns(date_from, date_to, after_id,
+                                                                             self.chunk_size):
+            yield writer.write(columns)
+        yield writer.close()
+
+    def export_to_folder(self, folder, file_format, date_from=None, date_to=None):
+        """Writes one file per chunk to ``folder`` and returns the number of transactions written.
+
+        A checkpoint file records the last exported transaction after each
+        file, so running it again on the same folder continues from there.
+        """
+        self.__check_format(file_format)
+        date_from, date_to = param_utils.parse_date_range(date_from, date_to)
+        os.makedirs(folder, exist_ok=True)
+        checkpoint_path = os.path.join(folder, 'checkpoint.json')
+        checkpoint = self.__read_checkpoint(checkpoint_path, file_format)
+        after_id = None
+        if checkpoint['transaction_date'] is not None:
+            date_from = param_utils.parse_date('transaction_date', checkpoint['transaction_date'])
+            after_id = checkpoint['transaction_id']
+        written = 0
+        for columns in self.__transactions_repository.get_transaction_columns(date_from, date_to, after_id,
+                                                                             self.chunk_size):
+            writer = _CsvWriter() if file_format == 'csv' else _ParquetWriter()
+            part_path = os.path.join(folder, f"transactions-{checkpoint['part'] + 1:05d}.{file_format}")
+            with open(part_path + '.tmp', 'wb') as part:
+                part.write(writer.write(columns))
+                part.write(writer.close())
+            os.replace(part_path + '.tmp', part_path)
+            written += len(columns[0])
+            checkpoint.update({
+                'part': checkpoint['part'] + 1,
+                'transaction_date': columns[3][-1].isoformat(),
+                'transaction_id': str(columns[0][-1])
+            })
+            self.__write_checkpoint(checkpoint_path, checkpoint)
+        return written
+
+    @staticmethod
+    def __read_checkpoint(path, file_format):
+        if not os.path.exists(path):
+            return {'format': file_format, 'part': 0, 'transaction_date': None, 'transaction_id': None}
+        with open(path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint['format'] != file_format:
+            raise ValidationError(f"format value not allowed, the folder has a {checkpoint['format']} export.")
+        return checkpoint
+
+    @staticmethod
+    def __write_checkpoint(path, checkpoint):
+        with open(path + '.tmp', 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(path + '.tmp', path)
+
+    def __check_format(self, file_format):
+        if file_format not in self.formats:
+            raise ValidationError('format value not allowed, must be csv or parquet.')
+        if file_format == 'parquet' and pyarrow is None:
+            raise ValidationError('format value not allowed, parquet needs pyarrow to be installed.')
+
+    @staticmethod
+    def __parse_after_id(after_id, date_from):
+        if after_id is None or after_id == '':
+            return None
+        if date_from is None:
+            raise ValidationError('after_id can only be used together with from.')
+        transaction_uuid = uuid_utils.parse(after_id)
+        if transaction_uuid is None:
+            raise ValidationError('after_id value not allowed, must be a transaction id.')
+        return str(transaction_uuid)
+
+
+class _CsvWriter:
+
+    def __init__(self):
+        self.__buffer = io.StringIO()
+        self.__writer = csv.writer(self.__buffer)
+        self.__writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, columns):
+        transaction_ids, types, values, dates, origins, destinations = columns
+        self.__writer.writerows(zip(
+            transaction_ids,
+            [TRANSACTION_TYPE_NAMES[transaction_type] for transaction_type in types],
+            [money(value) for value in values],
+            [timestamp(date) for date in dates],
+            origins,
+            destinations
+        ))
+        return self.__drain()
+
+    def close(self):
+        return self.__drain()
+
+    def __drain(self):
+        data = self.__buffer.getvalue().encode('utf-8')
+        self.__buffer.seek(0)
+        self.__buffer.truncate()
+        return data
+
+
+class _ParquetWriter:
+    """Writes every chunk as a row group and hands back the bytes written since the last call."""
+
+    schema = None if pyarrow is None else pyarrow.schema([
+        ('transaction_id', pyarrow.string()),
+        ('transaction_type', pyarrow.string()),
+        ('transaction_value', pyarrow.decimal128(18, 2)),
+        ('transaction_date', pyarrow.timestamp('us')),
+        ('origin_account', pyarrow.int64()),
+        ('destination_account', pyarrow.int64())
+    ])
+
+    def __init__(self):
+        self.__sink = _DrainingSink()
+        self.__writer = pyarrow.parquet.ParquetWriter(self.__sink, self.schema)
+
+    def write(self, columns):
+        transaction_ids, types, values, dates, origins, destinations = columns
+        self.__writer.write_table(pyarrow.table([
+            [str(transaction_id) for transaction_id in transaction_ids],
+            [TRANSACTION_TYPE_NAMES[transaction_type] for transaction_type in types],
+            values,
+            dates,
+            origins,
+            destinations
+        ], schema=self.schema))
+        return self.__sink.drain()
+
+    def close(self):
+        self.__writer.close()
+        return self.__sink.drain()
+
+
+class _DrainingSink(io.RawIOBase):
+    """Write-only file that keeps the bytes until they are drained, while tell() keeps counting."""
+
+    def __init__(self):
+        super().__init__()
+        self.__chunks = []
+        self.__position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.__chunks.append(bytes(data))
+        self.__position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.__position
+
+    def drain(self):
+        data = b''.join(self.__chunks)
+        self.__chunks = []
+        return data
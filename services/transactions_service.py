@@ -1,144 +1,290 @@
+import hashlib
+import json
 from _decimal import Decimal
+from datetime import datetime
+from http import HTTPStatus
+from jsonschema import ValidationError
 from werkzeug.exceptions import NotFound
 from repository.transactions_repository import TransactionsRepository
 from util.enums.account_status import Status
 from util.enums.transactions_types import TransactionsTypes
 from util.validator import Validator
-from util.schemas_templates import account_financial_operation_schema, transfer_schema
-from exceptions.exceptions import AccountNotFound, InsufficientBalance, StatusNotAllowed, TransactionNotFound
-from sqlalchemy.exc import NoResultFound
+from util.schemas_templates import account_financial_operation_schema, transfer_schema, \
+    batch_financial_operation_schema, batch_operation_schema
+from exceptions.exceptions import AccountNotFound, InsufficientBalance, StatusNotAllowed, TransactionNotFound, \
+    IdempotencyKeyConflict
+from sqlalchemy.exc import NoResultFound, IntegrityError
 from services.accounts_service import AccountsService
 from builders.transaction_builder import TransactionBuilder
+from models.TransactionModel import TransactionModel
 from util.params_utils import ParamsUtils as param_utils
+from util.cursor_utils import CursorUtils as cursor_utils
+from util.uuid_utils import UuidUtils as uuid_utils
+from util.serializers import TransactionSerializer as transaction_serializer, CENTS, dumps
+from config.cache_config import idempotency_cache
 
 
 class TransactionsService:
 
+    response_messages = {
+        TransactionsTypes.DEPOSIT.value: 'Deposit made successfully!',
+        TransactionsTypes.WITHDRAW.value: 'Withdraw made successfully!',
+        TransactionsTypes.TRANSFER.value: 'Transfer completed with success.'
+    }
+    max_idempotency_key_length = 255
+
     def __init__(self):
         self.__transactions_repository = TransactionsRepository()
         self.__validator = Validator()
         self.__accounts_service = AccountsService()
         self.__transaction_builder = TransactionBuilder()
 
-    def deposit(self, body):
+    def deposit(self, body, idempotency_key=None):
+        return self.__run_idempotent(self.__deposit, body, TransactionsTypes.DEPOSIT, idempotency_key)
+
+    def __deposit(self, body, idempotency_key, request_hash):
+        self.__validator.validate_body(body, account_financial_operation_schema)
+        return self.__accounts_service.run_with_retries('deposit', body['account_id'], self.__apply_deposit,
+                                                        body, idempotency_key, request_hash)
+
+    def __apply_deposit(self, body, idempotency_key, request_hash):
         try:
-            self.__validator.validate_body(body, account_financial_operation_schema)
             account = self.__accounts_service.get_account_by_id(body['account_id'], False)
-            if self.__account_is_active(account):
-                self.__accounts_service.update_account(account, Decimal(body['value']).quantize(Decimal('1.00')))
-                transaction = self.__transactions_repository.create_transaction(
-                    self.__transaction_builder.transaction_builder(body, TransactionsTypes.DEPOSIT.value, body['account_id'])
-                )
-                return {
-                    'message': 'Deposit made successfully!',
-                    'transaction': {
-                        'transaction_id': transaction.transaction_id,
-                        'transaction_type': transaction.transaction_type,
-                        'transaction_value': str(Decimal(transaction.transaction_value).quantize(Decimal('1.00'))),
-                        'transaction_date': transaction.transaction_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                        'account_id': transaction.origin_account
-                    }
-                }
-            raise StatusNotAllowed('Account is not active.')
+            transaction = self.__apply_financial_operation(account, body, TransactionsTypes.DEPOSIT)
+            response = self.__create_transaction(transaction, idempotency_key, request_hash)
+            # Evicted only once committed, so a read in between can't cache the old balance again.
+            self.__accounts_service.invalidate_cached_accounts(account.account_id)
+            return response
         except NoResultFound:
             raise AccountNotFound('Account not found.')
 
-    def withdraw(self, body):
+    def withdraw(self, body, idempotency_key=None):
+        return self.__run_idempotent(self.__withdraw, body, TransactionsTypes.WITHDRAW, idempotency_key)
+
+    def __withdraw(self, body, idempotency_key, request_hash):
+        self.__validator.validate_body(body, account_financial_operation_schema)
+        return self.__accounts_service.run_with_retries('withdraw', body['account_id'], self.__apply_withdraw,
+                                                        body, idempotency_key, request_hash)
+
+    def __apply_withdraw(self, body, idempotency_key, request_hash):
         try:
-            self.__validator.validate_body(body, account_financial_operation_schema)
             account = self.__accounts_service.get_account_by_id(body['account_id'], False)
-            if self.__account_is_active(account):
-                self.__account_balance_is_valid(account, body['value'])
-                self.__accounts_service.update_account(account, Decimal(body['value'] * -1).quantize(Decimal('1.00')))
-                transaction = self.__transactions_repository.create_transaction(
-                    self.__transaction_builder.transaction_builder(body, TransactionsTypes.WITHDRAW.value, body['account_id'])
-                )
-                return {
-                    'message': 'Withdraw made successfully!',
-                    'transaction': {
-                        'transaction_id': transaction.transaction_id,
-                        'transaction_type': transaction.transaction_type,
-                        'transaction_value': str(Decimal(transaction.transaction_value).quantize(Decimal('1.00'))),
-                        'transaction_date': transaction.transaction_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                        'account_id': transaction.origin_account
-                    }
-                }
-            raise StatusNotAllowed('Account is not active.')
+            if account.balance_buckets:
+                # Deposits to the buckets don't lock the row, so the withdrawals take the lock themselves.
+                account = self.__accounts_service.get_accounts_for_update([account.account_id])[account.account_id]
+            transaction = self.__apply_financial_operation(account, body, TransactionsTypes.WITHDRAW)
+            response = self.__create_transaction(transaction, idempotency_key, request_hash)
+            self.__accounts_service.invalidate_cached_accounts(account.account_id)
+            return response
         except NoResultFound:
             raise AccountNotFound('Account not found.')
 
+    def __run_idempotent(self, operation, body, transaction_type, idempotency_key):
+        """Runs the operation once per Idempotency-Key; retries get the first response back.
+
+        The key is committed with the transaction, so a concurrent retry that
+        loses the race on the key rolls its own changes back.
+        """
+        if idempotency_key is None:
+            return operation(body, None, None)
+        if not idempotency_key or len(idempotency_key) > self.max_idempotency_key_length:
+            raise ValidationError(f'Idempotency-Key value not allowed, must have 1 to '
+                                  f'{self.max_idempotency_key_length} characters.')
+        request_hash = self.__request_hash(transaction_type, body)
+        response = self.__get_idempotent_response(idempotency_key, request_hash)
+        if response is not None:
+            return response
+        try:
+            response = operation(body, idempotency_key, request_hash)
+        except IntegrityError as e:
+            self.__accounts_service.rollback()
+            response = self.__get_idempotent_response(idempotency_key, request_hash)
+            if response is None:
+                raise e
+            return response
+        idempotency_cache.set(idempotency_key, (request_hash, response))
+        return response
+
+    def __get_idempotent_response(self, idempotency_key, request_hash):
+        cached = idempotency_cache.get(idempotency_key)
+        if cached is None:
+            stored_key = self.__transactions_repository.get_idempotency_key(idempotency_key)
+            if stored_key is None:
+                return None
+            self.__check_request_hash(stored_key.request_hash, request_hash)
+            transaction = self.__transactions_repository.get_transaction_by_id(
+                stored_key.transaction_id, stored_key.transaction_date
+            )
+            cached = (request_hash, self.__transaction_response(transaction))
+            idempotency_cache.set(idempotency_key, cached)
+        self.__check_request_hash(cached[0], request_hash)
+        return cached[1]
+
     @staticmethod
-    def __account_balance_is_valid(account, value):
-        if value > account.balance:
+    def __check_request_hash(stored_hash, request_hash):
+        if stored_hash != request_hash:
+            raise IdempotencyKeyConflict('Idempotency-Key was already used by a different request.')
+
+    @staticmethod
+    def __request_hash(transaction_type, body):
+        request = json.dumps([transaction_type.value, body], sort_keys=True, default=str)
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def __create_transaction(self, transaction, idempotency_key, request_hash):
+        stored_key = None if idempotency_key is None else \
+            self.__transaction_builder.idempotency_key_builder(idempotency_key, request_hash, transaction)
+        return self.__transaction_response(self.__transactions_repository.create_transaction(transaction, stored_key))
+
+    def __transaction_response(self, transaction):
+        if transaction.transaction_type == TransactionsTypes.TRANSFER.value:
+            serialized = transaction_serializer.to_transfer_dict(transaction)
+        else:
+            serialized = transaction_serializer.to_operation_dict(transaction)
+        return {'message': self.response_messages[transaction.transaction_type], 'transaction': serialized}
+
+    def batch(self, body):
+        self.__validator.validate_body(body, batch_financial_operation_schema)
+        results = [None] * len(body['operations'])
+        operations_by_account = {}
+        for index, operation in enumerate(body['operations']):
+            try:
+                self.__validator.validate_body(operation, batch_operation_schema)
+                operations_by_account.setdefault(operation['account_id'], []).append((index, operation))
+            except ValidationError as e:
+                results[index] = {'index': index, 'status': HTTPStatus.BAD_REQUEST.value, 'error': e.args[0]}
+        transactions = []
+        try:
+            accounts = self.__accounts_service.get_accounts_for_update(list(operations_by_account)) \
+                if operations_by_account else {}
+            for account_id, operations in operations_by_account.items():
+                account = accounts.get(account_id)
+                for index, operation in operations:
+                    try:
+                        if account is None:
+                            raise AccountNotFound('Account not found.')
+                        transaction = self.__apply_financial_operation(
+                            account, operation, TransactionsTypes(operation['type']), False
+                        )
+                        transactions.append(transaction)
+                        results[index] = transaction
+                    except (AccountNotFound, StatusNotAllowed, InsufficientBalance) as e:
+                        results[index] = {'index': index, 'status': e.status_code, 'error': e.args[0]}
+            if transactions:
+                self.__transactions_repository.create_transactions(transactions)
+                self.__accounts_service.invalidate_cached_accounts(*accounts)
+            else:
+                self.__accounts_service.rollback()
+        except Exception as e:
+            self.__accounts_service.rollback()
+            raise e
+        results = [
+            {'index': index, 'status': HTTPStatus.CREATED.value, 'transaction': transaction_serializer.to_operation_dict(result)}
+            if isinstance(result, TransactionModel) else result
+            for index, result in enumerate(results)
+        ]
+        return {
+            'message': 'Batch processed.',
+            'succeeded': len(transactions),
+            'failed': len(results) - len(transactions),
+            'results': results
+        }
+
+    def __apply_financial_operation(self, account, body, transaction_type, single=True):
+        """Applies the operation to the account, left to be committed with the returned transaction."""
+        if not self.__account_is_active(account):
+            raise StatusNotAllowed('Account is not active.')
+        if transaction_type == TransactionsTypes.WITHDRAW:
+            self.__account_balance_is_valid(account, body['value'])
+            value = Decimal(body['value'] * -1).quantize(CENTS)
+        else:
+            value = Decimal(body['value']).quantize(CENTS)
+        if value > 0 and account.balance_buckets and single:
+            # Single deposits to a bucketed account don't touch, nor wait for, the account row.
+            self.__accounts_service.deposit_to_bucket(account, value)
+        else:
+            self.__accounts_service.update_account(account, value, False)
+        return self.__transaction_builder.transaction_builder(body, transaction_type.value, body['account_id'])
+
+    def __account_balance_is_valid(self, account, value):
+        if value > self.__accounts_service.get_available_balance(account):
             raise InsufficientBalance("Account doesn't have enough balance to complete operation.")
 
     @staticmethod
     def __account_is_active(account):
         return account.status == Status.ACTIVE.value
 
-    def transfer(self, body):
+    def transfer(self, body, idempotency_key=None):
+        return self.__run_idempotent(self.__transfer, body, TransactionsTypes.TRANSFER, idempotency_key)
+
+    def __transfer(self, body, idempotency_key, request_hash):
         self.__validator.validate_body(body, transfer_schema)
-        origin_account = self.__accounts_service.get_account_by_id(body['original_account_id'], False)
-        destination_account = self.__accounts_service.get_account_by_id(body['destination_account_id'], False)
         transaction_value = Decimal(body['value'])
-        self.__validate_transfer_accounts(origin_account, destination_account, transaction_value)
-        self.__accounts_service.update_account(origin_account, Decimal(transaction_value * -1).quantize(Decimal('1.00')))
-        self.__accounts_service.update_account(destination_account, Decimal(transaction_value).quantize(Decimal('1.00')))
-        transaction = self.__transactions_repository.create_transaction(
-            self.__transaction_builder.transaction_builder(body, TransactionsTypes.TRANSFER.value)
-        )
-        return {
-            'message': 'Transfer completed with success.',
-            'transaction': {
-                'transaction_id': transaction.transaction_id,
-                'transaction_type': transaction.transaction_type,
-                'transaction_value': str(Decimal(transaction.transaction_value).quantize(Decimal('1.00'))),
-                'transaction_date': transaction.transaction_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                'origin_account': transaction.origin_account,
-                'destination_account': transaction.destination_account
-            }
-        }
+        try:
+            accounts = self.__accounts_service.get_accounts_for_update(
+                [body['original_account_id'], body['destination_account_id']]
+            )
+            origin_account = accounts.get(body['original_account_id'])
+            destination_account = accounts.get(body['destination_account_id'])
+            if origin_account is None or destination_account is None:
+                raise AccountNotFound('Account not found.')
+            self.__validate_transfer_accounts(origin_account, destination_account, transaction_value)
+            self.__accounts_service.update_account(origin_account, Decimal(transaction_value * -1).quantize(CENTS), False)
+            self.__accounts_service.update_account(destination_account, Decimal(transaction_value).quantize(CENTS), False)
+            response = self.__create_transaction(
+                self.__transaction_builder.transaction_builder(body, TransactionsTypes.TRANSFER.value),
+                idempotency_key, request_hash
+            )
+            self.__accounts_service.invalidate_cached_accounts(*accounts)
+        except Exception as e:
+            self.__accounts_service.rollback()
+            raise e
+        return response
 
     def __validate_transfer_accounts(self, origin_account, destination_account, value):
         if not self.__account_is_active(origin_account):
             raise StatusNotAllowed('Origin Account is not active.')
         if not self.__account_is_active(destination_account):
             raise StatusNotAllowed('Destination Account is not active.')
-        if value > origin_account.balance:
+        if value > self.__accounts_service.get_available_balance(origin_account):
             raise InsufficientBalance("Origin Account doesn't have enough balance to complete operation.")
 
-    def get_all_transactions(self, headers):
+    def get_all_transactions(self, args):
         try:
-            self.__validator.validate_params(headers, ['currentPage', 'maxItemsPerPage'])
-            params = param_utils.update_params({'currentPage': 1, 'maxItemsPerPage': 50}, headers.environ['QUERY_STRING'])
-            transactions = sorted(self.__transactions_repository.get_transactions(params), key=lambda transaction: transaction.transaction_date)
-            return {
-                'currentPage': params['currentPage'],
-                'maxItemsPerPage': params['maxItemsPerPage'],
-                'transactions': [
-                    {
-                        'transaction_id': transaction.transaction_id,
-                        'transaction_type': TransactionsTypes(transaction.transaction_type).name,
-                        'transaction_value': str(Decimal(transaction.transaction_value).quantize(Decimal('1.00'))),
-                        'transaction_date': transaction.transaction_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                        'origin_account': transaction.origin_account,
-                        'destination_account': '' if not transaction.destination_account else transaction.destination_account
-                    } for transaction in transactions
-                ]
-            }
+            params = param_utils.parse_list_params(args)
+            if params.after is not None:
+                transactions, next_cursor = self.__get_transactions_after(params.after, params.max_items_per_page)
+                result = {'maxItemsPerPage': params.max_items_per_page, 'next': next_cursor}
+            else:
+                transactions = sorted(self.__transactions_repository.get_transactions(params), key=lambda transaction: transaction.transaction_date)
+                result = {'currentPage': params.current_page, 'maxItemsPerPage': params.max_items_per_page}
+            result['transactions'] = transaction_serializer.to_list(transactions)
+            return result
         except NotFound:
             raise TransactionNotFound('No transactions found.')
 
+    def __get_transactions_after(self, after, limit):
+        cursor = cursor_utils.decode(after, (datetime.fromisoformat, uuid_utils.canonical))
+        last_transaction_date, last_transaction_id = cursor if cursor else (None, None)
+        transactions = self.__transactions_repository.get_transactions_after(last_transaction_date, last_transaction_id, limit + 1)
+        return cursor_utils.page(
+            transactions, limit,
+            lambda transaction: [transaction.transaction_date.isoformat(), transaction.transaction_id]
+        )
+
     def get_transaction_by_id(self, transaction_id):
         try:
-            transaction = self.__transactions_repository.get_transaction_by_id(transaction_id)
-            return {
-                'transaction_id': transaction.transaction_id,
-                'transaction_type': TransactionsTypes(transaction.transaction_type).name,
-                'transaction_value': str(Decimal(transaction.transaction_value).quantize(Decimal('1.00'))),
-                'transaction_date': transaction.transaction_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                'origin_account': transaction.origin_account,
-                'destination_account': '' if not transaction.destination_account else transaction.destination_account
-            }
+            transaction_uuid = uuid_utils.parse(transaction_id)
+            if transaction_uuid is None:
+                raise NoResultFound()
+            transaction = self.__transactions_repository.get_transaction_by_id(
+                str(transaction_uuid), uuid_utils.timestamp(transaction_uuid)
+            )
+            return transaction_serializer.to_dict(transaction)
         except NoResultFound:
             raise TransactionNotFound('Transaction not found.')
+
+    def get_account_statement(self, account_id, date_from=None, date_to=None):
+        self.__accounts_service.get_account_by_id(account_id, False)
+        date_from, date_to = param_utils.parse_date_range(date_from, date_to)
+        transactions = self.__transactions_repository.get_account_statement(account_id, date_from, date_to)
+        return (dumps(transaction_serializer.to_dict(transaction)) + '\n' for transaction in transactions)
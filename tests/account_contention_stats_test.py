@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from util.account_contention_stats import AccountContentionStats
+
+
+class AccountContentionStatsTest(TestCase):
+
+    def test_snapshot_listed_most_contended_accounts_first(self):
+        stats = AccountContentionStats()
+
+        stats.record(1, True)
+        stats.record(2, True)
+        stats.record(2, False)
+
+        self.assertEqual([
+            {'account_id': 2, 'conflicts': 2, 'retries': 1, 'failures': 1},
+            {'account_id': 1, 'conflicts': 1, 'retries': 1, 'failures': 0}
+        ], stats.snapshot())
+
+    def test_least_recently_contended_account_was_evicted(self):
+        stats = AccountContentionStats(maxsize=2)
+
+        stats.record(1, True)
+        stats.record(2, True)
+        stats.record(1, True)
+        stats.record(3, True)
+
+        self.assertEqual({1, 3}, {account['account_id'] for account in stats.snapshot()})
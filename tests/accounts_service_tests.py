@@ -4,12 +4,15 @@ from unittest.mock import patch
 
 from jsonschema.exceptions import ValidationError
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm.exc import StaleDataError
 
-from werkzeug.datastructures.headers import EnvironHeaders
 from werkzeug.exceptions import NotFound
 
 from builders.account_builder import AccountBuilder
-from builder import return_account_creation_body, return_active_account, \
+from util.cursor_utils import CursorUtils
+from config.cache_config import account_cache
+from util.account_contention_stats import account_contention_stats
+from builder import return_query_args, return_account_creation_body, return_active_account, \
     return_blocked_account, return_closed_account, return_list_of_accounts
 from exceptions.exceptions import HolderNotFound, AccountAlreadyExistentByHolder, StatusNotAllowed, AccountNotFound
 from services.accounts_service import AccountsService
@@ -22,6 +25,9 @@ class AccountsServiceTest(TestCase):
     default_current_page = 1
     default_max_items_per_page = 50
 
+    def setUp(self):
+        account_cache.clear()
+
     @patch('repository.accounts_repository.AccountsRepository.create_account')
     @patch('repository.accounts_repository.AccountsRepository.get_accounts_by_holder_id')
     @patch('repository.holders_repository.HoldersRepository.get_holder_by_id')
@@ -137,6 +143,25 @@ class AccountsServiceTest(TestCase):
         self.assertEqual('Account reactivated.', result['message'])
         self.assertEqual(Status.ACTIVE.name, result['account']['status'])
 
+    @patch('time.sleep')
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_account_block_retried_after_version_conflict(self,
+                                                          get_account_by_account_id_mock,
+                                                          update_account_mock,
+                                                          rollback_mock,
+                                                          sleep_mock):
+        account_contention_stats.clear()
+        get_account_by_account_id_mock.side_effect = lambda account_id: return_active_account()
+        update_account_mock.side_effect = [StaleDataError(), None]
+
+        result = self.accounts_service.block_account(1)
+
+        self.assertEqual('Account blocked.', result['message'])
+        self.assertEqual([{'account_id': 1, 'conflicts': 1, 'retries': 1, 'failures': 0}],
+                         account_contention_stats.snapshot())
+
     @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
     def test_account_change_status_raised_error_when_account_is_already_closed(self,
                                                                                get_account_by_account_id_mock):
@@ -186,6 +211,22 @@ class AccountsServiceTest(TestCase):
 
         self.assertTrue(result)
 
+    @patch('repository.accounts_repository.AccountsRepository.get_bucket_balance')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_get_account_by_id_returned_bucketed_account_total(self,
+                                                               get_account_by_account_id_mock,
+                                                               get_bucket_balance_mock):
+        account = return_active_account()
+        account.balance = Decimal('10.00')
+        account.balance_buckets = 4
+        get_account_by_account_id_mock.return_value = account
+        get_bucket_balance_mock.return_value = Decimal('32.50')
+
+        result = self.accounts_service.get_account_by_id(1)
+
+        self.assertEqual('42.50', result['balance'])
+        get_bucket_balance_mock.assert_called_once_with(1)
+
     @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
     def test_get_account_by_id_raised_not_found_error(self,
                                                       get_account_by_account_id_mock):
@@ -200,21 +241,118 @@ class AccountsServiceTest(TestCase):
     def test_get_all_accounts_returned_with_success(self,
                                                     get_accounts_mock):
         get_accounts_mock.return_value = return_list_of_accounts()
-        headers = EnvironHeaders({"QUERY_STRING": ''})
-        result = self.accounts_service.get_all_accounts(headers)
+        args = return_query_args('')
+        result = self.accounts_service.get_all_accounts(args)
 
         self.assertEqual(self.default_current_page, result['currentPage'])
         self.assertEqual(self.default_max_items_per_page, result['maxItemsPerPage'])
         self.assertEqual(2, len(result['accounts']))
 
+    @patch('repository.accounts_repository.AccountsRepository.get_bucket_balance')
+    @patch('repository.accounts_repository.AccountsRepository.get_bucket_balances')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts')
+    def test_get_all_accounts_summed_page_buckets_in_one_query(self,
+                                                                get_accounts_mock,
+                                                                get_bucket_balances_mock,
+                                                                get_bucket_balance_mock):
+        accounts = return_list_of_accounts() + return_list_of_accounts()
+        for account_id, account in enumerate(accounts, 1):
+            account.account_id = account_id
+            account.balance = Decimal('10.00')
+            account.balance_buckets = 4 if account_id % 2 else 0
+        get_accounts_mock.return_value = accounts
+        get_bucket_balances_mock.return_value = {1: Decimal('5.50')}
+
+        result = self.accounts_service.get_all_accounts(return_query_args(''))
+
+        self.assertEqual(['15.50', '10.00', '10.00', '10.00'], [account['balance'] for account in result['accounts']])
+        get_bucket_balances_mock.assert_called_once_with([1, 3])
+        get_bucket_balance_mock.assert_not_called()
+
     @patch('repository.accounts_repository.AccountsRepository.get_accounts')
     def test_get_all_accounts_raised_not_found_error(self,
                                                      get_accounts_mock):
         get_accounts_mock.side_effect = NotFound()
-        headers = EnvironHeaders({"QUERY_STRING": ''})
+        args = return_query_args('')
 
         with self.assertRaises(AccountNotFound) as exception_result:
-            self.accounts_service.get_all_accounts(headers)
+            self.accounts_service.get_all_accounts(args)
 
         self.assertEqual('No accounts found.', exception_result.exception.args[0])
 
+
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_after')
+    def test_get_all_accounts_with_cursor_returned_next_cursor(self,
+                                                                get_accounts_after_mock):
+        accounts = return_list_of_accounts()
+        third_account = self.account_builder.account_builder(3)
+        third_account.account_id = 3
+        accounts.append(third_account)
+        get_accounts_after_mock.return_value = accounts
+        args = return_query_args('after=&maxItemsPerPage=2')
+
+        result = self.accounts_service.get_all_accounts(args)
+
+        get_accounts_after_mock.assert_called_once_with(None, 3)
+        self.assertNotIn('currentPage', result)
+        self.assertEqual(2, len(result['accounts']))
+        self.assertEqual(CursorUtils.encode([2]), result['next'])
+
+        get_accounts_after_mock.reset_mock()
+        get_accounts_after_mock.return_value = [third_account]
+        args = return_query_args('after={}&maxItemsPerPage=2'.format(result['next']))
+
+        result = self.accounts_service.get_all_accounts(args)
+
+        get_accounts_after_mock.assert_called_once_with(2, 3)
+        self.assertEqual(1, len(result['accounts']))
+        self.assertIsNone(result['next'])
+
+    def test_get_all_accounts_with_cursor_raised_validation_error(self):
+        args = return_query_args('after=invalid')
+
+        with self.assertRaises(ValidationError) as exception_result:
+            self.accounts_service.get_all_accounts(args)
+
+        self.assertEqual('after value not allowed, invalid cursor.', exception_result.exception.args[0])
+
+        args = return_query_args('after=&currentPage=2')
+
+        with self.assertRaises(ValidationError) as exception_result:
+            self.accounts_service.get_all_accounts(args)
+
+        self.assertEqual('currentPage and after can not be used together.', exception_result.exception.args[0])
+
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_get_account_by_id_was_served_from_cache(self,
+                                                     get_account_by_account_id_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+
+        first_result = self.accounts_service.get_account_by_id(1)
+        second_result = self.accounts_service.get_account_by_id(1)
+
+        get_account_by_account_id_mock.assert_called_once_with(1)
+        self.assertEqual(first_result, second_result)
+
+        self.accounts_service.get_account_by_id(1, False)
+
+        self.assertEqual(2, get_account_by_account_id_mock.call_count)
+
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_account_changes_refreshed_cached_account(self,
+                                                      get_account_by_account_id_mock,
+                                                      update_account_mock):
+        account = return_active_account()
+        get_account_by_account_id_mock.return_value = account
+        self.accounts_service.get_account_by_id(1)
+
+        self.accounts_service.block_account(1)
+
+        self.assertEqual(Status.BLOCKED.name, self.accounts_service.get_account_by_id(1)['status'])
+
+        self.accounts_service.update_account(account, Decimal('10.00'))
+        get_account_by_account_id_mock.reset_mock()
+
+        self.assertEqual('10.00', self.accounts_service.get_account_by_id(1)['balance'])
+        get_account_by_account_id_mock.assert_called_once_with(1)
@@ -0,0 +1,146 @@
+import asyncio
+import csv
+import io
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy.exc import NoResultFound
+from starlette.testclient import TestClient
+
+from asgi_app import app, holders_import_service
+from builder import return_active_account, return_financial_operation, return_financial_operation_body
+from config.cache_config import account_cache
+from util.enums.transactions_types import TransactionsTypes
+
+
+class AsgiAppTest(TestCase):
+    client = TestClient(app)
+
+    def setUp(self):
+        account_cache.clear()
+
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_get_account_by_id_returned_same_payload_as_wsgi(self,
+                                                             get_account_by_account_id_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+
+        response = self.client.get('/v1/account/1')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'account_id': 1, 'holder_id': 1, 'balance': '0.00', 'status': 'ACTIVE'}, response.json())
+
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_get_account_by_id_returned_not_found(self,
+                                                  get_account_by_account_id_mock):
+        get_account_by_account_id_mock.side_effect = NoResultFound()
+
+        response = self.client.get('/v1/account/1')
+
+        self.assertEqual(404, response.status_code)
+        self.assertEqual({'error': 'Account not found.'}, response.json())
+
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_deposit_made_successfully(self,
+                                       get_account_by_account_id_mock,
+                                       update_account_mock,
+                                       create_transaction_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+
+        response = self.client.post('/v1/transactions/deposit', json=return_financial_operation_body())
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('Deposit made successfully!', response.json()['message'])
+
+    def test_deposit_returned_validation_error(self):
+        body = return_financial_operation_body()
+        body['value'] = 0
+
+        response = self.client.post('/v1/transactions/deposit', json=body)
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'error': '0 is less than the minimum of 0.01'}, response.json())
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_account_statement')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_account_statement_streamed_ndjson(self,
+                                               get_account_by_account_id_mock,
+                                               get_account_statement_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+        get_account_statement_mock.return_value = iter([return_financial_operation(TransactionsTypes.DEPOSIT.value),
+                                                        return_financial_operation(TransactionsTypes.WITHDRAW.value)])
+
+        response = self.client.get('/v1/account/1/statement?from=2024-01-01')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/x-ndjson', response.headers['content-type'])
+        self.assertEqual(['DEPOSIT', 'WITHDRAW'],
+                         [json.loads(line)['transaction_type'] for line in response.text.splitlines()])
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_account_statement')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_account_statement_returned_errors_before_streaming(self,
+                                                                get_account_by_account_id_mock,
+                                                                get_account_statement_mock):
+        get_account_by_account_id_mock.side_effect = NoResultFound()
+
+        response = self.client.get('/v1/account/1/statement')
+
+        self.assertEqual(404, response.status_code)
+        self.assertEqual({'error': 'Account not found.'}, response.json())
+        get_account_statement_mock.assert_not_called()
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_transaction_columns')
+    def test_transactions_export_streamed_csv(self,
+                                              get_transaction_columns_mock):
+        transaction = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+        get_transaction_columns_mock.return_value = iter([[
+            [transaction.transaction_id], [transaction.transaction_type], [transaction.transaction_value],
+            [transaction.transaction_date], [transaction.origin_account], [transaction.destination_account]
+        ]])
+
+        response = self.client.get('/v1/transactions/export?format=csv')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('attachment; filename=transactions.csv', response.headers['content-disposition'])
+        self.assertEqual([transaction.transaction_id],
+                         [row['transaction_id'] for row in csv.DictReader(io.StringIO(response.text))])
+
+    def test_transactions_export_returned_validation_error(self):
+        response = self.client.get('/v1/transactions/export?format=xml')
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'error': 'format value not allowed, must be csv or parquet.'}, response.json())
+
+    @patch('repository.import_repository.ImportRepository.load_holders')
+    @patch('repository.holders_repository.HoldersRepository.get_existing_documents')
+    def test_holders_import_loaded_rows_while_receiving_upload(self,
+                                                               get_existing_documents_mock,
+                                                               load_holders_mock):
+        get_existing_documents_mock.return_value = set()
+        load_holders_mock.return_value = set()
+        # The rows are split across chunks; TestClient would send the whole body at once.
+        chunks = [b'name,document\nFirst Holder,1234', b'5678901\nSecond Holder,12345678902\n',
+                  b'Third Holder,12345678903\n']
+        loads_before_chunk = []
+        sent = []
+
+        async def receive():
+            loads_before_chunk.append(load_holders_mock.call_count)
+            body = chunks.pop(0)
+            return {'type': 'http.request', 'body': body, 'more_body': bool(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/v1/holder/import', 'query_string': b'',
+                 'headers': [(b'content-type', b'text/csv')]}
+        with patch.object(holders_import_service, 'chunk_size', 1):
+            asyncio.run(app(scope, receive, send))
+
+        self.assertEqual(200, sent[0]['status'])
+        self.assertEqual({'imported': 3, 'rejected': 0, 'rejects': []}, json.loads(sent[1]['body']))
+        self.assertEqual([0, 0, 2], loads_before_chunk)
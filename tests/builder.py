@@ -1,3 +1,7 @@
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import MultiDict
+
 from builders.holder_builder import HolderBuilder
 from builders.account_builder import AccountBuilder
 from builders.transaction_builder import TransactionBuilder
@@ -129,3 +133,6 @@ def return_list_of_transactions():
 
     return transactions_list
 
+
+def return_query_args(query_string=''):
+    return MultiDict(parse_qsl(query_string, keep_blank_values=True))
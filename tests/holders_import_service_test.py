@@ -0,0 +1,63 @@
+import io
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from jsonschema.exceptions import ValidationError
+
+from services.holders_import_service import HoldersImportService
+
+
+class HoldersImportServiceTest(TestCase):
+    holders_import_service = HoldersImportService()
+
+    @patch('repository.import_repository.ImportRepository.load_holders')
+    @patch('repository.holders_repository.HoldersRepository.get_existing_documents')
+    def test_ndjson_import_reported_rejected_lines(self,
+                                                   get_existing_documents_mock,
+                                                   load_holders_mock):
+        get_existing_documents_mock.return_value = {'12345678902'}
+        load_holders_mock.return_value = set()
+        lines = io.StringIO(
+            '{"name": "First Holder", "document": "12345678901", "balance": 10.5}\n'
+            '{"name": "Existing Holder", "document": "12345678902"}\n'
+            '\n'
+            'not json\n'
+            '{"name": "Repeated Holder", "document": "12345678901"}\n'
+            '{"name": "Negative Holder", "document": "12345678903", "balance": -1}\n'
+        )
+
+        report = self.holders_import_service.import_holders(lines, 'ndjson')
+
+        self.assertEqual(1, report['imported'])
+        self.assertEqual([
+            {'line': 2, 'error': 'Document already exists.'},
+            {'line': 4, 'error': 'Invalid JSON.'},
+            {'line': 5, 'error': 'Document is repeated in the file.'},
+            {'line': 6, 'error': '-1 is less than the minimum of 0'}
+        ], report['rejects'])
+        line, name, document, balance, transaction_id = load_holders_mock.call_args.args[0][0]
+        self.assertEqual((1, 'First Holder', '12345678901', Decimal('10.50')), (line, name, document, balance))
+        self.assertIsNotNone(transaction_id)
+
+    @patch('repository.import_repository.ImportRepository.load_holders')
+    @patch('repository.holders_repository.HoldersRepository.get_existing_documents')
+    def test_csv_import_loaded_in_chunks(self,
+                                         get_existing_documents_mock,
+                                         load_holders_mock):
+        get_existing_documents_mock.return_value = set()
+        load_holders_mock.side_effect = [set(), {'12345678903'}, set()]
+        lines = io.StringIO('name,document\n' + ''.join(f'Holder {index},1234567890{index}\n' for index in range(5)))
+
+        report = HoldersImportService(chunk_size=2).import_holders(lines, 'csv')
+
+        self.assertEqual(3, load_holders_mock.call_count)
+        self.assertEqual(4, report['imported'])
+        self.assertEqual([{'line': 5, 'error': 'Document already exists.'}], report['rejects'])
+        self.assertIsNone(load_holders_mock.call_args_list[0].args[0][0][4])
+
+    def test_import_raised_validation_error_for_unknown_format(self):
+        with self.assertRaises(ValidationError) as exception_result:
+            self.holders_import_service.import_holders(io.StringIO(''), 'xml')
+
+        self.assertEqual('format value not allowed, must be csv or ndjson.', exception_result.exception.args[0])
@@ -3,11 +3,10 @@ from unittest.mock import patch
 
 from jsonschema.exceptions import ValidationError
 from sqlalchemy.exc import NoResultFound
-from werkzeug.datastructures.headers import EnvironHeaders
 from werkzeug.exceptions import NotFound
 
 from exceptions.exceptions import DocumentAlreadyExists, HolderNotFound
-from tests.builder import return_holder_creation_body, return_holder_update_body, return_list_of_holders, return_holder
+from tests.builder import return_query_args, return_holder_creation_body, return_holder_update_body, return_list_of_holders, return_holder
 from services.holders_service import HoldersService
 from builders.holder_builder import HolderBuilder
 
@@ -19,12 +18,9 @@ class HoldersServiceTest(TestCase):
     default_max_items_per_page = 50
 
     @patch('repository.holders_repository.HoldersRepository.create_holder')
-    @patch('repository.holders_repository.HoldersRepository.get_holder_by_document')
     def test_holder_was_created_with_success(self,
-                                             get_holder_by_document_mock,
                                              create_holder_mock):
         body = return_holder_creation_body()
-        get_holder_by_document_mock.return_value = False
         create_holder_mock.return_value = self.holder_builder.holder_builder(body)
 
         result = self.holders_service.create_holder(body)
@@ -50,10 +46,10 @@ class HoldersServiceTest(TestCase):
 
         self.assertEqual(f"'{long_document}' is too long", exception_result.exception.args[0])
 
-    @patch('repository.holders_repository.HoldersRepository.get_holder_by_document')
+    @patch('repository.holders_repository.HoldersRepository.create_holder')
     def test_holder_creation_returned_error_by_document_already_existing_on_database(self,
-                                                                                     get_holder_by_document_mock):
-        get_holder_by_document_mock.return_value = True
+                                                                                     create_holder_mock):
+        create_holder_mock.return_value = None
 
         with self.assertRaises(DocumentAlreadyExists) as exception_result:
             self.holders_service.create_holder(return_holder_creation_body())
@@ -90,8 +86,8 @@ class HoldersServiceTest(TestCase):
     def test_get_all_holders_returned_result_successfully_without_pagination_params(self,
                                                                                     get_holders_mock):
         get_holders_mock.return_value = return_list_of_holders()
-        headers = EnvironHeaders({"QUERY_STRING": ''})
-        result = self.holders_service.get_all_holders(headers)
+        args = return_query_args('')
+        result = self.holders_service.get_all_holders(args)
 
         self.assertEqual(self.default_current_page, result['currentPage'])
         self.assertEqual(self.default_max_items_per_page, result['maxItemsPerPage'])
@@ -101,10 +97,10 @@ class HoldersServiceTest(TestCase):
     def test_exception_is_raised_when_no_holder_is_found(self,
                                                          get_holders_mock):
         get_holders_mock.side_effect = NotFound()
-        headers = EnvironHeaders({"QUERY_STRING": ''})
+        args = return_query_args('')
 
         with self.assertRaises(HolderNotFound) as exception_result:
-            self.holders_service.get_all_holders(headers)
+            self.holders_service.get_all_holders(args)
 
         self.assertEqual('No holders found.', exception_result.exception.args[0])
 
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from sqlalchemy.util import greenlet_spawn
+
+from repository.import_repository import ImportRepository
+
+
+class AsyncpgAdaptedConnection:
+    """Stands in for SQLAlchemy's asyncpg adapter: its cursor has no COPY, its driver_connection has."""
+
+    def __init__(self):
+        self.driver_connection = MagicMock()
+        self.driver_connection.copy_records_to_table = AsyncMock()
+
+    def cursor(self):
+        return object()
+
+
+class ImportRepositoryTest(TestCase):
+    import_repository = ImportRepository()
+
+    @patch('repository.import_repository.session')
+    def test_load_holders_copied_records_through_asyncpg(self, session_mock):
+        dbapi_connection = AsyncpgAdaptedConnection()
+        connection = session_mock.connection.return_value
+        connection.dialect.name = 'postgresql'
+        connection.dialect.driver = 'asyncpg'
+        connection.connection.dbapi_connection = dbapi_connection
+        session_mock.scalars.return_value = ['12345678901']
+        rows = [(1, 'First Holder', '12345678901', Decimal('10.50'), '0190a1b2-0000-7000-8000-000000000001')]
+
+        # The ASGI app runs the repositories inside greenlet_spawn, where await_only can reach the event loop.
+        skipped = asyncio.run(greenlet_spawn(self.import_repository.load_holders, rows, datetime(2024, 1, 1)))
+
+        self.assertEqual(set(), skipped)
+        dbapi_connection.driver_connection.copy_records_to_table.assert_awaited_once_with(
+            'holders_import', records=rows, columns=['line', 'name', 'document', 'balance', 'transaction_id'])
+        session_mock.commit.assert_called_once()
+        session_mock.rollback.assert_not_called()
@@ -0,0 +1,61 @@
+import logging
+import queue
+import threading
+from unittest import TestCase
+
+from util.log_config import SamplingFilter, TracingHandler, add_tracing_info, clear_tracing_info
+
+
+def record(level, msg='message'):
+    return logging.LogRecord('bank-account-python', level, __file__, 1, msg, None, None)
+
+
+class LogConfigTest(TestCase):
+
+    def test_info_records_sampled_above_rate_and_errors_kept(self):
+        sampling_filter = SamplingFilter(2, 0.0, clock=lambda: 100.0, rand=lambda: 0.5)
+
+        kept = [sampling_filter.filter(record(logging.INFO)) for _ in range(5)]
+
+        self.assertEqual([True, True, False, False, False], kept)
+        self.assertTrue(sampling_filter.filter(record(logging.ERROR)))
+        self.assertEqual(3, sampling_filter.sampled_out)
+
+    def test_sampling_budget_reset_every_second(self):
+        now = [100.0]
+        sampling_filter = SamplingFilter(1, 0.0, clock=lambda: now[0])
+
+        self.assertTrue(sampling_filter.filter(record(logging.INFO)))
+        self.assertFalse(sampling_filter.filter(record(logging.INFO)))
+
+        now[0] = 101.0
+
+        self.assertTrue(sampling_filter.filter(record(logging.INFO)))
+
+    def test_full_queue_dropped_info_records(self):
+        handler = TracingHandler(queue.Queue(1))
+
+        handler.handle(record(logging.INFO, {'message': 'first'}))
+        handler.handle(record(logging.INFO, {'message': 'second'}))
+
+        self.assertEqual(1, handler.dropped)
+        self.assertEqual({'message': 'first'}, handler.queue.get_nowait().msg)
+
+    def test_tracing_info_was_kept_per_thread(self):
+        handler = TracingHandler(queue.Queue())
+        add_tracing_info({'request_id': 'main'})
+
+        def other_request():
+            add_tracing_info({'request_id': 'other'})
+            handler.handle(record(logging.INFO))
+
+        thread = threading.Thread(target=other_request)
+        thread.start()
+        thread.join()
+        handler.handle(record(logging.INFO))
+        clear_tracing_info()
+        handler.handle(record(logging.INFO))
+
+        self.assertEqual('other', handler.queue.get_nowait().request_id)
+        self.assertEqual('main', handler.queue.get_nowait().request_id)
+        self.assertFalse(hasattr(handler.queue.get_nowait(), 'request_id'))
@@ -0,0 +1,75 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+
+from app import app
+from builder import return_active_account
+from config.cache_config import account_cache
+from repository.accounts_repository import AccountsRepository
+from util.metrics import Histogram, metrics, timed_repository
+
+
+class MetricsTest(TestCase):
+    client = app.test_client()
+
+    def setUp(self):
+        account_cache.clear()
+
+    def test_histogram_exposed_cumulative_buckets(self):
+        histogram = Histogram('test_seconds', 'Test.', ('route',), buckets=(0.1, 1.0))
+
+        histogram.observe(0.05, '/a')
+        histogram.observe(0.5, '/a')
+        histogram.observe(5, '/a')
+
+        self.assertEqual([
+            '# HELP test_seconds Test.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{route="/a",le="0.1"} 1',
+            'test_seconds_bucket{route="/a",le="1.0"} 2',
+            'test_seconds_bucket{route="/a",le="+Inf"} 3',
+            'test_seconds_sum{route="/a"} 5.55',
+            'test_seconds_count{route="/a"} 3'
+        ], histogram.expose())
+
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_requests_were_exposed_at_metrics(self,
+                                              get_account_by_account_id_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+        route = '/v1/account/<int:account_id>'
+        before = metrics.requests.value('GET', route, 200)
+
+        self.client.get('/v1/account/1')
+        response = self.client.get('/metrics')
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertEqual(before + 1, metrics.requests.value('GET', route, 200))
+        self.assertIn(f'http_requests_total{{method="GET",route="{route}",status="200"}}', response.get_data(as_text=True))
+        self.assertIn(f'http_request_duration_seconds_count{{method="GET",route="{route}"}}', response.get_data(as_text=True))
+
+    def test_statements_were_counted_per_request(self):
+        engine = create_engine('sqlite://')
+        before = metrics.request_statements.count('GET', '/test')
+
+        started = metrics.start_request()
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT 2'))
+        metrics.end_request(started, 'GET', '/test', 200)
+
+        self.assertEqual(2, started[1][0])
+        self.assertEqual(before + 1, metrics.request_statements.count('GET', '/test'))
+
+    def test_repository_methods_were_timed(self):
+        @timed_repository
+        class FakeRepository:
+            def get_fake(self):
+                return 'fake'
+
+        before = metrics.repository_duration.count('FakeRepository', 'get_fake')
+
+        self.assertEqual('fake', FakeRepository().get_fake())
+        self.assertEqual(before + 1, metrics.repository_duration.count('FakeRepository', 'get_fake'))
+        self.assertTrue(hasattr(AccountsRepository.get_account_by_account_id, '__wrapped__'))
@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from scripts.migrate import SCRIPTS_FOLDER, split_statements
+
+
+class MigrateTest(TestCase):
+
+    def test_split_statements_ignored_semicolon_in_comment(self):
+        sql = "-- Bumped by every update; updates compare it.\nALTER TABLE a ADD COLUMN v integer;\nSELECT 1;\n"
+
+        self.assertEqual(['ALTER TABLE a ADD COLUMN v integer', 'SELECT 1'], split_statements(sql))
+
+    def test_split_statements_kept_quoted_strings_and_function_bodies(self):
+        sql = "SELECT ';' AS a; -- done\nCREATE FUNCTION f() RETURNS void AS $$\nBEGIN\n    PERFORM 1;\nEND;\n$$ LANGUAGE plpgsql;"
+
+        self.assertEqual(["SELECT ';' AS a",
+                          'CREATE FUNCTION f() RETURNS void AS $$\nBEGIN\n    PERFORM 1;\nEND;\n$$ LANGUAGE plpgsql'],
+                         split_statements(sql))
+
+    def test_split_statements_left_no_comment_only_statement(self):
+        for path in sorted(SCRIPTS_FOLDER.glob('*.sql')):
+            with self.subTest(script=path.name):
+                for statement in split_statements(path.read_text()):
+                    self.assertFalse(statement.startswith('--'))
+                    self.assertRegex(statement, r'^[A-Z(]')
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from jsonschema.exceptions import ValidationError
+
+from builder import return_query_args
+from util.params_utils import ParamsUtils
+
+
+class ParamsUtilsTest(TestCase):
+
+    def test_parse_list_params_returned_defaults(self):
+        params = ParamsUtils.parse_list_params(return_query_args())
+
+        self.assertEqual((1, 50, None, 0), (params.current_page, params.max_items_per_page, params.after, params.offset))
+
+    def test_parse_list_params_returned_typed_values(self):
+        params = ParamsUtils.parse_list_params(return_query_args('currentPage=3&maxItemsPerPage=10'))
+
+        self.assertEqual((3, 10, 20), (params.current_page, params.max_items_per_page, params.offset))
+
+        params = ParamsUtils.parse_list_params(return_query_args('after=&maxItemsPerPage=10'))
+
+        self.assertEqual('', params.after)
+
+    def test_parse_list_params_raised_validation_error(self):
+        cases = {
+            'sort=name': 'Filter not allowed.',
+            'currentPage=0': 'currentPage value not allowed, must be greater than or equal 1.',
+            'currentPage=abc': 'currentPage value not allowed, must be greater than or equal 1.',
+            'currentPage': 'currentPage value not allowed, must be greater than or equal 1.',
+            'maxItemsPerPage=51': 'maxItemsPerPage value not allowed, must be greater than 0 and less or equal 50.',
+            'maxItemsPerPage=1.5': 'maxItemsPerPage value not allowed, must be greater than 0 and less or equal 50.',
+            'after=abc&currentPage=2': 'currentPage and after can not be used together.'
+        }
+        for query_string, message in cases.items():
+            with self.subTest(query_string=query_string):
+                with self.assertRaises(ValidationError) as exception_result:
+                    ParamsUtils.parse_list_params(return_query_args(query_string))
+
+                self.assertEqual(message, exception_result.exception.args[0])
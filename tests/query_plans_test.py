@@ -0,0 +1,83 @@
+import json
+import os
+from datetime import datetime
+from unittest import TestCase, skipUnless
+
+from sqlalchemy import create_engine
+
+from repository.accounts_repository import AccountsRepository
+from repository.transactions_repository import TransactionsRepository
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+@skipUnless(TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set to a migrated Postgres database.')
+class QueryPlansTest(TestCase):
+    """Checks with EXPLAIN that the repository queries can be answered by the indexes in scripts/."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine(TEST_DATABASE_URL)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+
+    def explain(self, stmt):
+        sql = str(stmt.compile(dialect=self.engine.dialect, compile_kwargs={'literal_binds': True}))
+        with self.engine.connect() as connection:
+            # Small test tables would otherwise always be read sequentially.
+            connection.exec_driver_sql('SET enable_seqscan = off')
+            # A month of transactions between many accounts, rolled back with the connection, so the planner
+            # sees statistics where one account is a small share of a date range.
+            connection.exec_driver_sql(
+                "INSERT INTO accounts.transactions SELECT gen_random_uuid(), 'TRANSFER', 1, "
+                "timestamp '2024-01-01' + i * interval '2 minutes', mod(i, 1000) + 1, mod(i + 1, 1000) + 1 "
+                "FROM generate_series(1, 20000) AS i"
+            )
+            connection.exec_driver_sql('ANALYZE accounts.transactions')
+            plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql).scalar()
+        return json.loads(plan) if isinstance(plan, str) else plan
+
+    @staticmethod
+    def plan_values(plan, key):
+        values = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if key in node:
+                values.add(node[key])
+            nodes.extend(node.get('Plans', []))
+        return values
+
+    def uses_index(self, plan, index_name):
+        # Monthly partitions get their own copy of each index, named <partition>_<columns>_idx.
+        columns = index_name[len('transactions_'):] if index_name.startswith('transactions_') else index_name
+        return any(name == index_name or name.endswith('_' + columns) for name in self.plan_values(plan, 'Index Name'))
+
+    def test_accounts_by_holder_used_holder_id_index(self):
+        plan = self.explain(AccountsRepository.select_by_holder_id.params(holder_id=1))
+
+        self.assertTrue(self.uses_index(plan, 'accounts_holder_id_idx'))
+
+    def test_account_statement_used_origin_and_destination_indexes(self):
+        plan = self.explain(TransactionsRepository.account_statement_query(1, datetime(2024, 1, 1), datetime(2024, 2, 1)))
+
+        self.assertTrue(self.uses_index(plan, 'transactions_origin_account_transaction_date_idx'))
+        self.assertTrue(self.uses_index(plan, 'transactions_destination_account_transaction_date_idx'))
+
+    def test_transactions_after_cursor_used_date_index(self):
+        plan = self.explain(TransactionsRepository.transactions_after_query(datetime(2024, 1, 1), '01a14e98-1063-719e-b5e4-02dd84dfd9cb', 50))
+
+        self.assertTrue(self.uses_index(plan, 'transactions_transaction_date_transaction_id_idx'))
+
+    def test_account_statement_pruned_other_months(self):
+        plan = self.explain(TransactionsRepository.account_statement_query(1, datetime(2024, 1, 1), datetime(2024, 2, 1)))
+
+        self.assertTrue(self.plan_values(plan, 'Relation Name').issubset({'transactions_y2024m01', 'transactions_default'}))
+
+    def test_account_analytics_used_origin_and_destination_indexes(self):
+        plan = self.explain(TransactionsRepository.account_analytics_query([1, 2], datetime(2024, 1, 1), datetime(2024, 2, 1), 'day'))
+
+        self.assertTrue(self.uses_index(plan, 'transactions_origin_account_transaction_date_idx'))
+        self.assertTrue(self.uses_index(plan, 'transactions_destination_account_transaction_date_idx'))
@@ -0,0 +1,54 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+
+from tests.builder import return_transfer_operation, return_active_account, return_holder
+from util.serializers import AccountSerializer, HolderSerializer, TransactionSerializer, dumps
+
+
+class SerializersTest(TestCase):
+
+    def test_transaction_serialized_like_previous_response(self):
+        transaction = return_transfer_operation()
+        transaction.transaction_value = 100
+        transaction.transaction_date = datetime(2024, 6, 24, 12, 20, 46, 123456)
+
+        result = TransactionSerializer.to_dict(transaction)
+
+        self.assertEqual({
+            'transaction_id': transaction.transaction_id,
+            'transaction_type': 'TRANSFER',
+            'transaction_value': '100.00',
+            'transaction_date': '2024-06-24T12:20:46',
+            'origin_account': 1,
+            'destination_account': 2
+        }, result)
+
+    def test_operation_without_destination_serialized_empty_destination(self):
+        transaction = return_transfer_operation()
+        transaction.destination_account = None
+        transaction.transaction_value = Decimal('5.5')
+
+        result = TransactionSerializer.to_dict(transaction)
+
+        self.assertEqual('', result['destination_account'])
+        self.assertEqual('5.50', result['transaction_value'])
+
+    def test_account_and_holder_serialized(self):
+        account = return_active_account()
+        holder = return_holder()
+
+        self.assertEqual({
+            'account_id': account.account_id,
+            'holder_id': account.holder_id,
+            'balance': str(account.balance),
+            'status': 'ACTIVE'
+        }, AccountSerializer.to_dict(account))
+        self.assertEqual({'holder_id': holder.holder_id, 'name': holder.name, 'document': holder.document},
+                         HolderSerializer.to_dict(holder))
+
+    def test_dumps_returned_json_text(self):
+        data = {'transactions': [{'transaction_value': '1.00', 'origin_account': 1}], 'next': None}
+
+        self.assertEqual(data, json.loads(dumps(data)))
@@ -0,0 +1,311 @@
+import asyncio
+import csv
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase, skipUnless
+
+from sqlalchemy import select, func
+
+from config.async_db_config import AsyncSession, create_async_db_engine, stream_in_session, async_engine
+from config.cache_config import account_cache, idempotency_cache
+from config.db_config import Session, session, engine, create_db_engine, create_tables
+from exceptions.exceptions import DocumentAlreadyExists, InsufficientBalance
+from models.AccountModel import AccountModel
+from models.TransactionModel import TransactionModel
+from services.accounts_service import AccountsService
+from services.holders_service import HoldersService
+from services.holders_import_service import HoldersImportService
+from services.transactions_service import TransactionsService
+from services.transactions_export_service import TransactionsExportService, pyarrow
+from services.transactions_analytics_service import TransactionsAnalyticsService
+from builder import return_query_args
+from util.uuid_utils import UuidUtils
+
+
+class SqliteBackendTest(TestCase):
+    """Runs the services end to end on a SQLite file database instead of Postgres."""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine('sqlite:///' + os.path.join(self.folder.name, 'bank-account.db'))
+        create_tables(self.engine)
+        session.remove()
+        Session.configure(bind=self.engine)
+        account_cache.clear()
+        idempotency_cache.clear()
+        self.holders_service = HoldersService()
+        self.accounts_service = AccountsService()
+        self.transactions_service = TransactionsService()
+
+    def tearDown(self):
+        session.remove()
+        Session.configure(bind=engine)
+        self.engine.dispose()
+        self.folder.cleanup()
+
+    def create_account(self, document, value):
+        holder = self.holders_service.create_holder({'name': 'Holder', 'document': document})['holder']
+        account = self.accounts_service.create_account({'holder_id': holder['holder_id']})['account']
+        self.transactions_service.deposit({'account_id': account['account_id'], 'value': value})
+        return account['account_id']
+
+    def test_async_engine_used_sqlite_listeners(self):
+        async_engine = create_async_db_engine(str(self.engine.url))
+
+        async def settings():
+            try:
+                async with async_engine.begin() as connection:
+                    journal_mode = (await connection.exec_driver_sql('PRAGMA journal_mode')).scalar()
+                    # BEGIN IMMEDIATE already holds the write lock, so a second writer can't start.
+                    other = sqlite3.connect(self.engine.url.database, timeout=0, isolation_level=None)
+                    try:
+                        other.execute('BEGIN IMMEDIATE')
+                        locked = False
+                    except sqlite3.OperationalError:
+                        locked = True
+                    finally:
+                        other.close()
+                    return journal_mode, locked
+            finally:
+                await async_engine.dispose()
+
+        self.assertEqual(('wal', True), asyncio.run(settings()))
+
+    def test_stream_in_session_read_statement_in_batches(self):
+        transaction_ids = self.create_transactions(5)
+        account_id = self.transactions_service.get_transaction_by_id(transaction_ids[0])['origin_account']
+        # Every SQLite transaction holds the write lock, so the sync one has to end first.
+        session.remove()
+        async_engine_on_file = create_async_db_engine(str(self.engine.url))
+        AsyncSession.configure(bind=async_engine_on_file)
+
+        async def statement():
+            try:
+                lines = await stream_in_session(self.transactions_service.get_account_statement, account_id,
+                                                batch_size=2)
+                return [line async for line in lines]
+            finally:
+                await async_engine_on_file.dispose()
+
+        try:
+            lines = asyncio.run(statement())
+        finally:
+            AsyncSession.configure(bind=async_engine)
+        self.assertEqual(list(self.transactions_service.get_account_statement(account_id)), lines)
+        self.assertEqual(4, len(lines))
+
+    def test_services_ran_on_sqlite(self):
+        account_id = self.create_account('12345678901', 100.00)
+
+        with self.assertRaises(DocumentAlreadyExists):
+            self.holders_service.create_holder({'name': 'Holder', 'document': '12345678901'})
+        transactions = self.transactions_service.get_all_transactions(return_query_args('after='))['transactions']
+
+        self.assertEqual('100.00', self.accounts_service.get_account_by_id(account_id)['balance'])
+        self.assertEqual(2, self.accounts_service.get_account_by_id(account_id, False).version)
+        self.assertEqual(1, len(transactions))
+        self.assertEqual(transactions[0], self.transactions_service.get_transaction_by_id(transactions[0]['transaction_id']))
+
+    def test_transactions_after_cursor_paged_without_repeating_rows(self):
+        account_id = self.create_account('12345678901', 100.00)
+        for _ in range(4):
+            self.transactions_service.withdraw({'account_id': account_id, 'value': 1.00})
+        transaction_ids = [transaction['transaction_id'] for transaction in
+                           self.transactions_service.get_all_transactions(return_query_args('after='))['transactions']]
+
+        paged_ids, after = [], ''
+        while after is not None:
+            page = self.transactions_service.get_all_transactions(
+                return_query_args(f'after={after}&maxItemsPerPage=2'))
+            paged_ids.extend(transaction['transaction_id'] for transaction in page['transactions'])
+            after = page['next']
+
+        self.assertEqual(5, len(transaction_ids))
+        self.assertEqual(transaction_ids, paged_ids)
+
+    def test_concurrent_transfers_kept_total_balance(self):
+        first_account_id = self.create_account('12345678901', 1000.00)
+        second_account_id = self.create_account('12345678902', 1000.00)
+        session.remove()
+
+        def transfer(origin, destination):
+            try:
+                for _ in range(10):
+                    self.transactions_service.transfer(
+                        {'original_account_id': origin, 'destination_account_id': destination, 'value': 1.00}
+                    )
+            finally:
+                session.remove()
+
+        threads = [threading.Thread(target=transfer, args=accounts) for accounts in
+                   [(first_account_id, second_account_id), (second_account_id, first_account_id)] * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        account_cache.clear()
+
+        balances = [Decimal(self.accounts_service.get_account_by_id(account_id)['balance'])
+                    for account_id in (first_account_id, second_account_id)]
+        self.assertEqual([Decimal('1000.00'), Decimal('1000.00')], balances)
+        self.assertEqual(82, session.scalar(select(func.count()).select_from(TransactionModel)))
+
+    def test_bucketed_account_summed_its_buckets(self):
+        account_id = self.create_account('12345678901', 10.00)
+        self.accounts_service.set_balance_buckets(account_id, 4)
+        session.remove()
+
+        def deposit():
+            try:
+                for _ in range(10):
+                    self.transactions_service.deposit({'account_id': account_id, 'value': 1.00})
+            finally:
+                session.remove()
+
+        threads = [threading.Thread(target=deposit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual('50.00', self.accounts_service.get_account_by_id(account_id)['balance'])
+        self.assertEqual(['50.00'], [account['balance'] for account in
+                                     self.accounts_service.get_all_accounts(return_query_args(''))['accounts']])
+        self.transactions_service.withdraw({'account_id': account_id, 'value': 45.00})
+        with self.assertRaises(InsufficientBalance):
+            self.transactions_service.withdraw({'account_id': account_id, 'value': 6.00})
+        self.assertEqual('5.00', self.accounts_service.get_account_by_id(account_id)['balance'])
+
+        account = self.accounts_service.set_balance_buckets(account_id, 0)
+        self.assertEqual((Decimal('5.00'), 0), (account.balance, account.balance_buckets))
+
+    def test_transfer_retried_with_idempotency_key_was_applied_once(self):
+        first_account_id = self.create_account('12345678901', 100.00)
+        second_account_id = self.create_account('12345678902', 100.00)
+        body = {'original_account_id': first_account_id, 'destination_account_id': second_account_id, 'value': 10.00}
+
+        first = self.transactions_service.transfer(body, 'transfer-key')
+        idempotency_cache.clear()
+        retry = self.transactions_service.transfer(dict(body), 'transfer-key')
+
+        self.assertEqual(first, retry)
+        self.assertEqual('90.00', self.accounts_service.get_account_by_id(first_account_id)['balance'])
+        self.assertEqual(3, session.scalar(select(func.count()).select_from(TransactionModel)))
+
+    def test_holders_import_loaded_accounts_and_opening_balances(self):
+        self.create_account('12345678901', 10.00)
+        lines = io.StringIO(
+            'name,document,balance\n'
+            'First Holder,12345678902,150.50\n'
+            'Second Holder,12345678903,\n'
+            'Existing Holder,12345678901,1\n'
+            'Short,123,\n'
+            'Third Holder,12345678904,20\n'
+        )
+
+        report = HoldersImportService(chunk_size=2).import_holders(lines, 'csv')
+
+        self.assertEqual((3, 2), (report['imported'], report['rejected']))
+        self.assertEqual([4, 5], [reject['line'] for reject in report['rejects']])
+        balances = dict(session.execute(
+            select(AccountModel.holder_id, AccountModel.balance).where(AccountModel.holder_id > 1)
+        ).all())
+        self.assertEqual([Decimal('150.50'), Decimal('0.00'), Decimal('20.00')], [balances[2], balances[3], balances[4]])
+        self.assertEqual(3, session.scalar(select(func.count()).select_from(TransactionModel)))
+        account_id = session.scalar(select(AccountModel.account_id).where(AccountModel.holder_id == 2))
+        self.transactions_service.withdraw({'account_id': account_id, 'value': 150.50})
+        self.assertEqual('0.00', self.accounts_service.get_account_by_id(account_id)['balance'])
+
+    def create_transactions(self, count):
+        first_account_id = self.create_account('12345678901', 1000.00)
+        second_account_id = self.create_account('12345678902', 1000.00)
+        for _ in range(count - 2):
+            self.transactions_service.transfer(
+                {'original_account_id': first_account_id, 'destination_account_id': second_account_id, 'value': 1.00}
+            )
+        return [transaction['transaction_id'] for transaction in
+                self.transactions_service.get_all_transactions(return_query_args('after='))['transactions']]
+
+    def test_transactions_export_streamed_csv_in_chunks(self):
+        transaction_ids = self.create_transactions(5)
+
+        chunks = list(TransactionsExportService(chunk_size=2).export('csv'))
+        rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+
+        self.assertEqual(4, len(chunks))
+        self.assertEqual(transaction_ids, [row['transaction_id'] for row in rows])
+        self.assertEqual(('DEPOSIT', '1000.00', ''), (rows[0]['transaction_type'], rows[0]['transaction_value'],
+                                                      rows[0]['destination_account']))
+
+        date_from = session.get(TransactionModel, transaction_ids[2]).transaction_date.isoformat()
+        resumed = b''.join(TransactionsExportService().export('csv', date_from, None, transaction_ids[2]))
+        self.assertEqual(transaction_ids[3:], [row['transaction_id'] for row in
+                                               csv.DictReader(io.StringIO(resumed.decode('utf-8')))])
+
+    def test_transactions_export_to_folder_resumed_from_checkpoint(self):
+        transaction_ids = self.create_transactions(5)
+        folder = os.path.join(self.folder.name, 'export')
+        export_service = TransactionsExportService(chunk_size=2)
+
+        self.assertEqual(5, export_service.export_to_folder(folder, 'csv'))
+        new_transaction = self.transactions_service.transfer(
+            {'original_account_id': 1, 'destination_account_id': 2, 'value': 1.00}
+        )['transaction']
+        self.assertEqual(1, export_service.export_to_folder(folder, 'csv'))
+
+        parts = sorted(name for name in os.listdir(folder) if name.startswith('transactions-'))
+        exported = []
+        for part in parts:
+            with open(os.path.join(folder, part), newline='') as part_file:
+                exported.extend(row['transaction_id'] for row in csv.DictReader(part_file))
+        self.assertEqual(['transactions-00001.csv', 'transactions-00002.csv', 'transactions-00003.csv',
+                          'transactions-00004.csv'], parts)
+        self.assertEqual(transaction_ids + [new_transaction['transaction_id']], exported)
+
+    @skipUnless(pyarrow, 'pyarrow is not installed.')
+    def test_transactions_export_streamed_parquet_row_groups(self):
+        import pyarrow.parquet
+        transaction_ids = self.create_transactions(3)
+
+        data = b''.join(TransactionsExportService(chunk_size=2).export('parquet'))
+        parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(data))
+
+        self.assertEqual(2, parquet_file.num_row_groups)
+        self.assertEqual(transaction_ids, parquet_file.read().column('transaction_id').to_pylist())
+
+    def test_account_analytics_grouped_by_sql_buckets(self):
+        first_account_id = self.create_account('12345678901', 1000.00)
+        second_account_id = self.create_account('12345678902', 1000.00)
+        for transaction_type, value, transaction_date, origin, destination in (
+                ('DEPOSIT', '10.00', datetime(2024, 1, 1, 9), first_account_id, None),
+                ('WITHDRAW', '4.00', datetime(2024, 1, 3, 18), first_account_id, None),
+                ('TRANSFER', '3.00', datetime(2024, 1, 7, 23, 59), first_account_id, second_account_id),
+                ('TRANSFER', '2.00', datetime(2024, 1, 8), second_account_id, first_account_id)):
+            session.add(TransactionModel(transaction_id=str(UuidUtils.uuid7()), transaction_type=transaction_type,
+                                         transaction_value=Decimal(value), transaction_date=transaction_date,
+                                         origin_account=origin, destination_account=destination))
+        session.commit()
+        analytics_service = TransactionsAnalyticsService()
+
+        weeks = analytics_service.get_account_analytics(first_account_id, '2024-01-01', '2024-01-31', 'week')
+        months = analytics_service.get_account_analytics(first_account_id, '2024-01-01', '2024-01-31', 'month')
+        days = analytics_service.get_accounts_analytics(
+            {'account_ids': [second_account_id, 999], 'from': '2024-01-01', 'to': '2024-01-31'}
+        )
+
+        self.assertEqual([('2024-01-01', '10.00', '7.00', '3.00', 3), ('2024-01-08', '2.00', '0.00', '2.00', 1)],
+                         [(bucket['bucket'], bucket['inflow'], bucket['outflow'], bucket['net'], bucket['count'])
+                          for bucket in weeks['buckets']])
+        self.assertEqual({'inflow': '0.00', 'outflow': '3.00', 'count': 1}, weeks['buckets'][0]['types']['TRANSFER'])
+        self.assertEqual(['2024-01-01'], [bucket['bucket'] for bucket in months['buckets']])
+        self.assertEqual(weeks['totals'], months['totals'])
+        self.assertEqual({'bucket': '2024-01-01', **months['totals']}, months['buckets'][0])
+        self.assertEqual([('2024-01-07', '3.00', '0.00'), ('2024-01-08', '0.00', '2.00')],
+                         [(bucket['bucket'], bucket['inflow'], bucket['outflow'])
+                          for bucket in days['accounts'][0]['buckets']])
+        self.assertEqual(([], '0.00'), (days['accounts'][1]['buckets'], days['accounts'][1]['totals']['net']))
@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from config.db_config import Base
+from repository.accounts_repository import AccountsRepository
+from util.statement_cache_stats import statement_cache_stats
+
+
+class StatementCacheStatsTest(TestCase):
+
+    def test_repeated_lookups_hit_the_statement_cache(self):
+        engine = create_engine('sqlite://', execution_options={'schema_translate_map': {'accounts': None, 'holders': None}})
+        Base.metadata.create_all(engine)
+        before = statement_cache_stats.snapshot()
+
+        with Session(engine) as session:
+            for account_id in range(1, 6):
+                session.execute(AccountsRepository.select_by_account_id, {'account_id': account_id}).scalars().all()
+
+        after = statement_cache_stats.snapshot()
+        self.assertEqual(1, after['misses'] - before['misses'])
+        self.assertEqual(4, after['hits'] - before['hits'])
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+
+from jsonschema.exceptions import ValidationError
+from sqlalchemy.exc import NoResultFound
+
+from builder import return_active_account
+from config.cache_config import account_cache
+from exceptions.exceptions import AccountNotFound
+from services.transactions_analytics_service import TransactionsAnalyticsService
+
+
+class TransactionsAnalyticsServiceTest(TestCase):
+    transactions_analytics_service = TransactionsAnalyticsService()
+
+    def setUp(self):
+        account_cache.clear()
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_account_analytics')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_account_analytics_folded_grouped_rows_into_buckets(self,
+                                                                get_account_by_account_id_mock,
+                                                                get_account_analytics_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+        get_account_analytics_mock.return_value = [
+            (1, date(2024, 1, 1), 'DEPOSIT', 'inflow', Decimal('10.00'), 2),
+            (1, date(2024, 1, 1), 'TRANSFER', 'outflow', Decimal('3.50'), 1),
+            (1, date(2024, 1, 2), 'TRANSFER', 'inflow', Decimal('1.00'), 1)
+        ]
+
+        result = self.transactions_analytics_service.get_account_analytics(1, '2024-01-01', '2024-01-02')
+
+        get_account_analytics_mock.assert_called_once_with([1], datetime(2024, 1, 1), datetime(2024, 1, 3), 'day')
+        self.assertEqual('day', result['bucket'])
+        self.assertEqual([('2024-01-01', '10.00', '3.50', '6.50', 3), ('2024-01-02', '1.00', '0.00', '1.00', 1)],
+                         [(bucket['bucket'], bucket['inflow'], bucket['outflow'], bucket['net'], bucket['count'])
+                          for bucket in result['buckets']])
+        self.assertEqual({'DEPOSIT': {'inflow': '10.00', 'outflow': '0.00', 'count': 2},
+                          'WITHDRAW': {'inflow': '0.00', 'outflow': '0.00', 'count': 0},
+                          'TRANSFER': {'inflow': '1.00', 'outflow': '3.50', 'count': 2}}, result['totals']['types'])
+        self.assertEqual('7.50', result['totals']['net'])
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_account_analytics')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_account_analytics_raised_account_not_found(self,
+                                                        get_account_by_account_id_mock,
+                                                        get_account_analytics_mock):
+        get_account_by_account_id_mock.side_effect = NoResultFound()
+
+        with self.assertRaises(AccountNotFound):
+            self.transactions_analytics_service.get_account_analytics(1)
+        get_account_analytics_mock.assert_not_called()
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_account_analytics')
+    def test_accounts_analytics_returned_every_requested_account_in_order(self,
+                                                                          get_account_analytics_mock):
+        get_account_analytics_mock.return_value = [(2, date(2024, 1, 1), 'WITHDRAW', 'outflow', Decimal('5.00'), 1)]
+
+        result = self.transactions_analytics_service.get_accounts_analytics({'account_ids': [3, 2], 'bucket': 'month'})
+
+        get_account_analytics_mock.assert_called_once_with([3, 2], None, None, 'month')
+        self.assertEqual([3, 2], [account['account_id'] for account in result['accounts']])
+        self.assertEqual([], result['accounts'][0]['buckets'])
+        self.assertEqual('-5.00', result['accounts'][1]['buckets'][0]['net'])
+
+    def test_analytics_raised_validation_error_before_reading(self):
+        cases = {
+            'bucket': {'account_ids': [1], 'bucket': 'year'},
+            'account_ids': {'account_ids': []},
+            'from': {'account_ids': [1], 'from': '2024-01-32'}
+        }
+        for name, body in cases.items():
+            with self.subTest(name=name):
+                with patch('repository.transactions_repository.TransactionsRepository.get_account_analytics') as mock:
+                    with self.assertRaises(ValidationError):
+                        self.transactions_analytics_service.get_accounts_analytics(body)
+                    mock.assert_not_called()
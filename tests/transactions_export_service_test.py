@@ -0,0 +1,36 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from jsonschema.exceptions import ValidationError
+
+from services.transactions_export_service import TransactionsExportService
+
+
+class TransactionsExportServiceTest(TestCase):
+    transactions_export_service = TransactionsExportService()
+
+    def test_export_raised_validation_error_before_reading(self):
+        cases = {
+            ('xml', None, None): 'format value not allowed, must be csv or parquet.',
+            ('csv', '2024-13-01', None): 'from value not allowed, must be an ISO 8601 date.',
+            ('csv', None, '01a14e98-1063-719e-b5e4-02dd84dfd9cb'): 'after_id can only be used together with from.',
+            ('csv', '2024-01-01', 'abc'): 'after_id value not allowed, must be a transaction id.'
+        }
+        for (file_format, date_from, after_id), message in cases.items():
+            with self.subTest(file_format=file_format, date_from=date_from, after_id=after_id):
+                with patch('repository.transactions_repository.TransactionsRepository.get_transaction_columns') as mock:
+                    with self.assertRaises(ValidationError) as exception_result:
+                        self.transactions_export_service.export(file_format, date_from, None, after_id)
+
+                    self.assertEqual(message, exception_result.exception.args[0])
+                    mock.assert_not_called()
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_transaction_columns')
+    def test_empty_export_returned_csv_header(self,
+                                              get_transaction_columns_mock):
+        get_transaction_columns_mock.return_value = iter([])
+
+        data = b''.join(self.transactions_export_service.export('csv'))
+
+        self.assertEqual(b'transaction_id,transaction_type,transaction_value,transaction_date,origin_account,'
+                         b'destination_account\r\n', data)
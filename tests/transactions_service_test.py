@@ -1,16 +1,24 @@
+import json
+from datetime import datetime
 from decimal import Decimal
 from unittest import TestCase
 from unittest.mock import patch
 from jsonschema.exceptions import ValidationError
-from sqlalchemy.exc import NoResultFound
-from werkzeug.datastructures import EnvironHeaders
+from sqlalchemy.exc import NoResultFound, IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from werkzeug.exceptions import NotFound
 
-from exceptions.exceptions import AccountNotFound, InsufficientBalance, StatusNotAllowed, TransactionNotFound
+from exceptions.exceptions import AccountNotFound, InsufficientBalance, StatusNotAllowed, TransactionNotFound, \
+    IdempotencyKeyConflict, ConcurrentUpdate
 from services.transactions_service import TransactionsService
+from services.accounts_service import AccountsService
 from builders.transaction_builder import TransactionBuilder
 from util.enums.transactions_types import TransactionsTypes
-from builder import return_financial_operation_body, return_active_account, return_financial_operation, \
+from util.cursor_utils import CursorUtils
+from util.uuid_utils import UuidUtils
+from config.cache_config import idempotency_cache, account_cache
+from util.metrics import metrics
+from builder import return_query_args, return_financial_operation_body, return_active_account, return_financial_operation, \
     return_transfer_body, return_transfer_operation, return_blocked_account, return_closed_account, \
     return_list_of_transactions
 
@@ -24,49 +32,37 @@ class TransactionsServiceTest(TestCase):
 
     @staticmethod
     def successful_transfer_side_effect(*args, **kwargs):
-        if args[0] == 1:
-            account = return_active_account()
-            account.account_id = 1
-            account.balance = Decimal('200').quantize(Decimal('1.00'))
-            return account
-        else:
-            account = return_active_account()
-            account.account_id = 2
-            return account
+        origin_account = return_active_account()
+        origin_account.account_id = 1
+        origin_account.balance = Decimal('200').quantize(Decimal('1.00'))
+        destination_account = return_active_account()
+        destination_account.account_id = 2
+        return [origin_account, destination_account]
 
     @staticmethod
     def insufficient_balance_origin_account_side_effect(*args, **kwargs):
-        if args[0] == 1:
-            account = return_active_account()
-            account.account_id = 1
-            account.balance = Decimal('0')
-            return account
-        else:
-            account = return_active_account()
-            account.account_id = 2
-            return account
+        origin_account = return_active_account()
+        origin_account.account_id = 1
+        origin_account.balance = Decimal('0')
+        destination_account = return_active_account()
+        destination_account.account_id = 2
+        return [origin_account, destination_account]
 
     @staticmethod
     def origin_account_blocked_side_effect(*args, **kwargs):
-        if args[0] == 1:
-            account = return_blocked_account()
-            account.account_id = 1
-            return account
-        else:
-            account = return_active_account()
-            account.account_id = 2
-            return account
+        origin_account = return_blocked_account()
+        origin_account.account_id = 1
+        destination_account = return_active_account()
+        destination_account.account_id = 2
+        return [origin_account, destination_account]
 
     @staticmethod
     def destination_account_blocked_side_effect(*args, **kwargs):
-        if args[0] == 1:
-            account = return_active_account()
-            account.account_id = 1
-            return account
-        else:
-            account = return_blocked_account()
-            account.account_id = 2
-            return account
+        origin_account = return_active_account()
+        origin_account.account_id = 1
+        destination_account = return_blocked_account()
+        destination_account.account_id = 2
+        return [origin_account, destination_account]
 
     @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
     @patch('repository.accounts_repository.AccountsRepository.update_account')
@@ -92,25 +88,98 @@ class TransactionsServiceTest(TestCase):
         account = return_active_account()
         account.balance = Decimal('200').quantize(Decimal('1.00'))
         get_account_by_account_id_mock.return_value = account
-        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.WITHDRAW.value)
 
         result = self.transactions_service.withdraw(return_financial_operation_body())
 
         self.assertEqual('Withdraw made successfully!', result['message'])
 
     @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
-    @patch('repository.accounts_repository.AccountsRepository.update_account')
     @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_deposit_and_withdraw_evicted_account_read_before_commit(self,
+                                                                     get_account_by_account_id_mock,
+                                                                     create_transaction_mock):
+        def committed_account(*args, **kwargs):
+            account = return_active_account()
+            account.balance = Decimal('200.00')
+            return account
+
+        def commit(transaction, idempotency_key=None):
+            # A concurrent GET caches the balance still committed in the database.
+            self.assertEqual('200.00', AccountsService().get_account_by_id(1)['balance'])
+            return transaction
+
+        get_account_by_account_id_mock.side_effect = committed_account
+        create_transaction_mock.side_effect = commit
+        for operation in (self.transactions_service.deposit, self.transactions_service.withdraw):
+            with self.subTest(operation=operation.__name__):
+                account_cache.clear()
+
+                operation(return_financial_operation_body())
+
+                self.assertIsNone(account_cache.get(1))
+
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.add_to_bucket')
+    @patch('repository.accounts_repository.AccountsRepository.get_bucket_balance')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_bucketed_deposit_evicted_account_read_before_commit(self,
+                                                                 get_account_by_account_id_mock,
+                                                                 get_bucket_balance_mock,
+                                                                 add_to_bucket_mock,
+                                                                 create_transaction_mock):
+        def committed_account(*args, **kwargs):
+            account = return_active_account()
+            account.balance_buckets = 4
+            return account
+
+        def commit(transaction, idempotency_key=None):
+            self.assertEqual('0.00', AccountsService().get_account_by_id(1)['balance'])
+            return transaction
+
+        get_account_by_account_id_mock.side_effect = committed_account
+        get_bucket_balance_mock.return_value = Decimal('0.00')
+        add_to_bucket_mock.return_value = True
+        create_transaction_mock.side_effect = commit
+        account_cache.clear()
+
+        self.transactions_service.deposit(return_financial_operation_body())
+
+        add_to_bucket_mock.assert_called_once()
+        self.assertIsNone(account_cache.get(1))
+
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_for_update')
     def test_transfer_made_successfully(self,
-                                        get_account_by_account_id_mock,
+                                        get_accounts_for_update_mock,
                                         update_account_mock,
                                         create_transaction_mock):
-        get_account_by_account_id_mock.side_effect = self.successful_transfer_side_effect
+        accounts = self.successful_transfer_side_effect()
+        get_accounts_for_update_mock.return_value = accounts
         create_transaction_mock.return_value = return_transfer_operation()
 
         result = self.transactions_service.transfer(return_transfer_body())
 
         self.assertEqual('Transfer completed with success.', result['message'])
+        get_accounts_for_update_mock.assert_called_once_with([1, 2])
+        update_account_mock.assert_not_called()
+        create_transaction_mock.assert_called_once()
+        self.assertEqual(Decimal('100.00'), accounts[0].balance)
+        self.assertEqual(Decimal('100.00'), accounts[1].balance)
+
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_for_update')
+    def test_transfer_raised_error_when_account_is_not_found(self,
+                                                             get_accounts_for_update_mock,
+                                                             rollback_mock):
+        get_accounts_for_update_mock.return_value = [return_active_account()]
+
+        with self.assertRaises(AccountNotFound) as exception_result:
+            self.transactions_service.transfer(return_transfer_body())
+
+        self.assertEqual('Account not found.', exception_result.exception.args[0])
+        rollback_mock.assert_called_once()
 
     def test_account_transaction_raised_validation_error(self):
         body = return_financial_operation_body()
@@ -159,11 +228,206 @@ class TransactionsServiceTest(TestCase):
         self.assertEqual("Account doesn't have enough balance to complete operation.", exception_result.exception.args[0])
 
     @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.add_to_bucket')
     @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
-    def test_transfer_returned_insufficient_balance(self,
+    def test_deposit_to_bucketed_account_updated_a_bucket(self,
+                                                          get_account_by_account_id_mock,
+                                                          add_to_bucket_mock,
+                                                          update_account_mock,
+                                                          create_transaction_mock):
+        account = return_active_account()
+        account.balance_buckets = 4
+        get_account_by_account_id_mock.return_value = account
+        add_to_bucket_mock.return_value = True
+        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+
+        self.transactions_service.deposit(return_financial_operation_body())
+
+        account_id, bucket, value = add_to_bucket_mock.call_args.args
+        self.assertEqual((1, Decimal('1.00')), (account_id, value))
+        self.assertIn(bucket, range(4))
+        self.assertEqual(Decimal('0.00'), account.balance)
+        update_account_mock.assert_not_called()
+
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.get_bucket_balance')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_for_update')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_withdraw_from_bucketed_account_checked_summed_balance(self,
+                                                                   get_account_by_account_id_mock,
+                                                                   get_accounts_for_update_mock,
+                                                                   get_bucket_balance_mock,
+                                                                   create_transaction_mock):
+        account = return_active_account()
+        account.balance_buckets = 4
+        get_account_by_account_id_mock.return_value = account
+        get_accounts_for_update_mock.return_value = [account]
+        get_bucket_balance_mock.return_value = Decimal('5.00')
+        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.WITHDRAW.value)
+
+        self.transactions_service.withdraw(return_financial_operation_body())
+
+        self.assertEqual(Decimal('-1.00'), account.balance)
+        get_accounts_for_update_mock.assert_called_once_with([1])
+
+        get_bucket_balance_mock.return_value = Decimal('0.50')
+        with self.assertRaises(InsufficientBalance):
+            self.transactions_service.withdraw(return_financial_operation_body())
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_idempotency_key')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_deposit_retried_with_idempotency_key_returned_first_response(self,
+                                                                          get_account_by_account_id_mock,
+                                                                          update_account_mock,
+                                                                          create_transaction_mock,
+                                                                          get_idempotency_key_mock):
+        idempotency_cache.clear()
+        get_account_by_account_id_mock.return_value = return_active_account()
+        get_idempotency_key_mock.return_value = None
+        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+
+        first = self.transactions_service.deposit(return_financial_operation_body(), 'deposit-key')
+        retry = self.transactions_service.deposit(return_financial_operation_body(), 'deposit-key')
+
+        self.assertEqual(first, retry)
+        get_account_by_account_id_mock.assert_called_once()
+        create_transaction_mock.assert_called_once()
+        self.assertEqual('deposit-key', create_transaction_mock.call_args.args[1].idempotency_key)
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_transaction_by_id')
+    @patch('repository.transactions_repository.TransactionsRepository.get_idempotency_key')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_withdraw_retried_after_cache_expired_returned_stored_transaction(self,
+                                                                              get_account_by_account_id_mock,
+                                                                              create_transaction_mock,
+                                                                              get_idempotency_key_mock,
+                                                                              get_transaction_by_id_mock):
+        idempotency_cache.clear()
+        account = return_active_account()
+        account.balance = Decimal('200.00')
+        get_account_by_account_id_mock.return_value = account
+        get_idempotency_key_mock.return_value = None
+        withdraw = return_financial_operation(TransactionsTypes.WITHDRAW.value)
+        create_transaction_mock.return_value = withdraw
+        first = self.transactions_service.withdraw(return_financial_operation_body(), 'withdraw-key')
+        idempotency_cache.clear()
+        get_idempotency_key_mock.return_value = create_transaction_mock.call_args.args[1]
+        get_transaction_by_id_mock.return_value = withdraw
+
+        retry = self.transactions_service.withdraw(return_financial_operation_body(), 'withdraw-key')
+
+        self.assertEqual(first, retry)
+        self.assertEqual(Decimal('199.00'), account.balance)
+        get_account_by_account_id_mock.assert_called_once()
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_idempotency_key')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.update_account')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_idempotency_key_reused_by_different_request_raised_conflict(self,
+                                                                         get_account_by_account_id_mock,
+                                                                         update_account_mock,
+                                                                         create_transaction_mock,
+                                                                         get_idempotency_key_mock):
+        idempotency_cache.clear()
+        get_account_by_account_id_mock.return_value = return_active_account()
+        get_idempotency_key_mock.return_value = None
+        create_transaction_mock.return_value = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+        self.transactions_service.deposit(return_financial_operation_body(), 'reused-key')
+        body = return_financial_operation_body()
+        body['value'] = 2.00
+
+        with self.assertRaises(IdempotencyKeyConflict) as exception_result:
+            self.transactions_service.deposit(body, 'reused-key')
+
+        self.assertEqual('Idempotency-Key was already used by a different request.', exception_result.exception.args[0])
+        create_transaction_mock.assert_called_once()
+
+    @patch('time.sleep')
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_deposit_retried_after_version_conflict(self,
                                                     get_account_by_account_id_mock,
-                                                    create_transaction_mock):
-        get_account_by_account_id_mock.side_effect = self.insufficient_balance_origin_account_side_effect
+                                                    create_transaction_mock,
+                                                    rollback_mock,
+                                                    sleep_mock):
+        get_account_by_account_id_mock.side_effect = lambda account_id: return_active_account()
+        create_transaction_mock.side_effect = [StaleDataError(), return_financial_operation(TransactionsTypes.DEPOSIT.value)]
+        conflicts = metrics.account_conflicts.value('deposit')
+        retries = metrics.account_retries.value('deposit')
+
+        result = self.transactions_service.deposit(return_financial_operation_body())
+
+        self.assertEqual('Deposit made successfully!', result['message'])
+        self.assertEqual(2, get_account_by_account_id_mock.call_count)
+        rollback_mock.assert_called_once()
+        self.assertEqual((conflicts + 1, retries + 1),
+                         (metrics.account_conflicts.value('deposit'), metrics.account_retries.value('deposit')))
+
+    @patch('time.sleep')
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_withdraw_raised_concurrent_update_after_retries(self,
+                                                             get_account_by_account_id_mock,
+                                                             create_transaction_mock,
+                                                             rollback_mock,
+                                                             sleep_mock):
+        def account_with_balance(account_id):
+            account = return_active_account()
+            account.balance = Decimal('200.00')
+            return account
+
+        get_account_by_account_id_mock.side_effect = account_with_balance
+        create_transaction_mock.side_effect = StaleDataError()
+
+        with self.assertRaises(ConcurrentUpdate) as exception_result:
+            self.transactions_service.withdraw(return_financial_operation_body())
+
+        self.assertEqual('Account was updated concurrently, try again.', exception_result.exception.args[0])
+        self.assertEqual(AccountsService.update_retries + 1, create_transaction_mock.call_count)
+
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.transactions_repository.TransactionsRepository.get_transaction_by_id')
+    @patch('repository.transactions_repository.TransactionsRepository.get_idempotency_key')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_deposit_losing_idempotency_key_race_returned_winner_response(self,
+                                                                          get_account_by_account_id_mock,
+                                                                          create_transaction_mock,
+                                                                          get_idempotency_key_mock,
+                                                                          get_transaction_by_id_mock,
+                                                                          rollback_mock):
+        idempotency_cache.clear()
+        get_account_by_account_id_mock.return_value = return_active_account()
+        winner = return_financial_operation(TransactionsTypes.DEPOSIT.value)
+        get_transaction_by_id_mock.return_value = winner
+
+        def concurrent_request_committed_first(transaction, stored_key):
+            get_idempotency_key_mock.return_value = stored_key
+            raise IntegrityError('INSERT', {}, Exception('duplicate key'))
+
+        get_idempotency_key_mock.return_value = None
+        create_transaction_mock.side_effect = concurrent_request_committed_first
+
+        result = self.transactions_service.deposit(return_financial_operation_body(), 'raced-key')
+
+        self.assertEqual(winner.transaction_id, result['transaction']['transaction_id'])
+        rollback_mock.assert_called_once()
+
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.transactions_repository.TransactionsRepository.create_transaction')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_for_update')
+    def test_transfer_returned_insufficient_balance(self,
+                                                    get_accounts_for_update_mock,
+                                                    create_transaction_mock,
+                                                    rollback_mock):
+        get_accounts_for_update_mock.side_effect = self.insufficient_balance_origin_account_side_effect
         body = return_transfer_body()
         create_transaction_mock.return_value = return_transfer_operation(body)
 
@@ -199,17 +463,19 @@ class TransactionsServiceTest(TestCase):
 
         self.assertEqual('Account is not active.', exception_result.exception.args[0])
 
-    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    @patch('repository.accounts_repository.AccountsRepository.rollback')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_for_update')
     def test_transfer_returned_account_not_active(self,
-                                                  get_account_by_account_id_mock):
-        get_account_by_account_id_mock.side_effect = self.origin_account_blocked_side_effect
+                                                  get_accounts_for_update_mock,
+                                                  rollback_mock):
+        get_accounts_for_update_mock.side_effect = self.origin_account_blocked_side_effect
 
         with self.assertRaises(StatusNotAllowed) as exception_result:
             self.transactions_service.transfer(return_transfer_body())
 
         self.assertEqual('Origin Account is not active.', exception_result.exception.args[0])
 
-        get_account_by_account_id_mock.side_effect = self.destination_account_blocked_side_effect
+        get_accounts_for_update_mock.side_effect = self.destination_account_blocked_side_effect
 
         with self.assertRaises(StatusNotAllowed) as exception_result:
             self.transactions_service.transfer(return_transfer_body())
@@ -221,32 +487,70 @@ class TransactionsServiceTest(TestCase):
                                                      get_transactions_mock):
 
         get_transactions_mock.return_value = return_list_of_transactions()
-        headers = EnvironHeaders({"QUERY_STRING": ''})
-        result = self.transactions_service.get_all_transactions(headers)
+        args = return_query_args('')
+        result = self.transactions_service.get_all_transactions(args)
 
         self.assertEqual(self.default_current_page, result['currentPage'])
         self.assertEqual(self.default_max_items_per_page, result['maxItemsPerPage'])
         self.assertEqual(2, len(result['transactions']))
 
+    @patch('repository.transactions_repository.TransactionsRepository.get_transactions_after')
+    def test_get_transactions_with_cursor_returned_next_cursor(self,
+                                                               get_transactions_after_mock):
+        transactions = return_list_of_transactions()
+        get_transactions_after_mock.return_value = transactions
+        last_transaction = transactions[0]
+        after = CursorUtils.encode([last_transaction.transaction_date.isoformat(), last_transaction.transaction_id])
+        args = return_query_args('after={}&maxItemsPerPage=1'.format(after))
+
+        result = self.transactions_service.get_all_transactions(args)
+
+        get_transactions_after_mock.assert_called_once_with(last_transaction.transaction_date,
+                                                            last_transaction.transaction_id, 2)
+        self.assertEqual(1, len(result['transactions']))
+        self.assertEqual(after, result['next'])
+
     @patch('repository.transactions_repository.TransactionsRepository.get_transactions')
     def test_get_transactions_raised_not_found(self,
                                                get_transactions_mock):
         get_transactions_mock.side_effect = NotFound()
-        headers = EnvironHeaders({"QUERY_STRING": ''})
+        args = return_query_args('')
 
         with self.assertRaises(TransactionNotFound) as exception_result:
-            self.transactions_service.get_all_transactions(headers)
+            self.transactions_service.get_all_transactions(args)
 
         self.assertEqual('No transactions found.', exception_result.exception.args[0])
 
     @patch('repository.transactions_repository.TransactionsRepository.get_transaction_by_id')
     def test_get_transaction_by_id_found_successfully(self,
                                                       get_transaction_by_id_mock):
+        transaction = return_transfer_operation()
+        get_transaction_by_id_mock.return_value = transaction
+
+        result = self.transactions_service.get_transaction_by_id(transaction.transaction_id.upper())
+
+        created_at = UuidUtils.timestamp(UuidUtils.parse(transaction.transaction_id))
+        get_transaction_by_id_mock.assert_called_once_with(transaction.transaction_id, created_at)
+        self.assertEqual(transaction.transaction_id, result['transaction_id'])
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_transaction_by_id')
+    def test_get_transaction_by_id_without_time_ordered_id_searched_all_dates(self,
+                                                                           get_transaction_by_id_mock):
+        transaction_id = '6f1c1b7e-5b8e-4d5c-9d7a-2a4e5f6b7c8d'
         get_transaction_by_id_mock.return_value = return_transfer_operation()
 
-        result = self.transactions_service.get_transaction_by_id('')
+        self.transactions_service.get_transaction_by_id(transaction_id)
 
-        self.assertTrue(result)
+        get_transaction_by_id_mock.assert_called_once_with(transaction_id, None)
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_transaction_by_id')
+    def test_get_transaction_by_id_with_invalid_id_raised_not_found(self,
+                                                                    get_transaction_by_id_mock):
+        with self.assertRaises(TransactionNotFound) as exception_result:
+            self.transactions_service.get_transaction_by_id('not-a-transaction-id')
+
+        get_transaction_by_id_mock.assert_not_called()
+        self.assertEqual('Transaction not found.', exception_result.exception.args[0])
 
     @patch('repository.transactions_repository.TransactionsRepository.get_transaction_by_id')
     def test_get_transaction_by_id_raised_not_found(self,
@@ -254,6 +558,80 @@ class TransactionsServiceTest(TestCase):
         get_transaction_by_id_mock.side_effect = NoResultFound()
 
         with self.assertRaises(TransactionNotFound) as exception_result:
-            result = self.transactions_service.get_transaction_by_id('')
+            result = self.transactions_service.get_transaction_by_id(str(UuidUtils.uuid7()))
 
         self.assertEqual('Transaction not found.', exception_result.exception.args[0])
+
+    @patch('repository.transactions_repository.TransactionsRepository.create_transactions')
+    @patch('repository.accounts_repository.AccountsRepository.get_accounts_for_update')
+    def test_batch_applied_operations_grouped_by_account(self,
+                                                         get_accounts_for_update_mock,
+                                                         create_transactions_mock):
+        first_account = return_active_account()
+        first_account.balance = Decimal('10.00')
+        second_account = return_blocked_account()
+        second_account.account_id = 2
+        get_accounts_for_update_mock.return_value = [first_account, second_account]
+        body = {
+            "operations": [
+                {"type": "DEPOSIT", "account_id": 1, "value": 5.00},
+                {"type": "WITHDRAW", "account_id": 1, "value": 12.00},
+                {"type": "WITHDRAW", "account_id": 1, "value": 20.00},
+                {"type": "DEPOSIT", "account_id": 2, "value": 1.00},
+                {"type": "DEPOSIT", "account_id": 3, "value": 1.00},
+                {"type": "DEPOSIT", "account_id": 1, "value": 0}
+            ]
+        }
+
+        result = self.transactions_service.batch(body)
+
+        get_accounts_for_update_mock.assert_called_once_with([1, 2, 3])
+        create_transactions_mock.assert_called_once()
+        self.assertEqual(2, len(create_transactions_mock.call_args.args[0]))
+        self.assertEqual(Decimal('3.00'), first_account.balance)
+        self.assertEqual(2, result['succeeded'])
+        self.assertEqual(4, result['failed'])
+        self.assertEqual([201, 201, 400, 400, 404, 400], [item['status'] for item in result['results']])
+        self.assertEqual("Account doesn't have enough balance to complete operation.", result['results'][2]['error'])
+        self.assertEqual('Account is not active.', result['results'][3]['error'])
+        self.assertEqual('Account not found.', result['results'][4]['error'])
+        self.assertEqual('0 is less than the minimum of 0.01', result['results'][5]['error'])
+        self.assertEqual(TransactionsTypes.WITHDRAW.value, result['results'][1]['transaction']['transaction_type'])
+
+    def test_batch_raised_validation_error(self):
+        with self.assertRaises(ValidationError) as exception_result:
+            self.transactions_service.batch({"operations": []})
+
+        self.assertEqual('[] should be non-empty', exception_result.exception.args[0])
+
+    @patch('repository.transactions_repository.TransactionsRepository.get_account_statement')
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_get_account_statement_streamed_transactions(self,
+                                                         get_account_by_account_id_mock,
+                                                         get_account_statement_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+        get_account_statement_mock.return_value = iter(return_list_of_transactions())
+
+        lines = list(self.transactions_service.get_account_statement(1, '2024-01-01', '2024-01-31'))
+
+        get_account_statement_mock.assert_called_once_with(1, datetime(2024, 1, 1), datetime(2024, 2, 1))
+        self.assertEqual(2, len(lines))
+        self.assertTrue(all(line.endswith('\n') for line in lines))
+        self.assertEqual(TransactionsTypes.TRANSFER.name, json.loads(lines[0])['transaction_type'])
+
+    @patch('repository.accounts_repository.AccountsRepository.get_account_by_account_id')
+    def test_get_account_statement_raised_errors(self,
+                                                 get_account_by_account_id_mock):
+        get_account_by_account_id_mock.return_value = return_active_account()
+
+        with self.assertRaises(ValidationError) as exception_result:
+            self.transactions_service.get_account_statement(1, 'yesterday')
+
+        self.assertEqual('from value not allowed, must be an ISO 8601 date.', exception_result.exception.args[0])
+
+        get_account_by_account_id_mock.side_effect = NoResultFound()
+
+        with self.assertRaises(AccountNotFound) as exception_result:
+            self.transactions_service.get_account_statement(1)
+
+        self.assertEqual('Account not found.', exception_result.exception.args[0])
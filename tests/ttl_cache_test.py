@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from util.ttl_cache import TTLCache
+
+
+class TTLCacheTest(TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=lambda: self.now)
+
+    def test_entry_expired_after_ttl(self):
+        self.cache.set(1, 'account')
+
+        self.assertEqual('account', self.cache.get(1))
+
+        self.now = 10.0
+
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual({'hits': 1, 'misses': 1}, {key: self.cache.stats()[key] for key in ('hits', 'misses')})
+
+    def test_least_recently_used_entry_was_evicted(self):
+        self.cache.set(1, 'first')
+        self.cache.set(2, 'second')
+        self.cache.get(1)
+        self.cache.set(3, 'third')
+
+        self.assertEqual('first', self.cache.get(1))
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_zero_maxsize_disabled_cache(self):
+        cache = TTLCache(maxsize=0, ttl=10)
+        cache.set(1, 'account')
+
+        self.assertIsNone(cache.get(1))
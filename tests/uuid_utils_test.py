@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from util.uuid_utils import UuidUtils
+
+
+class UuidUtilsTest(TestCase):
+
+    def test_uuid7_ids_were_ordered_by_creation(self):
+        ids = [UuidUtils.uuid7() for _ in range(10000)]
+
+        self.assertEqual(sorted(ids), ids)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertTrue(all(value.version == 7 for value in ids))
+
+    def test_timestamp_returned_creation_time(self):
+        before = datetime.now() - timedelta(milliseconds=1)
+
+        created_at = UuidUtils.timestamp(UuidUtils.uuid7())
+
+        self.assertTrue(before <= created_at <= datetime.now())
+
+    def test_timestamp_of_random_id_returned_none(self):
+        self.assertIsNone(UuidUtils.timestamp(UuidUtils.parse('6f1c1b7e-5b8e-4d5c-9d7a-2a4e5f6b7c8d')))
+
+    def test_parse_of_invalid_id_returned_none(self):
+        self.assertIsNone(UuidUtils.parse('not-a-transaction-id'))
+        self.assertIsNone(UuidUtils.parse(None))
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from jsonschema import validate, ValidationError
+
+from util.schemas_templates import account_financial_operation_schema, transfer_schema, post_holder_schema, \
+    batch_operation_schema
+from util.validator import Validator
+
+BODIES = [
+    {'account_id': 1, 'value': 10.5},
+    {'account_id': 1},
+    {'account_id': 0, 'value': 10},
+    {'account_id': 1, 'value': 0},
+    {'account_id': 1, 'value': True},
+    {'account_id': '1', 'value': '10'},
+    {'original_account_id': 1, 'destination_account_id': 2, 'value': 1.0},
+    {'original_account_id': 1, 'value': 1.0},
+    {'original_account_id': 1, 'destination_account_id': -2, 'value': 0.001},
+    {'name': 'Holder', 'document': '12345678901'},
+    {'name': 'Ho', 'document': '123'},
+    {'type': 'DEPOSIT', 'account_id': 1, 'value': 1},
+    {'type': 'TRANSFER', 'account_id': 1, 'value': 1},
+    [],
+    None
+]
+
+
+class ValidatorTest(TestCase):
+
+    def test_validate_body_raised_same_errors_as_jsonschema(self):
+        for schema in (account_financial_operation_schema, transfer_schema, post_holder_schema, batch_operation_schema):
+            for body in BODIES:
+                with self.subTest(schema=schema, body=body):
+                    try:
+                        validate(body, schema)
+                        expected = None
+                    except ValidationError as e:
+                        expected = e.message
+
+                    try:
+                        Validator.validate_body(body, schema)
+                        result = None
+                    except ValidationError as e:
+                        result = e.message
+
+                    self.assertEqual(expected, result)
+
+    def test_schema_compiled_once(self):
+        schema = {'type': 'object', 'properties': {'value': {'type': 'number'}}}
+
+        self.assertIs(Validator.compile(schema), Validator.compile(schema))
@@ -0,0 +1,42 @@
+import threading
+from collections import OrderedDict
+
+
+class AccountContentionStats:
+    """Counts the optimistic locking conflicts and retries of each Account.
+
+    Only the ``maxsize`` most recently contended Accounts are kept, so a burst
+    of conflicts on many Accounts can't grow it without bound.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.__lock = threading.Lock()
+        # account_id -> [conflicts, retries, failures]
+        self.__accounts = OrderedDict()
+
+    def record(self, account_id, retried):
+        with self.__lock:
+            counts = self.__accounts.get(account_id)
+            if counts is None:
+                counts = self.__accounts[account_id] = [0, 0, 0]
+            self.__accounts.move_to_end(account_id)
+            counts[0] += 1
+            counts[1 if retried else 2] += 1
+            while len(self.__accounts) > self.maxsize:
+                self.__accounts.popitem(last=False)
+
+    def snapshot(self, top=10):
+        with self.__lock:
+            accounts = sorted(self.__accounts.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return [
+            {'account_id': account_id, 'conflicts': conflicts, 'retries': retries, 'failures': failures}
+            for account_id, (conflicts, retries, failures) in accounts
+        ]
+
+    def clear(self):
+        with self.__lock:
+            self.__accounts.clear()
+
+
+account_contention_stats = AccountContentionStats()
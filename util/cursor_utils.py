@@ -0,0 +1,32 @@
+import base64
+import binascii
+import json
+
+from jsonschema import ValidationError
+
+
+class CursorUtils:
+
+    @staticmethod
+    def encode(values):
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode(token, converters):
+        if token is None or token == '':
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            if not isinstance(values, list) or len(values) != len(converters):
+                raise ValueError(token)
+            return [converter(value) for converter, value in zip(converters, values)]
+        except (ValueError, TypeError, binascii.Error):
+            raise ValidationError('after value not allowed, invalid cursor.')
+
+    @staticmethod
+    def page(rows, limit, key):
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, CursorUtils.encode(key(rows[-1]))
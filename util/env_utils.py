@@ -0,0 +1,21 @@
+import os
+
+
+class EnvUtils:
+
+    @staticmethod
+    def get_int(name, default):
+        value = os.environ.get(name)
+        return int(value) if value not in (None, '') else default
+
+    @staticmethod
+    def get_float(name, default):
+        value = os.environ.get(name)
+        return float(value) if value not in (None, '') else default
+
+    @staticmethod
+    def get_bool(name, default):
+        value = os.environ.get(name)
+        if value in (None, ''):
+            return default
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
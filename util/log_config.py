@@ -1,41 +1,125 @@
+import atexit
+import copy
 import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
 from logging import StreamHandler, LogRecord
+from logging.handlers import QueueHandler, QueueListener
 
 from pythonjsonlogger import jsonlogger
 
+from util.env_utils import EnvUtils
+
 LOG_LEVEL = 'LOG_LEVEL'
+LOG_QUEUE_SIZE = EnvUtils.get_int('LOG_QUEUE_SIZE', 10000)
+# Info/debug records above this many per second are sampled; warnings and errors always pass.
+LOG_INFO_PER_SECOND = EnvUtils.get_int('LOG_INFO_PER_SECOND', 200)
+LOG_INFO_SAMPLE_RATE = EnvUtils.get_float('LOG_INFO_SAMPLE_RATE', 0.1)
 
 root = logging.getLogger()
 if root.handlers:
     for handler in root.handlers:
         root.removeHandler(handler)
 
+_tracing_info = ContextVar('tracing_info', default={})
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every record up to ``per_second`` a second, then a ``sample_rate`` share of the info/debug ones."""
 
-class TracingHandler(StreamHandler):
-    def __init__(self):
+    def __init__(self, per_second, sample_rate, clock=time.monotonic, rand=random.random):
         super().__init__()
-        self.tracing_info = {}
+        self.per_second = per_second
+        self.sample_rate = sample_rate
+        self.clock = clock
+        self.rand = rand
+        self.sampled_out = 0
+        self.__window = 0
+        self.__count = 0
+        self.__lock = threading.Lock()
 
-    def emit(self, record: LogRecord) -> None:
-        for key in self.tracing_info:
-            record.__setattr__(key, self.tracing_info[key])
-        super(TracingHandler, self).emit(record)
+    def filter(self, record: LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.per_second <= 0:
+            return True
+        window = int(self.clock())
+        with self.__lock:
+            if window != self.__window:
+                self.__window = window
+                self.__count = 0
+            self.__count += 1
+            if self.__count <= self.per_second or self.rand() < self.sample_rate:
+                return True
+            self.sampled_out += 1
+            return False
 
 
-handler = TracingHandler()
-logger = logging.getLogger('bank-account-python')
+class TracingHandler(QueueHandler):
+    """Hands records to a background thread that formats and writes them.
+
+    The per-request tracing info is copied onto the record here, on the
+    request's thread. Info records are dropped when the queue is full, errors
+    wait for room.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # The formatter runs on the listener thread, so the dict message is kept as is instead of being
+        # rendered to text here; only the traceback is rendered while it is still available.
+        record = copy.copy(record)
+        for key, value in _tracing_info.get().items():
+            record.__setattr__(key, value)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: LogRecord) -> None:
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+stream_handler = StreamHandler()
 supported_keys = ['levelname', 'message', 'filename', 'funcName', 'lineno', 'module', 'name']
 log_format = lambda x: ['%({0:s})'.format(i) for i in x]
 custom_format = ' '.join(log_format(supported_keys))
 formatter = jsonlogger.JsonFormatter(custom_format, timestamp=True)
-handler.setFormatter(formatter)
+stream_handler.setFormatter(formatter)
+
+sampling_filter = SamplingFilter(LOG_INFO_PER_SECOND, LOG_INFO_SAMPLE_RATE)
+handler = TracingHandler(queue.Queue(LOG_QUEUE_SIZE))
+handler.addFilter(sampling_filter)
+listener = QueueListener(handler.queue, stream_handler)
+listener.start()
+atexit.register(listener.stop)
+
+logger = logging.getLogger('bank-account-python')
 logger.addHandler(handler)
-_log_level = 'DEBUG'
-logger.setLevel(_log_level)
+_log_level = os.environ.get(LOG_LEVEL) or 'INFO'
+logger.setLevel(_log_level.upper())
 
 
 def add_tracing_info(info: dict):
-    handler.tracing_info.update(info)
+    _tracing_info.set({**_tracing_info.get(), **info})
+
+
+def clear_tracing_info(exception=None):
+    _tracing_info.set({})
+
+
+def log_stats():
+    return {'sampled_out': sampling_filter.sampled_out, 'dropped': handler.dropped, 'queued': handler.queue.qsize()}
 
 
-__ALL__ = "logger, add_tracing_info"
+__ALL__ = "logger, add_tracing_info, clear_tracing_info, log_stats"
@@ -0,0 +1,186 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import g, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# Statements executed by the current request, or None outside of a request.
+_request_statements = ContextVar('request_statements', default=None)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+class Counter:
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.__lock = threading.Lock()
+        self.__values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self.__lock:
+            self.__values[label_values] = self.__values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self.__values.get(label_values, 0)
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.__lock:
+            values = sorted(self.__values.items())
+        lines.extend(f'{self.name}{_labels(self.label_names, labels)} {value}' for labels, value in values)
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        # label values -> [per bucket counts (last one is +Inf), sum]
+        self.__values = {}
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self.__lock:
+            series = self.__values.get(label_values)
+            if series is None:
+                series = self.__values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *label_values):
+        series = self.__values.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.__lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.__values.items())
+        names = self.label_names + ('le',)
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+
+class Metrics:
+    """Request, repository and SQL counters of the API, exposed in the Prometheus text format."""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.requests = Counter('http_requests_total', 'Requests answered.', ('method', 'route', 'status'))
+        self.errors = Counter('http_request_errors_total', 'Requests answered with a 5xx status.', ('method', 'route'))
+        self.request_duration = Histogram('http_request_duration_seconds', 'Time to answer a request.',
+                                          ('method', 'route'))
+        self.request_statements = Histogram('http_request_db_statements', 'SQL statements executed per request.',
+                                            ('method', 'route'), STATEMENT_BUCKETS)
+        self.repository_duration = Histogram('repository_duration_seconds', 'Time spent in repository methods.',
+                                             ('repository', 'method'))
+        self.statements = Counter('db_statements_total', 'SQL statements executed.')
+        self.account_conflicts = Counter('account_update_conflicts_total',
+                                         'Account updates rejected because the Account changed since it was read.',
+                                         ('operation',))
+        self.account_retries = Counter('account_update_retries_total', 'Account updates retried after a conflict.',
+                                       ('operation',))
+        self.__collectors = [self.requests, self.errors, self.request_duration, self.request_statements,
+                             self.repository_duration, self.statements, self.account_conflicts, self.account_retries]
+
+    @staticmethod
+    def start_request():
+        """Starts timing the current request and counting its statements; the result goes to end_request."""
+        statements = [0]
+        _request_statements.set(statements)
+        return time.perf_counter(), statements
+
+    def end_request(self, started, method, route, status):
+        started_at, statements = started
+        elapsed = time.perf_counter() - started_at
+        _request_statements.set(None)
+        self.requests.inc(method, route, status)
+        if status >= 500:
+            self.errors.inc(method, route)
+        self.request_duration.observe(elapsed, method, route)
+        self.request_statements.observe(statements[0], method, route)
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.inc()
+        statements = _request_statements.get()
+        if statements is not None:
+            statements[0] += 1
+
+    def expose(self):
+        lines = []
+        for collector in self.__collectors:
+            lines.extend(collector.expose())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+event.listen(Engine, 'after_cursor_execute', metrics.record_statement)
+
+
+def timed_repository(cls):
+    """Class decorator recording the duration of every public method of a repository.
+
+    Static query builders and generator methods (whose time would include the
+    consumer) are left as they are.
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or not inspect.isfunction(method) or inspect.isgeneratorfunction(method):
+            continue
+        setattr(cls, name, _timed(method, cls.__name__, name))
+    return cls
+
+
+def _timed(method, repository, name):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.repository_duration.observe(time.perf_counter() - started, repository, name)
+
+    return wrapper
+
+
+def init_metrics(app):
+    """Records every request of the Flask app and serves the metrics at /metrics."""
+    @app.before_request
+    def start_request():
+        g.metrics_started = metrics.start_request()
+
+    @app.after_request
+    def end_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # The namespace is mounted at "/", so its rules start with "//".
+            route = '/' + request.url_rule.rule.lstrip('/') if request.url_rule is not None else 'unmatched'
+            metrics.end_request(started, request.method, route, response.status_code)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(metrics.expose(), content_type=Metrics.content_type))
@@ -1,11 +1,76 @@
+from datetime import datetime, timedelta
+
+from jsonschema import ValidationError
+
+
+class ListParams:
+    """Validated query parameters of the list endpoints."""
+
+    __slots__ = ('current_page', 'max_items_per_page', 'after')
+
+    def __init__(self, current_page=1, max_items_per_page=50, after=None):
+        self.current_page = current_page
+        self.max_items_per_page = max_items_per_page
+        self.after = after
+
+    @property
+    def offset(self):
+        return (self.current_page - 1) * self.max_items_per_page
 
 
 class ParamsUtils:
 
+    list_params = ('currentPage', 'maxItemsPerPage', 'after')
+
+    @staticmethod
+    def parse_list_params(args):
+        """Builds ListParams from already parsed query args (Werkzeug or Starlette multi dicts) in one pass."""
+        for name in args.keys():
+            if name not in ParamsUtils.list_params:
+                raise ValidationError('Filter not allowed.')
+        current_page = ParamsUtils.__int_param(
+            args, 'currentPage', 1, lambda value: value >= 1,
+            'currentPage value not allowed, must be greater than or equal 1.'
+        )
+        max_items_per_page = ParamsUtils.__int_param(
+            args, 'maxItemsPerPage', 50, lambda value: 0 < value <= 50,
+            'maxItemsPerPage value not allowed, must be greater than 0 and less or equal 50.'
+        )
+        after = args.get('after')
+        if after is not None and 'currentPage' in args:
+            raise ValidationError('currentPage and after can not be used together.')
+        return ListParams(current_page, max_items_per_page, after)
+
+    @staticmethod
+    def parse_date(name, value, end_of_day=False):
+        """Parses an ISO 8601 date filter; a plain date used as an end bound covers that whole day."""
+        if value is None or value == '':
+            return None
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValidationError(f'{name} value not allowed, must be an ISO 8601 date.')
+        if end_of_day and len(value) == 10:
+            date += timedelta(days=1)
+        return date
+
+    @staticmethod
+    def parse_date_range(date_from, date_to):
+        date_from = ParamsUtils.parse_date('from', date_from)
+        date_to = ParamsUtils.parse_date('to', date_to, True)
+        if date_from and date_to and date_from >= date_to:
+            raise ValidationError('from value not allowed, must be before to.')
+        return date_from, date_to
+
     @staticmethod
-    def update_params(params, query_string):
-        if query_string and query_string != '':
-            for param in query_string.split('&'):
-                sorts = param.split('=')
-                params.update({sorts[0]: int(sorts[1])})
-        return params
+    def __int_param(args, name, default, is_allowed, message):
+        value = args.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError(message)
+        if not is_allowed(value):
+            raise ValidationError(message)
+        return value
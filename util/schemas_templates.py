@@ -82,3 +82,94 @@ transfer_schema = {
         "value"
     ]
 }
+
+batch_operation_schema = {
+    "type": "object",
+    "properties": {
+        "type": {
+            "type": "string",
+            "enum": [
+                "DEPOSIT",
+                "WITHDRAW"
+            ]
+        },
+        "account_id": {
+            "type": "number",
+            "minimum": 1
+        },
+        "value": {
+            "type": "number",
+            "minimum": 0.01
+        }
+    },
+    "required": [
+        "type",
+        "account_id",
+        "value"
+    ]
+}
+
+batch_financial_operation_schema = {
+    "type": "object",
+    "properties": {
+        "operations": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": 1000
+        }
+    },
+    "required": [
+        "operations"
+    ]
+}
+
+import_holder_schema = {
+    "type": "object",
+    "properties": {
+        "name": {
+            "type": "string",
+            "minLength": 3
+        },
+        "document": {
+            "type": "string",
+            "minLength": 11,
+            "maxLength": 11
+        },
+        "balance": {
+            "type": "number",
+            "minimum": 0
+        }
+    },
+    "required": [
+        "name",
+        "document"
+    ]
+}
+
+account_analytics_schema = {
+    "type": "object",
+    "properties": {
+        "account_ids": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": 100,
+            "uniqueItems": True,
+            "items": {
+                "type": "integer",
+                "minimum": 1
+            }
+        },
+        "from": {
+            "type": "string"
+        },
+        "to": {
+            "type": "string"
+        },
+        "bucket": {
+            "type": "string"
+        }
+    },
+    "required": [
+        "account_ids"
+    ]
+}
@@ -0,0 +1,117 @@
+"""Response serializers shared by the services.
+
+Each serializer reads the model attributes with one precompiled attrgetter and
+resolves enums through plain dict lookups, so the per-row cost stays a handful
+of attribute reads. ``dumps`` uses orjson when it is installed and falls back
+to the standard library otherwise.
+"""
+import json
+from decimal import Decimal
+from operator import attrgetter
+
+from util.enums.account_status import Status
+from util.enums.transactions_types import TransactionsTypes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CENTS = Decimal('1.00')
+STATUS_NAMES = {status.value: status.name for status in Status}
+TRANSACTION_TYPE_NAMES = {transaction_type.value: transaction_type.name for transaction_type in TransactionsTypes}
+
+
+def money(value):
+    return str((value if isinstance(value, Decimal) else Decimal(value)).quantize(CENTS))
+
+
+def timestamp(value):
+    # Same output as strftime("%Y-%m-%dT%H:%M:%S") for the naive datetimes stored in the database.
+    return value.isoformat(timespec='seconds')
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(data)
+
+
+class HolderSerializer:
+
+    __fields = attrgetter('holder_id', 'name', 'document')
+
+    @staticmethod
+    def to_dict(holder):
+        holder_id, name, document = HolderSerializer.__fields(holder)
+        return {'holder_id': holder_id, 'name': name, 'document': document}
+
+    @staticmethod
+    def to_list(holders):
+        return [HolderSerializer.to_dict(holder) for holder in holders]
+
+
+class AccountSerializer:
+
+    __fields = attrgetter('account_id', 'holder_id', 'balance', 'status')
+
+    @staticmethod
+    def to_dict(account, balance=None):
+        """``balance`` overrides the stored one, e.g. with the total of a bucketed account."""
+        account_id, holder_id, stored_balance, status = AccountSerializer.__fields(account)
+        return {
+            'account_id': account_id,
+            'holder_id': holder_id,
+            'balance': str(stored_balance if balance is None else balance),
+            'status': STATUS_NAMES[status]
+        }
+
+    @staticmethod
+    def to_list(accounts):
+        return [AccountSerializer.to_dict(account) for account in accounts]
+
+
+class TransactionSerializer:
+
+    __fields = attrgetter('transaction_id', 'transaction_type', 'transaction_value', 'transaction_date',
+                          'origin_account', 'destination_account')
+
+    @staticmethod
+    def to_dict(transaction):
+        transaction_id, transaction_type, value, date, origin, destination = TransactionSerializer.__fields(transaction)
+        return {
+            'transaction_id': transaction_id,
+            'transaction_type': TRANSACTION_TYPE_NAMES[transaction_type],
+            'transaction_value': money(value),
+            'transaction_date': timestamp(date),
+            'origin_account': origin,
+            'destination_account': destination if destination else ''
+        }
+
+    @staticmethod
+    def to_list(transactions):
+        return [TransactionSerializer.to_dict(transaction) for transaction in transactions]
+
+    @staticmethod
+    def to_operation_dict(transaction):
+        """Deposit/withdraw response: the account is the origin and there is no destination."""
+        transaction_id, transaction_type, value, date, origin, _ = TransactionSerializer.__fields(transaction)
+        return {
+            'transaction_id': transaction_id,
+            'transaction_type': transaction_type,
+            'transaction_value': money(value),
+            'transaction_date': timestamp(date),
+            'account_id': origin
+        }
+
+    @staticmethod
+    def to_transfer_dict(transaction):
+        transaction_id, transaction_type, value, date, origin, destination = TransactionSerializer.__fields(transaction)
+        return {
+            'transaction_id': transaction_id,
+            'transaction_type': transaction_type,
+            'transaction_value': money(value),
+            'transaction_date': timestamp(date),
+            'origin_account': origin,
+            'destination_account': destination
+        }
@@ -0,0 +1,39 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+
+class StatementCacheStats:
+    """Counts how executed statements were served by SQLAlchemy's compiled cache."""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__uncached = 0
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        cache_hit = getattr(context, 'cache_hit', None)
+        with self.__lock:
+            if cache_hit is CACHE_HIT:
+                self.__hits += 1
+            elif cache_hit is CACHE_MISS:
+                self.__misses += 1
+            else:
+                self.__uncached += 1
+
+    def snapshot(self):
+        with self.__lock:
+            cached = self.__hits + self.__misses
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'uncached': self.__uncached,
+                'hit_ratio': round(self.__hits / cached, 4) if cached else 0.0
+            }
+
+
+statement_cache_stats = StatementCacheStats()
+event.listen(Engine, 'after_cursor_execute', statement_cache_stats.record)
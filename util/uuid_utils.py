@@ -0,0 +1,53 @@
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class UuidUtils:
+    """Time-ordered UUIDv7 ids (RFC 9562): 48 bits of Unix milliseconds, then a counter and random bits.
+
+    Ids follow insertion order, so new primary key entries land on the right
+    edge of the B-tree instead of on a random page.
+    """
+
+    __lock = threading.Lock()
+    __last_millis = 0
+    __counter = 0
+
+    @classmethod
+    def uuid7(cls):
+        with cls.__lock:
+            millis = time.time_ns() // 1_000_000
+            if millis > cls.__last_millis:
+                cls.__last_millis = millis
+                cls.__counter = secrets.randbits(11)
+            else:
+                # Same millisecond (or the clock went back): keep ids ordered with the 12 bit counter.
+                cls.__counter += 1
+                if cls.__counter > 0xFFF:
+                    cls.__last_millis += 1
+                    cls.__counter = secrets.randbits(11)
+            millis, counter = cls.__last_millis, cls.__counter
+        value = (millis & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | secrets.randbits(62)
+        return uuid.UUID(int=value)
+
+    @staticmethod
+    def canonical(value):
+        if not isinstance(value, str):
+            raise TypeError(value)
+        return str(uuid.UUID(value))
+
+    @staticmethod
+    def parse(value):
+        try:
+            return uuid.UUID(UuidUtils.canonical(value))
+        except (ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def timestamp(value):
+        if value.version != 7:
+            return None
+        return datetime.fromtimestamp((value.int >> 80) / 1000)
@@ -1,27 +1,83 @@
-from jsonschema import validate, ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from util import schemas_templates
 
 
 class Validator:
 
+    # id(schema) -> (schema, fast check or None, compiled jsonschema validator)
+    __compiled = {}
+
+    @staticmethod
+    def compile(schema):
+        compiled = Validator.__compiled.get(id(schema))
+        if compiled is None or compiled[0] is not schema:
+            cls = validator_for(schema)
+            cls.check_schema(schema)
+            compiled = (schema, Validator.__fast_check(schema), cls(schema))
+            Validator.__compiled[id(schema)] = compiled
+        return compiled
+
     @staticmethod
     def validate_body(body, schema):
-        try:
-            validate(body, schema)
-        except ValidationError as e:
-            raise e
+        _, fast_check, validator = Validator.compile(schema)
+        if fast_check is not None and fast_check(body):
+            return
+        # Invalid (or not fast checkable) bodies go through jsonschema so the error is the same as validate() raised.
+        error = best_match(validator.iter_errors(body))
+        if error is not None:
+            raise error
 
     @staticmethod
-    def validate_params(headers, params):
-        if headers is not None and headers.environ is not None:
-            if headers.environ['QUERY_STRING'] is not None and headers.environ['QUERY_STRING'] != "":
-                for param in headers.environ['QUERY_STRING'].split('&'):
-                    sorts = param.split('=')
-                    if sorts.__len__() == 2:
-                        if sorts[0] not in params:
-                            raise ValidationError('Filter not allowed.')
-                        elif sorts[0] == 'maxItemsPerPage' and (int(sorts[1]) > 50 or int(sorts[1]) <= 0):
-                            raise ValidationError('maxItemsPerPage value not allowed, must be greater than 0 and less or equal 50.')
-                        elif sorts[0] == 'currentPage' and int(sorts[1]) <= 0:
-                            raise ValidationError('currentPage value not allowed, must be greater than or equal 1.')
-                    else:
-                        raise ValidationError('Filter not allowed.')
+    def __fast_check(schema):
+        """Builds a plain Python check for flat object schemas, or None if the schema uses other keywords.
+
+        The check only answers "valid"; a False result falls back to jsonschema.
+        """
+        if set(schema) - {'type', 'properties', 'required'} or schema.get('type') != 'object':
+            return None
+        property_checks = []
+        for name, property_schema in schema.get('properties', {}).items():
+            check = Validator.__fast_property_check(property_schema)
+            if check is None:
+                return None
+            property_checks.append((name, check))
+        required = tuple(schema.get('required', ()))
+
+        def fast_check(body):
+            if type(body) is not dict:
+                return False
+            for name in required:
+                if name not in body:
+                    return False
+            for name, check in property_checks:
+                if name in body and not check(body[name]):
+                    return False
+            return True
+
+        return fast_check
+
+    @staticmethod
+    def __fast_property_check(property_schema):
+        property_type = property_schema.get('type')
+        if property_type == 'number' and set(property_schema) <= {'type', 'minimum'}:
+            minimum = property_schema.get('minimum')
+            return lambda value: type(value) in (int, float) and (minimum is None or value >= minimum)
+        if property_type == 'string' and set(property_schema) <= {'type', 'minLength', 'maxLength', 'enum'}:
+            min_length = property_schema.get('minLength', 0)
+            max_length = property_schema.get('maxLength')
+            enum = frozenset(property_schema['enum']) if 'enum' in property_schema else None
+            return lambda value: type(value) is str and len(value) >= min_length and \
+                (max_length is None or len(value) <= max_length) and (enum is None or value in enum)
+        if property_type == 'array' and set(property_schema) <= {'type', 'minItems', 'maxItems'}:
+            min_items = property_schema.get('minItems', 0)
+            max_items = property_schema.get('maxItems')
+            return lambda value: type(value) is list and len(value) >= min_items and \
+                (max_items is None or len(value) <= max_items)
+        return None
+
+
+# The request schemas never change, so they are checked and compiled once at import.
+for _schema in (value for name, value in vars(schemas_templates).items() if name.endswith('_schema')):
+    Validator.compile(_schema)